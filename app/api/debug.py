@@ -0,0 +1,174 @@
+"""
+Diagnostics for live workers.
+
+The profiler requires the ``X-Admin-Token`` header to match ``ADMIN_TOKEN``
+and is disabled with no token configured. EXPLAIN capture is available only
+when ``DEBUG`` is on.
+"""
+
+import asyncio
+import hmac
+import os
+import time
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.config import settings
+from app.explain import capturing, load_capture, new_capture_id, save_capture
+from app.profiler import FORMATS, ProfilerBusy, profiling, to_collapsed, to_speedscope
+
+def verify_admin_token(token: Optional[str]) -> bool:
+    return bool(settings.ADMIN_TOKEN) and token is not None and hmac.compare_digest(
+        token.encode(), settings.ADMIN_TOKEN.encode())
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not verify_admin_token(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+async def require_debug():
+    if not settings.DEBUG:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+router = APIRouter(prefix="/debug", tags=["Debug"], dependencies=[Depends(require_admin)])
+explain_router = APIRouter(prefix="/debug", tags=["Debug"], dependencies=[Depends(require_debug)])
+
+def _render(profiler, output: str, name: str, filename: str):
+    if output == "speedscope":
+        return JSONResponse(
+            content=to_speedscope(profiler, name),
+            headers={"Content-Disposition": f'attachment; filename="{filename}.speedscope.json"'},
+        )
+    return PlainTextResponse(to_collapsed(profiler))
+
+@router.get("/profile")
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0, description="How long to sample"),
+    interval_ms: float = Query(None, ge=1, le=100, description="Sampling interval (default PROFILE_INTERVAL_MS)"),
+    output: str = Query("collapsed", description="collapsed or speedscope"),
+    idle: bool = Query(False, description="Include threads waiting for work"),
+):
+    """
+    Sample every thread of the worker serving this request for `seconds`.
+
+    Returns collapsed stacks (`thread;frame;...;frame count` per line, for
+    flamegraph.pl or speedscope) or a speedscope JSON file. Only the worker
+    that receives the request is profiled; with several workers, repeat the
+    call or profile a single-worker instance.
+    """
+    if output not in FORMATS:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"output must be one of {', '.join(FORMATS)}")
+    if seconds > settings.PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"seconds must be at most {settings.PROFILE_MAX_SECONDS}")
+    interval = (interval_ms or settings.PROFILE_INTERVAL_MS) / 1000
+    try:
+        with profiling(interval, include_idle=idle) as profiler:
+            await asyncio.sleep(seconds)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    name = f"worker-{os.getpid()}-{int(time.time())}"
+    return _render(profiler, output, name, name)
+
+class ProfileRequestMiddleware:
+    """
+    Profile a single request sent with ``X-Profile: collapsed|speedscope``
+    and a valid ``X-Admin-Token``: the response body is replaced by the
+    profile, and the endpoint's own status code and duration are returned in
+    the ``X-Profile-Status`` and ``X-Profile-Duration-Ms`` headers.
+
+    All threads are sampled while the request runs (idle ones excluded), so
+    concurrent requests on the same worker show up as well; their stacks are
+    easy to tell apart by handler.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMIN_TOKEN:
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        output = headers.get("x-profile")
+        if output is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not verify_admin_token(headers.get("x-admin-token")):
+            await JSONResponse({"detail": "Invalid admin token"}, status.HTTP_403_FORBIDDEN)(scope, receive, send)
+            return
+        if output not in FORMATS:
+            await JSONResponse({"detail": f"X-Profile must be one of {', '.join(FORMATS)}"},
+                               status.HTTP_422_UNPROCESSABLE_ENTITY)(scope, receive, send)
+            return
+
+        response_status = None
+
+        async def capture(message):
+            nonlocal response_status
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+
+        try:
+            with profiling(settings.PROFILE_REQUEST_INTERVAL_MS / 1000) as profiler:
+                await self.app(scope, receive, capture)
+        except ProfilerBusy as e:
+            await JSONResponse({"detail": str(e)}, status.HTTP_409_CONFLICT)(scope, receive, send)
+            return
+
+        response = _render(profiler, output, f"{scope['method']} {scope['path']}",
+                           f"request-{os.getpid()}-{int(time.time())}")
+        response.headers["X-Profile-Status"] = str(response_status)
+        response.headers["X-Profile-Duration-Ms"] = f"{profiler.duration * 1000:.1f}"
+        await response(scope, receive, send)
+
+@explain_router.get("/explain/{capture_id}")
+async def get_explain_capture(capture_id: str):
+    """
+    Query plans captured for a request sent with `X-Explain: 1`, whose
+    response carried the capture id in `X-Explain-Id`.
+
+    Each statement comes with its plan (`EXPLAIN (ANALYZE, BUFFERS)` on
+    PostgreSQL, `EXPLAIN QUERY PLAN` on SQLite), its duration and, where the
+    driver reports it, the rows it affected.
+    """
+    capture = load_capture(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No EXPLAIN capture {capture_id}")
+    return capture
+
+class ExplainCaptureMiddleware:
+    """
+    With DEBUG on, explain every statement of a request sent with
+    ``X-Explain: 1``. The response gets an ``X-Explain-Id`` header naming
+    the capture, which is saved before the last body chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.DEBUG or not any(
+                key == b"x-explain" and value not in (b"", b"0") for key, value in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        capture_id = new_capture_id()
+        with capturing() as statements:
+            saved = False
+
+            async def send_with_capture(message):
+                nonlocal saved
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-explain-id", capture_id.encode())]
+                elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                    save_capture(capture_id, scope["method"], scope["path"], statements)
+                    saved = True
+                await send(message)
+
+            await self.app(scope, receive, send_with_capture)
+            if not saved:
+                save_capture(capture_id, scope["method"], scope["path"], statements)
@@ -1,15 +1,68 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+import os
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional, Union
+from app.database import get_db, get_read_db
 from app.models.cloud_resource import CloudResource
-from app.schemas import CloudResourceResponse, OptimizationSummary, APIResponse
+from app.schemas import (
+    CloudResourceResponse, OptimizationSummary, OptimizationRecommendation, RecommendationDelta,
+    CloudProvider, WhatIfRequest, WhatIfResult, BillingImportRequest, AllocationNodeCreate,
+    ResourceAssignment, RecommendationSnapshotInfo, RecommendationDiff, ResourceSearchPage, RuleThresholdsUpdate,
+    APIResponse
+)
 from app.services.optimization_service import OptimizationService
+from app.services.recommendation_store import RecommendationStore, TOP_K_COLUMNS
+from app.services.recommendation_snapshot_service import RecommendationSnapshotService
+from app.services.fleet_columns import load_fleet_columns
+from app.services.what_if_service import WhatIfService
+from app.services.cost_history_service import CostHistoryService, GRANULARITIES, TREND_DIMENSIONS
+from app.services.forecast_service import ForecastService, FORECAST_MODELS
+from app.services.anomaly_detector import AnomalyDetector, METRICS
+from app.services.consolidation_service import ConsolidationService, CONSOLIDATE_TYPE
+from app.services.commitment_service import CommitmentService, COMMITMENT_TYPE
+from app.services.billing_importer import BillingImporter, resolve_import_path, run_billing_import
+from app.services.resource_projection import parse_fields, load_projected_resources
+from app.services.resource_filters import resource_clauses
+from app.services.resource_lifecycle import ResourceLifecycleService
+from app.services.rule_threshold_service import RuleThresholdService
+from app.services.rule_plan import get_rule_plan
+from app.services.search_service import SearchService
+from app.services.tag_service import TagService, parse_tag_filters
+from app.services.allocation_service import AllocationService
+from app.services.resource_events import get_data_version
+from app.services.result_cache import get_result_cache
+from app.explain import is_capturing
+from app.tracing import TracedRoute
 
-router = APIRouter(prefix="/api/v1", tags=["Cloud Resources"])
+router = APIRouter(prefix="/api/v1", tags=["Cloud Resources"], route_class=TracedRoute)
+
+def _cached_json(db: Session, key: str, compute) -> Response:
+    """
+    Serve a JSON result from the cache shared by all workers, computing it
+    only if no worker has done so at the current data version. Requests
+    capturing EXPLAIN plans always compute, so their queries are seen.
+    """
+    if is_capturing():
+        return Response(content=compute(), media_type="application/json")
+    content = get_result_cache().get_or_compute(key, get_data_version(db), compute)
+    return Response(content=content, media_type="application/json")
+
+def _json_bytes(value) -> bytes:
+    return json.dumps(jsonable_encoder(value)).encode()
 
 @router.get("/resources", response_model=List[CloudResourceResponse])
-async def get_all_resources(db: Session = Depends(get_db)):
+async def get_all_resources(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,monthly_cost"),
+    min_health: Optional[int] = Query(None, ge=0, le=100, description="Only resources with at least this health score"),
+    max_health: Optional[int] = Query(None, ge=0, le=100, description="Only resources with at most this health score"),
+    health_status: Optional[str] = Query(None, alias="status",
+                                         description="optimal, over-provisioned or under-provisioned"),
+    sort: Optional[str] = Query(None, description="id, health or monthly_cost; prefix with - to reverse"),
+    lifecycle_state: str = Query("active", description="active, decommissioned or all"),
+    db: Session = Depends(get_db)
+):
     """
     Get all cloud infrastructure resources with utilization data.
     
@@ -18,9 +71,26 @@ async def get_all_resources(db: Session = Depends(get_db)):
     - Current utilization metrics
     - Cost information
     - Timestamps
+
+    With `fields`, only those columns are read from the database and
+    returned for each resource.
+
+    Health filters and `sort=health` use the stored, indexed health score
+    and status, e.g. `?max_health=50&sort=-monthly_cost`.
+
+    Decommissioned resources are left out unless `lifecycle_state` asks for
+    them; archived resources are no longer listed.
     """
     try:
-        resources = db.query(CloudResource).all()
+        names = parse_fields(fields)
+        where, order_by = resource_clauses(min_health, max_health, health_status, sort, lifecycle_state)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    try:
+        if names is not None:
+            return Response(content=load_projected_resources(db, names, where, order_by),
+                            media_type="application/json")
+        resources = db.query(CloudResource).filter(*where).order_by(*order_by).all()
         return resources
     except Exception as e:
         raise HTTPException(
@@ -28,6 +98,32 @@ async def get_all_resources(db: Session = Depends(get_db)):
             detail=f"Error retrieving resources: {str(e)}"
         )
 
+@router.get("/resources/search", response_model=ResourceSearchPage)
+async def search_resources(
+    q: str = Query(..., min_length=1, max_length=200, description="Part of the resource name, case-insensitive"),
+    limit: int = Query(20, ge=1, le=100, description="Results per page"),
+    offset: int = Query(0, ge=0, description="Results to skip"),
+    db: Session = Depends(get_db)
+):
+    """
+    Find resources by partial name.
+
+    Exact matches rank first, then names starting with `q`, then names
+    containing it. Matches come from a trigram index (PostgreSQL) or a prefix
+    index plus an FTS5 trigram table (SQLite, where queries shorter than three
+    characters match prefixes only). At most `SEARCH_MAX_MATCHES` matches are
+    ranked and paginated; `truncated` says whether there were more.
+    """
+    try:
+        return SearchService().search(db, q, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error searching resources: {str(e)}"
+        )
+
 @router.get("/resources/{resource_id}", response_model=CloudResourceResponse)
 async def get_resource_by_id(resource_id: int, db: Session = Depends(get_db)):
     """
@@ -49,8 +145,31 @@ async def get_resource_by_id(resource_id: int, db: Session = Depends(get_db)):
             detail=f"Error retrieving resource: {str(e)}"
         )
 
-@router.get("/recommendations", response_model=OptimizationSummary)
-async def get_optimization_recommendations(db: Session = Depends(get_db)):
+@router.delete("/resources/{resource_id}", response_model=CloudResourceResponse)
+async def decommission_resource(resource_id: int, db: Session = Depends(get_db)):
+    """
+    Decommission a resource.
+
+    This is a soft delete: the resource stays readable by id, but its
+    recommendations are resolved and it leaves listings, searches and cost
+    totals. After `RESOURCE_ARCHIVE_AFTER_DAYS` it is moved to the archive
+    table. Decommissioning twice is harmless.
+    """
+    try:
+        return ResourceLifecycleService().decommission(db, resource_id)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error decommissioning resource: {str(e)}"
+        )
+
+@router.get("/recommendations", response_model=Union[OptimizationSummary, RecommendationDelta])
+async def get_optimization_recommendations(
+    since: Optional[int] = Query(None, ge=0, description="Only return changes after this data version"),
+    db: Session = Depends(get_db)
+):
     """
     Analyze cloud resources and return cost-saving optimization recommendations.
     
@@ -63,23 +182,195 @@ async def get_optimization_recommendations(db: Session = Depends(get_db)):
     - Total cost analysis
     - Detailed recommendations with confidence levels
     - Potential savings calculations
+
+    With `since`, returns only the recommendations created, changed or resolved
+    after that data version, plus the current version to pass on the next sync.
+
+    Recommendations are read from the persisted table, which is kept current as
+    resources are written, so no analysis runs on this request.
     """
     try:
-        optimization_service = OptimizationService()
-        summary = optimization_service.analyze_resources(db)
-        return summary
+        store = RecommendationStore()
+        if since is not None:
+            return store.get_changes_since(db, since)
+        return _cached_json(db, "recommendations", lambda: store.get_summary(db).model_dump_json().encode())
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating recommendations: {str(e)}"
         )
 
+@router.get("/recommendations/top", response_model=List[OptimizationRecommendation])
+async def get_top_recommendations(
+    k: int = Query(10, ge=1, le=1000, description="Number of recommendations to return"),
+    by: str = Query("estimated_savings", description="Ranking column: estimated_savings or current_cost"),
+    recommendation_type: Optional[str] = Query(None, description="Only this recommendation type"),
+    provider: Optional[CloudProvider] = Query(None, description="Only resources from this provider"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the top-K savings opportunities.
+
+    Ranking and limiting happen in SQL on an indexed column, so the cost of this
+    endpoint depends on k rather than on the size of the fleet.
+    """
+    if by not in TOP_K_COLUMNS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Cannot rank by '{by}'. Choose one of: {', '.join(TOP_K_COLUMNS)}"
+        )
+    try:
+        return RecommendationStore().get_top(db, k, by, recommendation_type, provider)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving top recommendations: {str(e)}"
+        )
+
+@router.post("/recommendations/snapshots", response_model=RecommendationSnapshotInfo,
+             status_code=status.HTTP_201_CREATED)
+async def take_recommendation_snapshot(db: Session = Depends(get_db)):
+    """
+    Snapshot the current optimization summary now, in addition to the
+    scheduled snapshots, and prune snapshots past the retention period.
+    """
+    try:
+        return RecommendationSnapshotService().take_snapshot(db)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error taking recommendation snapshot: {str(e)}"
+        )
+
+@router.get("/recommendations/snapshots", response_model=List[RecommendationSnapshotInfo])
+async def list_recommendation_snapshots(db: Session = Depends(get_db)):
+    """
+    List retained recommendation snapshots with their totals, newest first.
+    """
+    try:
+        return RecommendationSnapshotService().list_snapshots(db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error listing recommendation snapshots: {str(e)}"
+        )
+
+@router.get("/recommendations/diff", response_model=RecommendationDiff)
+async def diff_recommendation_snapshots(
+    from_id: int = Query(..., alias="from", description="Snapshot to compare from"),
+    to_id: Optional[int] = Query(None, alias="to", description="Snapshot to compare to (default: newest)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Recommendations added, removed and changed between two snapshots, with
+    the change in total potential savings and monthly cost.
+
+    Snapshots are stored sorted by resource and recommendation type, so the
+    comparison is a single merge pass over both.
+    """
+    try:
+        return RecommendationSnapshotService().diff(db, from_id, to_id)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error comparing recommendation snapshots: {str(e)}"
+        )
+
+@router.post("/recommendations/consolidate", response_model=dict)
+async def consolidate_workloads(db: Session = Depends(get_db)):
+    """
+    Run the consolidation pass and refresh the `consolidate` recommendations.
+
+    Underutilized compute instances are bin-packed by CPU and memory demand
+    onto larger hosts per provider and region. Returns the packing plan per
+    group; the per-resource recommendations are then served by the regular
+    recommendation endpoints.
+    """
+    try:
+        plan, recommendations = ConsolidationService().plan(db)
+        plan["recommendations_changed"] = RecommendationStore().sync_type(db, CONSOLIDATE_TYPE, recommendations)
+        db.commit()
+        return plan
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error consolidating workloads: {str(e)}"
+        )
+
+@router.post("/recommendations/commitments", response_model=dict)
+async def plan_commitments(
+    lookback_days: int = Query(30, ge=1, le=365, description="Days of usage history to size commitments on"),
+    db: Session = Depends(get_db)
+):
+    """
+    Size 1-year commitments per instance family and refresh the `commitment`
+    recommendations.
+
+    Hourly vCPU usage per family is rebuilt from cost history and every
+    commitment level is priced against the on-demand overflow it leaves.
+    Returns the chosen level and a sampled coverage curve per family.
+    """
+    try:
+        plan, recommendations = CommitmentService().plan(db, lookback_days)
+        plan["recommendations_changed"] = RecommendationStore().sync_type(db, COMMITMENT_TYPE, recommendations)
+        db.commit()
+        return plan
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error planning commitments: {str(e)}"
+        )
+
+@router.get("/rules/thresholds", response_model=dict)
+async def get_rule_thresholds(db: Session = Depends(get_db)):
+    """
+    Get the optimization rule thresholds: the defaults from settings, the
+    overrides, and the thresholds in effect per resource type and provider.
+    """
+    try:
+        return RuleThresholdService().describe(db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving rule thresholds: {str(e)}"
+        )
+
+@router.put("/rules/thresholds", response_model=dict)
+async def replace_rule_thresholds(request: RuleThresholdsUpdate, db: Session = Depends(get_db)):
+    """
+    Replace the rule threshold overrides.
+
+    An override applies to a resource type, a provider, both, or (with
+    neither) the whole fleet; the most specific one wins per threshold.
+    Only resources whose effective thresholds changed are re-evaluated, and
+    cached results are only invalidated if a recommendation changed. Every
+    worker picks up the new thresholds the next time it evaluates a resource.
+    """
+    overrides = [
+        {"resource_type": override.resource_type, "provider": override.provider, **override.thresholds.model_dump()}
+        for override in request.overrides
+    ]
+    try:
+        return RuleThresholdService().replace(db, overrides)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating rule thresholds: {str(e)}"
+        )
+
 @router.get("/resources/{resource_id}/health", response_model=dict)
 async def get_resource_health(resource_id: int, db: Session = Depends(get_db)):
     """
     Get health score and status for a specific resource.
     """
-    try:
+    def compute():
         resource = db.query(CloudResource).filter(CloudResource.id == resource_id).first()
         if not resource:
             raise HTTPException(
@@ -90,14 +381,17 @@ async def get_resource_health(resource_id: int, db: Session = Depends(get_db)):
         optimization_service = OptimizationService()
         health_data = optimization_service.get_resource_health_score(resource)
         
-        return {
+        return _json_bytes({
             "resource_id": resource_id,
             "resource_name": resource.name,
             "health_score": health_data["score"],
             "status": health_data["status"],
             "issues": health_data["issues"],
             "monthly_cost": resource.monthly_cost
-        }
+        })
+
+    try:
+        return _cached_json(db, f"health:{resource_id}", compute)
     except HTTPException:
         raise
     except Exception as e:
@@ -110,44 +404,264 @@ async def get_resource_health(resource_id: int, db: Session = Depends(get_db)):
 async def get_cost_summary(db: Session = Depends(get_db)):
     """
     Get comprehensive cost analytics and summary.
+
+    Served from running fleet aggregates maintained on resource writes.
     """
     try:
-        resources = db.query(CloudResource).all()
-        
-        total_cost = sum(resource.monthly_cost for resource in resources)
-        by_type = {}
-        by_provider = {}
-        
-        for resource in resources:
-            # Group by resource type
-            if resource.resource_type not in by_type:
-                by_type[resource.resource_type] = {"count": 0, "cost": 0}
-            by_type[resource.resource_type]["count"] += 1
-            by_type[resource.resource_type]["cost"] += resource.monthly_cost
-            
-            # Group by provider
-            if resource.provider not in by_provider:
-                by_provider[resource.provider] = {"count": 0, "cost": 0}
-            by_provider[resource.provider]["count"] += 1
-            by_provider[resource.provider]["cost"] += resource.monthly_cost
-        
-        # Get optimization potential
-        optimization_service = OptimizationService()
-        optimization_summary = optimization_service.analyze_resources(db)
-        
-        return {
-            "total_monthly_cost": round(total_cost, 2),
-            "total_resources": len(resources),
-            "cost_by_type": by_type,
-            "cost_by_provider": by_provider,
-            "optimization_potential": {
-                "potential_savings": optimization_summary.total_potential_savings,
-                "savings_percentage": optimization_summary.savings_percentage,
-                "recommendations_count": len(optimization_summary.recommendations)
-            }
-        }
+        return _cached_json(db, "cost-summary", lambda: _json_bytes(RecommendationStore().get_cost_summary(db)))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating cost summary: {str(e)}"
         )
+
+@router.get("/analytics/cost-by-tag", response_model=dict)
+async def get_cost_by_tag(
+    group_by: str = Query(..., min_length=1, description="Tag key to allocate cost by, e.g. team"),
+    tag: List[str] = Query([], description="Only resources with this tag, as key:value; repeatable"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get monthly cost per value of a tag, e.g. per team or environment.
+
+    Resources that match the filters but lack the `group_by` tag are
+    reported as untagged. Aggregation runs in the database over the tag index.
+    """
+    try:
+        filters = parse_tag_filters(tag)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    try:
+        return TagService().cost_by_tag(db, group_by, filters)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error allocating cost by tag: {str(e)}"
+        )
+
+@router.get("/analytics/cost-trend", response_model=dict)
+async def get_cost_trend(
+    granularity: str = Query("month", description="Bucket size: day or month"),
+    periods: int = Query(24, ge=1, le=366, description="Number of buckets ending with the current one"),
+    group_by: str = Query("resource_type", description="Grouping: resource_type, provider or fleet"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get cost trends per resource type or provider.
+
+    Each bucket holds the latest observed monthly cost of every resource seen in
+    that bucket. Served only from rollups maintained as cost history is written,
+    so the cost is constant per bucket regardless of history size.
+    """
+    if granularity not in GRANULARITIES or group_by not in TREND_DIMENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"granularity must be one of {', '.join(GRANULARITIES)} and group_by one of {', '.join(TREND_DIMENSIONS)}"
+        )
+    try:
+        return CostHistoryService().get_trend(db, granularity, periods, group_by)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error generating cost trend: {str(e)}"
+        )
+
+@router.get("/analytics/forecast", response_model=dict)
+async def get_cost_forecast(
+    horizon: int = Query(3, ge=1, le=12, description="Months to project ahead"),
+    model: str = Query("linear", description="linear, seasonal_naive or exponential"),
+    history_months: int = Query(24, ge=2, le=60, description="Months of history to fit"),
+    resources: int = Query(0, ge=0, le=1000, description="Include this many per-resource forecasts"),
+    db: Session = Depends(get_db)
+):
+    """
+    Forecast monthly cost for the fleet, per resource type and per resource.
+
+    All resources are fitted together as batched array operations, and the
+    fitted coefficients are reused until new cost history is recorded.
+    """
+    if model not in FORECAST_MODELS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown model '{model}'. Choose one of: {', '.join(FORECAST_MODELS)}"
+        )
+    try:
+        return ForecastService().get_forecast(db, horizon, model, history_months, resources)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error generating forecast: {str(e)}"
+        )
+
+@router.get("/analytics/anomalies", response_model=dict)
+async def get_cost_anomalies(
+    limit: int = Query(100, ge=1, le=1000, description="Maximum anomalies to return"),
+    metric: Optional[str] = Query(None, description="monthly_cost, cpu_utilization or memory_utilization"),
+    resource_id: Optional[int] = Query(None, description="Only anomalies for this resource"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get recent cost and utilization anomalies, newest first.
+
+    Samples are scored against per-resource EWMA state in the same
+    transaction as the resource write that produced them, so this only reads
+    the recorded anomalies.
+    """
+    if metric is not None and metric not in METRICS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown metric '{metric}'. Choose one of: {', '.join(METRICS)}"
+        )
+    try:
+        return AnomalyDetector().get_anomalies(db, limit, metric, resource_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving anomalies: {str(e)}"
+        )
+
+@router.post("/analytics/what-if", response_model=WhatIfResult)
+async def simulate_thresholds(request: WhatIfRequest, db: Session = Depends(get_read_db)):
+    """
+    Simulate optimization savings over a grid of threshold values.
+
+    Returns a cpu x memory surface for downsizing, a storage surface and the
+    fixed termination totals. Omitted axes, the storage rate and the
+    termination thresholds follow the current rule thresholds. The whole
+    grid is evaluated in one vectorized pass over a cached columnar snapshot of
+    the fleet, so tuning thresholds does not require re-running the analysis.
+    """
+    try:
+        fleet = load_fleet_columns(db)
+        return WhatIfService().simulate(
+            fleet,
+            cpu_thresholds=request.cpu_thresholds,
+            memory_thresholds=request.memory_thresholds,
+            storage_thresholds=request.storage_thresholds,
+            plan=get_rule_plan(db),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error simulating thresholds: {str(e)}"
+        )
+
+@router.post("/imports/billing", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+async def start_billing_import(request: BillingImportRequest, background_tasks: BackgroundTasks):
+    """
+    Start importing a billing export (CUR-style CSV, plain or gzip) from the
+    billing import directory.
+
+    The import runs in the background and resumes from its last checkpoint if
+    the same file was partly imported before. Poll `GET /imports/billing` for
+    progress and throughput.
+    """
+    try:
+        path = resolve_import_path(request.path)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Export {request.path} not found")
+    background_tasks.add_task(run_billing_import, path, request.workers, request.restart)
+    return {"source": path, "status": "accepted"}
+
+@router.get("/imports/billing", response_model=dict)
+async def get_billing_import(
+    path: str = Query(..., description="Export file, relative to the billing import directory"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the progress and throughput of a billing export import.
+    """
+    try:
+        report = BillingImporter().get_status(db, resolve_import_path(path))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving import status: {str(e)}"
+        )
+    if report is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No import found for {path}")
+    return report
+
+@router.get("/hierarchy", response_model=dict)
+async def get_allocation_hierarchy(db: Session = Depends(get_db)):
+    """
+    Get the org -> department -> team -> service hierarchy with the cost,
+    savings potential and resource count of every subtree.
+
+    Totals are maintained as resources change, so this reads each node once.
+    """
+    try:
+        return AllocationService().get_tree(db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving hierarchy: {str(e)}"
+        )
+
+@router.get("/hierarchy/nodes/{node_id}", response_model=dict)
+async def get_allocation_node(node_id: int, db: Session = Depends(get_db)):
+    """
+    Get the precomputed totals of one subtree.
+    """
+    try:
+        node = AllocationService().get_node(db, node_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving hierarchy node: {str(e)}"
+        )
+    if node is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Node {node_id} not found")
+    return node
+
+@router.post("/hierarchy/nodes", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def create_allocation_node(request: AllocationNodeCreate, db: Session = Depends(get_db)):
+    """
+    Add a node to the hierarchy. With a tag rule, resources carrying that tag
+    are allocated to it unless they are pinned to another node.
+    """
+    service = AllocationService()
+    try:
+        node = service.create_node(db, request.name, request.parent_id, request.tag_key, request.tag_value)
+        db.commit()
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating hierarchy node: {str(e)}"
+        )
+    return service.get_node(db, node.id)
+
+@router.put("/hierarchy/resources/{resource_id}", response_model=dict)
+async def assign_resource_to_node(resource_id: int, request: ResourceAssignment, db: Session = Depends(get_db)):
+    """
+    Pin a resource to a hierarchy node, or return it to tag-based allocation.
+    """
+    try:
+        allocation = AllocationService().assign_resource(db, resource_id, request.node_id)
+        result = {
+            "resource_id": resource_id,
+            "node_id": allocation.node_id if allocation is not None else None,
+            "explicit": allocation.explicit if allocation is not None else False,
+        }
+        db.commit()
+    except LookupError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error assigning resource: {str(e)}"
+        )
+    return result
@@ -0,0 +1,147 @@
+"""
+EXPLAIN capture for debugging the queries behind a route.
+
+While a capture is active (see ``capturing``), every SELECT, INSERT, UPDATE
+and DELETE is explained on the same connection just before it runs:
+
+* PostgreSQL: ``EXPLAIN (ANALYZE, BUFFERS)`` inside a savepoint that is
+  rolled back afterwards, so writes are measured without being applied
+  twice. Reads run twice, once for the plan and once for real.
+* SQLite: ``EXPLAIN QUERY PLAN``, which shows scan and index choices but
+  has no row estimates; each statement's duration, and for writes the
+  rows it changed, are recorded alongside instead.
+
+Captures are saved as JSON files under ``EXPLAIN_DIR`` so whichever worker
+serves ``GET /debug/explain/{id}`` can return them.
+"""
+
+import json
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+_EXPLAINABLE = {"SELECT", "WITH", "INSERT", "UPDATE", "DELETE"}
+_MAX_CAPTURES = 200
+_CAPTURE_ID = re.compile(r"^[0-9a-f]{16}$")
+
+_capture: ContextVar[Optional[List[Dict]]] = ContextVar("explain_capture", default=None)
+
+@contextmanager
+def capturing():
+    """
+    Explain every statement run in this context, including threadpool calls
+    made from it. Yields the list the captured statements are appended to.
+    """
+    statements: List[Dict] = []
+    token = _capture.set(statements)
+    try:
+        yield statements
+    finally:
+        _capture.reset(token)
+
+def is_capturing() -> bool:
+    return _capture.get() is not None
+
+def _postgresql_plan(dbapi_connection, statement: str, parameters) -> List[str]:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT explain_capture")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.execute("ROLLBACK TO SAVEPOINT explain_capture")
+            cursor.execute("RELEASE SAVEPOINT explain_capture")
+    finally:
+        cursor.close()
+
+def _sqlite_plan(dbapi_connection, statement: str, parameters) -> List[str]:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        depth = {0: -1}
+        lines = []
+        for node_id, parent_id, _, detail in cursor.fetchall():
+            depth[node_id] = depth.get(parent_id, -1) + 1
+            lines.append("  " * depth[node_id] + detail)
+        return lines
+    finally:
+        cursor.close()
+
+_PLANNERS = {"postgresql": _postgresql_plan, "sqlite": _sqlite_plan}
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _explain_statement(conn, cursor, statement, parameters, context, executemany):
+    statements = _capture.get()
+    planner = _PLANNERS.get(conn.dialect.name)
+    if statements is None or planner is None or executemany or not statement.strip():
+        return
+    if statement.lstrip().split(None, 1)[0].upper() not in _EXPLAINABLE:
+        return
+
+    entry = {"statement": statement}
+    try:
+        entry["plan"] = planner(cursor.connection, statement, parameters)
+    except Exception as e:
+        entry["error"] = str(e)
+    statements.append(entry)
+    if context is not None:
+        context._explain_entry = entry
+        context._explain_started = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _time_statement(conn, cursor, statement, parameters, context, executemany):
+    entry = getattr(context, "_explain_entry", None)
+    if entry is not None:
+        context._explain_entry = None
+        entry["duration_ms"] = round((time.perf_counter() - context._explain_started) * 1000, 3)
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            entry["rowcount"] = cursor.rowcount
+
+def capture_dir() -> str:
+    return settings.EXPLAIN_DIR or os.path.join(tempfile.gettempdir(), "cloud-optimization-explain")
+
+def save_capture(capture_id: str, method: str, path: str, statements: List[Dict]) -> None:
+    """
+    Write a capture and drop the oldest ones beyond the retention limit.
+    """
+    directory = capture_dir()
+    os.makedirs(directory, exist_ok=True)
+    document = {
+        "id": capture_id,
+        "request": f"{method} {path}",
+        "captured_at": time.time(),
+        "statement_count": len(statements),
+        "statements": statements,
+    }
+    temporary = os.path.join(directory, f".{capture_id}.tmp")
+    with open(temporary, "w") as f:
+        json.dump(document, f)
+    os.replace(temporary, os.path.join(directory, f"{capture_id}.json"))
+
+    captures = sorted((entry for entry in os.scandir(directory) if entry.name.endswith(".json")),
+                      key=lambda entry: entry.stat().st_mtime)
+    for entry in captures[:-_MAX_CAPTURES]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+def load_capture(capture_id: str) -> Optional[Dict]:
+    if not _CAPTURE_ID.match(capture_id):
+        return None
+    try:
+        with open(os.path.join(capture_dir(), f"{capture_id}.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def new_capture_id() -> str:
+    return os.urandom(8).hex()
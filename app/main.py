@@ -1,16 +1,73 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 from app.api.routes import router
-from app.database import engine
+from app.api.debug import router as debug_router, explain_router, ExplainCaptureMiddleware, ProfileRequestMiddleware
+from app.config import settings
+from app.database import engine, SessionLocal
 from app.models.cloud_resource import Base
+from app.services.recommendation_store import RecommendationStore
+from app.services.cost_history_service import CostHistoryService
+from app.services.recommendation_snapshot_service import RecommendationSnapshotService
+from app.services.resource_lifecycle import ResourceLifecycleService
+from app.services.search_service import SearchService
+from app.services.job_schedule import claim_job
+from app.tracing import TracingMiddleware
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _record_cost_snapshot():
+    CostHistoryService().ensure_upcoming_partitions(engine)
+    db = SessionLocal()
+    try:
+        appended = CostHistoryService().record_snapshot(db)
+        logger.info(f"Recorded {appended} cost history observations")
+    finally:
+        db.close()
+
+def _take_recommendation_snapshot():
+    db = SessionLocal()
+    try:
+        snapshot = RecommendationSnapshotService().take_snapshot(db)
+        logger.info(f"Recorded recommendation snapshot {snapshot.id} ({snapshot.recommendation_count} recommendations)")
+    finally:
+        db.close()
+
+def _archive_decommissioned_resources():
+    db = SessionLocal()
+    try:
+        archived = ResourceLifecycleService().archive(db)
+        logger.info(f"Archived {archived} decommissioned resources")
+    finally:
+        db.close()
+
+def _claim(job, interval_hours: float) -> bool:
+    db = SessionLocal()
+    try:
+        return claim_job(db, job.__name__.lstrip("_"), interval_hours)
+    finally:
+        db.close()
+
+async def _run_periodically(interval_hours: float, job):
+    """
+    Run a blocking job in the threadpool every ``interval_hours``. Every
+    worker process keeps this timer, but each round runs in only the one
+    that claims it first.
+    """
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            if await run_in_threadpool(_claim, job, interval_hours):
+                await run_in_threadpool(job)
+        except Exception as e:
+            logger.error(f"Background job {job.__name__} failed: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -26,9 +83,49 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
     
+    # Backfill persisted recommendations for existing databases
+    db = SessionLocal()
+    try:
+        RecommendationStore().ensure_initialized(db)
+    except Exception as e:
+        logger.error(f"Error initializing recommendations: {e}")
+    finally:
+        db.close()
+    
+    # Create the cost history partitions of the coming months
+    try:
+        CostHistoryService().ensure_upcoming_partitions(engine)
+    except Exception as e:
+        logger.error(f"Error creating cost history partitions: {e}")
+    
+    # Backfill the name search index for SQLite databases created before it
+    db = SessionLocal()
+    try:
+        SearchService().ensure_index(db)
+    except Exception as e:
+        logger.error(f"Error initializing the name search index: {e}")
+    finally:
+        db.close()
+    
+    background_tasks = []
+    if settings.COST_SNAPSHOT_INTERVAL_HOURS > 0:
+        background_tasks.append(
+            asyncio.create_task(_run_periodically(settings.COST_SNAPSHOT_INTERVAL_HOURS, _record_cost_snapshot))
+        )
+    if settings.RECOMMENDATION_SNAPSHOT_INTERVAL_HOURS > 0:
+        background_tasks.append(asyncio.create_task(
+            _run_periodically(settings.RECOMMENDATION_SNAPSHOT_INTERVAL_HOURS, _take_recommendation_snapshot)
+        ))
+    if settings.RESOURCE_ARCHIVE_INTERVAL_HOURS > 0:
+        background_tasks.append(asyncio.create_task(
+            _run_periodically(settings.RESOURCE_ARCHIVE_INTERVAL_HOURS, _archive_decommissioned_resources)
+        ))
+    
     yield
     
     # Shutdown
+    for task in background_tasks:
+        task.cancel()
     logger.info("Shutting down Cloud Infrastructure Optimization API...")
 
 # Create FastAPI application
@@ -75,8 +172,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Capture query plans of single requests on demand (X-Explain header, DEBUG only)
+app.add_middleware(ExplainCaptureMiddleware)
+
+# Profile single requests on demand (X-Profile header, admin only)
+app.add_middleware(ProfileRequestMiddleware)
+
+# Trace sampled requests (outermost, so the span covers every other layer)
+app.add_middleware(TracingMiddleware)
+
 # Include API routes
 app.include_router(router)
+app.include_router(debug_router)
+app.include_router(explain_router)
 
 # Global exception handler
 @app.exception_handler(Exception)
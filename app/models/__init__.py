@@ -1 +1,13 @@
-from .cloud_resource import CloudResource, ResourceType, CloudProvider
+from .cloud_resource import CloudResource, ResourceType, CloudProvider, ResourceLifecycleState
+from .archived_resource import ArchivedResource
+from .data_version import DataVersion
+from .recommendation import Recommendation, RecommendationStatus
+from .fleet_aggregate import FleetAggregate
+from .cost_history import CostHistory, CostRollup
+from .billing_import import ImportCheckpoint, BillingStagedTotal
+from .resource_tag import ResourceTag
+from .allocation import AllocationNode, ResourceAllocation
+from .recommendation_snapshot import RecommendationSnapshot
+from .rule_threshold import RuleThreshold
+from .anomaly import ResourceMetricState, CostAnomaly
+from .scheduled_job import ScheduledJob
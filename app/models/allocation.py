@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Index
+from app.database import Base
+
+class AllocationNode(Base):
+    """
+    Node of the cost allocation hierarchy (org, department, team, service).
+
+    ``path`` is the materialized path of node ids from the root, e.g.
+    ``/1/4/9/``, so a node's ancestors are known without recursive queries.
+    The ``subtree_*`` totals cover every resource allocated to the node or its
+    descendants and are adjusted by deltas as resources change.
+    """
+    __tablename__ = "allocation_nodes"
+    __table_args__ = (
+        Index("ix_allocation_nodes_tag", "tag_key", "tag_value", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    level = Column(String, nullable=False)
+    parent_id = Column(Integer, ForeignKey("allocation_nodes.id"), index=True)
+    path = Column(String, nullable=False, index=True)
+    depth = Column(Integer, nullable=False)
+    # Resources carrying this tag are allocated here unless assigned explicitly.
+    tag_key = Column(String)
+    tag_value = Column(String)
+    subtree_cost = Column(Float, nullable=False, default=0.0)
+    subtree_savings = Column(Float, nullable=False, default=0.0)
+    subtree_resources = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<AllocationNode(name='{self.name}', level='{self.level}', path='{self.path}')>"
+
+class ResourceAllocation(Base):
+    """
+    The node a resource is allocated to, with the cost and savings it
+    currently contributes to that node's subtree totals.
+    """
+    __tablename__ = "resource_allocations"
+
+    resource_id = Column(Integer, primary_key=True)
+    node_id = Column(Integer, ForeignKey("allocation_nodes.id"), nullable=False, index=True)
+    explicit = Column(Boolean, nullable=False, default=False)  # Assigned by hand rather than by tag
+    monthly_cost = Column(Float, nullable=False, default=0.0)
+    potential_savings = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<ResourceAllocation(resource_id={self.resource_id}, node_id={self.node_id})>"
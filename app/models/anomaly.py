@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from app.database import Base
+
+class ResourceMetricState(Base):
+    """
+    Exponentially weighted mean and variance of one metric of one resource,
+    and the number of samples folded into them. Maintained by the anomaly
+    detector's write handler in the same transaction as the resource write.
+    """
+    __tablename__ = "resource_metric_states"
+
+    resource_id = Column(Integer, primary_key=True)
+    metric = Column(String, primary_key=True)
+    mean = Column(Float, nullable=False)
+    variance = Column(Float, nullable=False)
+    sample_count = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<ResourceMetricState(resource_id={self.resource_id}, metric='{self.metric}', mean={self.mean})>"
+
+class CostAnomaly(Base):
+    """
+    A sample that fell outside its resource's EWMA band when it was written.
+    """
+    __tablename__ = "cost_anomalies"
+    __table_args__ = (
+        Index("ix_cost_anomalies_resource", "resource_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    resource_id = Column(Integer, nullable=False)
+    metric = Column(String, nullable=False)
+    value = Column(Float, nullable=False)
+    expected = Column(Float, nullable=False)
+    z_score = Column(Float, nullable=False)
+    direction = Column(String, nullable=False)
+    detected_at = Column(DateTime(timezone=True), nullable=False)
+    data_version = Column(Integer, nullable=True)
+
+    def __repr__(self):
+        return f"<CostAnomaly(resource_id={self.resource_id}, metric='{self.metric}', value={self.value})>"
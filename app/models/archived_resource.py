@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum
+from app.database import Base
+from app.models.cloud_resource import ResourceType, CloudProvider, TagsType
+
+class ArchivedResource(Base):
+    """
+    Resources moved out of ``cloud_resources`` by the archival job once they
+    have been decommissioned for longer than the retention period. Rows keep
+    their original id; cost history still refers to them by it.
+    """
+    __tablename__ = "cloud_resources_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String, nullable=False, index=True)
+    resource_type = Column(Enum(ResourceType), nullable=False)
+    provider = Column(Enum(CloudProvider), nullable=False)
+    instance_type = Column(String, nullable=False)
+    region = Column(String)
+    size = Column(String)
+    cpu_utilization = Column(Float)
+    memory_utilization = Column(Float)
+    storage_usage = Column(Float)
+    monthly_cost = Column(Float, nullable=False)
+    tags = Column(TagsType, nullable=False, default=dict)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    decommissioned_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<ArchivedResource(id={self.id}, name='{self.name}', archived_at='{self.archived_at}')>"
@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, Text
+from sqlalchemy.sql import func
+from app.database import Base
+
+class ImportCheckpoint(Base):
+    """
+    Progress of one billing export import, committed together with each batch
+    of staged totals so an interrupted run resumes at ``byte_offset``.
+
+    ``status`` moves from "staging" (parsing the file) to "applying" (writing
+    resources) to "completed". ``error`` holds the last failure, if any; a
+    failed run resumes in the phase it stopped in.
+    """
+    __tablename__ = "import_checkpoints"
+
+    source = Column(String, primary_key=True)  # Absolute path of the export
+    fingerprint = Column(String, nullable=False)  # Size and mtime of the file
+    status = Column(String, nullable=False)
+    byte_offset = Column(BigInteger, nullable=False, default=0)  # In the decompressed stream
+    total_bytes = Column(BigInteger)  # On disk, so compressed for gzip files
+    rows_processed = Column(BigInteger, nullable=False, default=0)
+    rows_skipped = Column(BigInteger, nullable=False, default=0)
+    resources_imported = Column(Integer, nullable=False, default=0)
+    elapsed_seconds = Column(Float, nullable=False, default=0.0)
+    error = Column(Text)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ImportCheckpoint(source='{self.source}', status='{self.status}', rows={self.rows_processed})>"
+
+class BillingStagedTotal(Base):
+    """
+    Cost per resource and billing month accumulated while an export is parsed.
+    Totals are applied to ``cloud_resources`` once the whole file is staged.
+    """
+    __tablename__ = "billing_staged_totals"
+
+    source = Column(String, primary_key=True)
+    resource_key = Column(String, primary_key=True)  # Provider resource id, e.g. i-0abc...
+    month = Column(Date, primary_key=True)
+    resource_type = Column(String, nullable=False)
+    instance_type = Column(String, nullable=False)
+    region = Column(String)
+    cost = Column(Float, nullable=False, default=0.0)
+    last_usage = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<BillingStagedTotal(resource_key='{self.resource_key}', month='{self.month}', cost=${self.cost})>"
@@ -1,7 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, Index, JSON, Computed, DDL, event, literal, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
+import logging
+
+logger = logging.getLogger(__name__)
 
 class ResourceType(str, enum.Enum):
     COMPUTE = "compute"
@@ -14,21 +20,110 @@ class CloudProvider(str, enum.Enum):
     AZURE = "azure"
     GCP = "gcp"
 
+class ResourceLifecycleState(str, enum.Enum):
+    ACTIVE = "active"
+    DECOMMISSIONED = "decommissioned"
+
+# JSONB on PostgreSQL so tag predicates can use a GIN index.
+TagsType = MutableDict.as_mutable(JSON().with_variant(JSONB(), "postgresql"))
+
+# Health score and status as computed by OptimizationService.get_resource_health_score,
+# expressed in SQL so the database maintains them on every write. A missing or
+# zero utilization counts as no signal, like the truthiness checks there.
+HEALTH_SCORE_SQL = (
+    "100"
+    " - CASE WHEN cpu_utilization > 0 AND cpu_utilization < 20 THEN 30"
+    " WHEN cpu_utilization > 80 THEN 20 ELSE 0 END"
+    " - CASE WHEN memory_utilization > 0 AND memory_utilization < 30 THEN 25"
+    " WHEN memory_utilization > 85 THEN 15 ELSE 0 END"
+)
+HEALTH_STATUS_SQL = (
+    "CASE WHEN cpu_utilization > 80 OR memory_utilization > 85 THEN 'under-provisioned'"
+    " WHEN (cpu_utilization > 0 AND cpu_utilization < 20)"
+    " OR (memory_utilization > 0 AND memory_utilization < 30) THEN 'over-provisioned'"
+    " ELSE 'optimal' END"
+)
+
+# Predicate of the partial indexes below. Queries spell it with ACTIVE_RESOURCES
+# so the planner can match it; both store the enum member's name.
+_ACTIVE_SQL = text("lifecycle_state = 'ACTIVE'")
+_DECOMMISSIONED_SQL = text("lifecycle_state = 'DECOMMISSIONED'")
+
 class CloudResource(Base):
     __tablename__ = "cloud_resources"
+    __table_args__ = (
+        Index("ix_cloud_resources_tags", "tags", postgresql_using="gin").ddl_if(dialect="postgresql"),
+        # Hot paths only read active resources, so their indexes skip decommissioned rows.
+        Index("ix_cloud_resources_active", "id", postgresql_where=_ACTIVE_SQL, sqlite_where=_ACTIVE_SQL),
+        Index("ix_cloud_resources_health", "health_score", "id",
+              postgresql_where=_ACTIVE_SQL, sqlite_where=_ACTIVE_SQL),
+        Index("ix_cloud_resources_health_status", "health_status", "health_score", "id",
+              postgresql_where=_ACTIVE_SQL, sqlite_where=_ACTIVE_SQL),
+        # Archival candidates, oldest first.
+        Index("ix_cloud_resources_decommissioned", "decommissioned_at",
+              postgresql_where=_DECOMMISSIONED_SQL, sqlite_where=_DECOMMISSIONED_SQL),
+        # Name search: on PostgreSQL a text_pattern_ops btree on lower(name)
+        # for prefixes of any length and a trigram GIN for substrings; on
+        # SQLite, prefix ranges on lower(name) plus the NAME_SEARCH_TABLE
+        # full-text index below.
+        Index("ix_cloud_resources_name_pattern", text("lower(name) text_pattern_ops")).ddl_if(dialect="postgresql"),
+        Index("ix_cloud_resources_name_trgm", text("lower(name) gin_trgm_ops"),
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_cloud_resources_name_lower", text("lower(name)")).ddl_if(dialect="sqlite"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
     resource_type = Column(Enum(ResourceType), nullable=False)
     provider = Column(Enum(CloudProvider), nullable=False)
     instance_type = Column(String, nullable=False)
+    region = Column(String, index=True)
     size = Column(String)  # For storage resources
     cpu_utilization = Column(Float)  # Percentage
     memory_utilization = Column(Float)  # Percentage
     storage_usage = Column(Float)  # In GB
     monthly_cost = Column(Float, nullable=False)
+    tags = Column(TagsType, nullable=False, default=dict, server_default=text("'{}'"))  # e.g. {"team": "web"}
+    health_score = Column(Integer, Computed(HEALTH_SCORE_SQL, persisted=True))  # 0-100
+    health_status = Column(String, Computed(HEALTH_STATUS_SQL, persisted=True))
+    lifecycle_state = Column(Enum(ResourceLifecycleState), nullable=False,
+                             default=ResourceLifecycleState.ACTIVE, server_default=ResourceLifecycleState.ACTIVE.name)
+    decommissioned_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     def __repr__(self):
         return f"<CloudResource(name='{self.name}', type='{self.resource_type}', cost=${self.monthly_cost})>"
+
+# Restricts a query to resources that have not been decommissioned. The state is
+# rendered as a literal rather than a bound parameter so the predicate matches
+# the partial indexes even in plans prepared without parameter values.
+ACTIVE_RESOURCES = CloudResource.lifecycle_state == literal(
+    ResourceLifecycleState.ACTIVE, CloudResource.lifecycle_state.type, literal_execute=True)
+DECOMMISSIONED_RESOURCES = CloudResource.lifecycle_state == literal(
+    ResourceLifecycleState.DECOMMISSIONED, CloudResource.lifecycle_state.type, literal_execute=True)
+
+# FTS5 table of resource names with the trigram tokenizer, kept in step by the
+# search service's write handler. Its rowid is the resource id.
+NAME_SEARCH_TABLE = "cloud_resource_names"
+
+event.listen(CloudResource.__table__, "before_create",
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+
+def create_name_search_table(connection) -> None:
+    if connection.dialect.name != "sqlite":
+        return
+    try:
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {NAME_SEARCH_TABLE} USING fts5(name, tokenize='trigram')"
+        )
+    except OperationalError as e:
+        # SQLite without FTS5 or older than 3.34: search falls back to name prefixes.
+        logger.warning(f"Name search index unavailable, searching by prefix only: {e}")
+
+@event.listens_for(CloudResource.__table__, "after_create")
+def _create_name_search_table(target, connection, **kw):
+    create_name_search_table(connection)
+
+event.listen(CloudResource.__table__, "after_drop",
+             DDL(f"DROP TABLE IF EXISTS {NAME_SEARCH_TABLE}").execute_if(dialect="sqlite"))
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Enum, Index
+from app.database import Base
+from app.models.cloud_resource import ResourceType, CloudProvider
+
+class CostHistory(Base):
+    """
+    Append-only log of observed monthly costs, one row per observation.
+
+    On PostgreSQL the table is range-partitioned by ``month`` (partitions are
+    created ahead of the writes by the cost history service). On SQLite it is a
+    WITHOUT ROWID table whose primary key starts with ``month``, which keeps
+    each month's rows physically clustered in the same way.
+    """
+    __tablename__ = "cost_history"
+    __table_args__ = (
+        Index("ix_cost_history_resource_recorded", "resource_id", "recorded_at"),
+        {"postgresql_partition_by": "RANGE (month)", "sqlite_with_rowid": False},
+    )
+
+    month = Column(Date, primary_key=True)  # First day of the month of recorded_at
+    resource_id = Column(Integer, primary_key=True)
+    recorded_at = Column(DateTime(timezone=True), primary_key=True)
+    resource_type = Column(Enum(ResourceType), nullable=False)
+    provider = Column(Enum(CloudProvider), nullable=False)
+    monthly_cost = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<CostHistory(resource_id={self.resource_id}, recorded_at='{self.recorded_at}', cost=${self.monthly_cost})>"
+
+class CostRollup(Base):
+    """
+    Per-bucket cost totals maintained as history is appended.
+
+    For each day or month bucket, ``total_cost`` is the sum over resources of
+    their latest observed monthly cost within the bucket, so trend queries
+    read one row per bucket and group instead of scanning history.
+    """
+    __tablename__ = "cost_rollups"
+
+    granularity = Column(String, primary_key=True)  # "day" or "month"
+    dimension = Column(String, primary_key=True)  # "fleet", "resource_type" or "provider"
+    bucket = Column(Date, primary_key=True)
+    key = Column(String, primary_key=True)
+    total_cost = Column(Float, nullable=False, default=0.0)
+    resource_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CostRollup(granularity='{self.granularity}', bucket='{self.bucket}', key='{self.key}', cost=${self.total_cost})>"
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class DataVersion(Base):
+    """
+    Single-row counter bumped once per committed write to cloud resources.
+    Derived tables stamp their rows with the version that produced them.
+    """
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DataVersion(version={self.version})>"
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Float
+from app.database import Base
+
+class FleetAggregate(Base):
+    """
+    Running totals over active resources and recommendations.
+
+    One row per (dimension, key): the whole fleet under ("fleet", "all"), and one
+    row per resource type and per provider. Totals are adjusted by deltas as
+    resources are written instead of being recomputed from scratch.
+    """
+    __tablename__ = "fleet_aggregates"
+
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    resource_count = Column(Integer, nullable=False, default=0)
+    monthly_cost = Column(Float, nullable=False, default=0.0)
+    potential_savings = Column(Float, nullable=False, default=0.0)
+    recommendation_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<FleetAggregate(dimension='{self.dimension}', key='{self.key}', cost=${self.monthly_cost})>"
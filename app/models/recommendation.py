@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, UniqueConstraint, Index
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.cloud_resource import ResourceType, CloudProvider
+import enum
+
+class RecommendationStatus(str, enum.Enum):
+    ACTIVE = "active"
+    RESOLVED = "resolved"
+
+class Recommendation(Base):
+    """
+    Persisted optimization recommendation, one row per (resource, recommendation type).
+
+    Rows are never deleted: when a recommendation no longer applies it is marked
+    resolved so that incremental sync clients can observe the removal.
+    """
+    __tablename__ = "recommendations"
+    __table_args__ = (
+        UniqueConstraint("resource_id", "recommendation_type", name="uq_recommendations_resource_type"),
+        Index("ix_recommendations_version", "version"),
+        Index("ix_recommendations_status_resource", "status", "resource_id", "recommendation_type"),
+        Index("ix_recommendations_status_savings", "status", "estimated_savings"),
+        Index("ix_recommendations_status_cost", "status", "current_cost"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # No foreign key: resolved rows outlive the resources they refer to.
+    resource_id = Column(Integer, nullable=False, index=True)
+    recommendation_type = Column(String, nullable=False)
+    resource_name = Column(String, nullable=False)
+    resource_type = Column(Enum(ResourceType))
+    provider = Column(Enum(CloudProvider))
+    current_cost = Column(Float, nullable=False)
+    description = Column(String, nullable=False)
+    recommended_action = Column(String, nullable=False)
+    estimated_savings = Column(Float, nullable=False)
+    confidence_level = Column(String, nullable=False)
+    status = Column(Enum(RecommendationStatus), nullable=False, default=RecommendationStatus.ACTIVE)
+    created_version = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<Recommendation(resource_id={self.resource_id}, type='{self.recommendation_type}', status='{self.status}')>"
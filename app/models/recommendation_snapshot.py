@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Float, DateTime, LargeBinary
+from app.database import Base
+
+class RecommendationSnapshot(Base):
+    """
+    Point-in-time copy of the optimization summary.
+
+    The totals are plain columns so snapshots can be listed cheaply; the
+    active recommendations are stored in ``payload`` as compressed columns
+    sorted by (resource_id, recommendation_type), which is the order the
+    diff merges them in.
+    """
+    __tablename__ = "recommendation_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    taken_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    data_version = Column(Integer, nullable=False)
+    total_resources = Column(Integer, nullable=False)
+    total_monthly_cost = Column(Float, nullable=False)
+    total_potential_savings = Column(Float, nullable=False)
+    savings_percentage = Column(Float, nullable=False)
+    recommendation_count = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+
+    def __repr__(self):
+        return f"<RecommendationSnapshot(id={self.id}, taken_at='{self.taken_at}', recommendations={self.recommendation_count})>"
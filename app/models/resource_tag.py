@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Float, Index
+from app.database import Base
+
+class ResourceTag(Base):
+    """
+    One row per tag of a resource, kept in step with ``CloudResource.tags``
+    on databases without JSONB. The resource's monthly cost is copied onto
+    every row so cost-by-tag groupings are answered from the
+    ``(key, value, resource_id, monthly_cost)`` index alone.
+    """
+    __tablename__ = "resource_tags"
+    __table_args__ = (
+        Index("ix_resource_tags_key_value", "key", "value", "resource_id", "monthly_cost"),
+    )
+
+    resource_id = Column(Integer, primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(String, nullable=False)
+    monthly_cost = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<ResourceTag(resource_id={self.resource_id}, {self.key}='{self.value}')>"
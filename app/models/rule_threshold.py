@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Float, Enum
+from app.database import Base
+from app.models.cloud_resource import ResourceType, CloudProvider
+
+class RuleThreshold(Base):
+    """
+    Override of the optimization rule thresholds for one resource type, one
+    provider, one (type, provider) pair, or the whole fleet when both are
+    null. Null thresholds inherit from the less specific level.
+
+    The overrides are replaced as a set; every row of a set carries the same
+    random ``revision``, so (row count, revision) identifies the set and is
+    all a process needs to read to know whether its compiled plan is current.
+    """
+    __tablename__ = "rule_thresholds"
+
+    id = Column(Integer, primary_key=True)
+    resource_type = Column(Enum(ResourceType))
+    provider = Column(Enum(CloudProvider))
+    downsize_cpu = Column(Float)
+    downsize_memory = Column(Float)
+    terminate_cpu = Column(Float)
+    terminate_memory = Column(Float)
+    storage_size = Column(Float)
+    storage_rate = Column(Float)
+    revision = Column(String, nullable=False)
+
+    def __repr__(self):
+        return f"<RuleThreshold(resource_type='{self.resource_type}', provider='{self.provider}')>"
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+
+class ScheduledJob(Base):
+    """
+    When a periodic background job is next due. Every worker process runs
+    the same timers; the one that moves ``next_run_at`` forward first runs
+    the job and the others skip that round.
+    """
+    __tablename__ = "scheduled_jobs"
+
+    name = Column(String, primary_key=True)
+    next_run_at = Column(DateTime(timezone=True), nullable=False)
+    claimed_by = Column(String, nullable=True)
+
+    def __repr__(self):
+        return f"<ScheduledJob(name='{self.name}', next_run_at='{self.next_run_at}', claimed_by='{self.claimed_by}')>"
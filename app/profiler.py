@@ -0,0 +1,169 @@
+"""
+Sampling profiler for a live worker.
+
+A background thread reads the Python stack of every thread at a fixed
+interval (``sys._current_frames``) and counts identical stacks. Nothing is
+hooked into the profiled code: the cost is the sampler's own work, paid only
+while a profile runs. Stacks of waiting threads (idle threadpool workers,
+the event loop in ``select``) are dropped unless asked for.
+
+Profiles render as collapsed stacks, one ``thread;frame;...;frame count``
+line per distinct stack (flamegraph.pl, inferno, speedscope all read it), or
+as a speedscope JSON document with one profile per thread.
+"""
+
+import os
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+FORMATS = ("collapsed", "speedscope")
+
+# Leaf frames of threads that are blocked waiting for work, by (function, file).
+_IDLE_FRAMES = {
+    ("wait", "threading.py"),
+    ("select", "selectors.py"),
+    ("_wait_for_tstate_lock", "threading.py"),
+}
+
+Frame = Tuple[str, str, int]
+
+_STDLIB = sysconfig.get_paths()["stdlib"] + os.sep
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all threads but its own every ``interval`` seconds
+    until stopped.
+    """
+
+    def __init__(self, interval: float, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self) -> "SamplingProfiler":
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+        return self
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = _stack(frame)
+                if not self.include_idle and _is_idle(stack[-1]):
+                    continue
+                self.stacks[(names.get(ident, f"thread-{ident}"), stack)] += 1
+            self.samples += 1
+
+def _stack(frame) -> Tuple[Frame, ...]:
+    """Frames from the outermost call to ``frame``."""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    frames.reverse()
+    return tuple(frames)
+
+def _is_idle(frame: Frame) -> bool:
+    name, filename, _ = frame
+    return (name.rsplit(".", 1)[-1], os.path.basename(filename)) in _IDLE_FRAMES
+
+def _short_path(filename: str) -> str:
+    for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    for prefix in (os.getcwd() + os.sep, _STDLIB):
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+def frame_label(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({_short_path(filename)}:{line})"
+
+def to_collapsed(profiler: SamplingProfiler) -> str:
+    lines = []
+    for (thread, stack), count in profiler.stacks.most_common():
+        frames = ";".join(frame_label(frame).replace(";", ",") for frame in stack)
+        lines.append(f"{thread};{frames} {count}")
+    return "\n".join(lines) + "\n"
+
+def to_speedscope(profiler: SamplingProfiler, name: str) -> Dict:
+    """
+    Render as a speedscope file (https://www.speedscope.app/file-format-schema.json),
+    weighting each stack by its samples times the sampling interval.
+    """
+    frame_index: Dict[Frame, int] = {}
+    frames = []
+    by_thread: Dict[str, list] = {}
+    for (thread, stack), count in profiler.stacks.items():
+        indexes = []
+        for frame in stack:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": _short_path(frame[1]), "line": frame[2]})
+            indexes.append(frame_index[frame])
+        by_thread.setdefault(thread, []).append((indexes, count * profiler.interval * 1000))
+
+    profiles = []
+    for thread, stacks in sorted(by_thread.items()):
+        total = sum(weight for _, weight in stacks)
+        profiles.append({
+            "type": "sampled",
+            "name": thread,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": total,
+            "samples": [indexes for indexes, _ in stacks],
+            "weights": [weight for _, weight in stacks],
+        })
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "cloud-optimization-api",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": profiles,
+    }
+
+# One profile per process at a time: concurrent samplers would skew each other.
+_running = threading.Lock()
+
+@contextmanager
+def profiling(interval: float, include_idle: bool = False):
+    """
+    Sample every thread of this process for the duration of the block.
+    Raises ProfilerBusy if a profile is already running.
+    """
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker")
+    profiler = SamplingProfiler(interval, include_idle).start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _running.release()
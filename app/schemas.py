@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from enum import Enum
 
 class ResourceType(str, Enum):
@@ -14,28 +14,56 @@ class CloudProvider(str, Enum):
     AZURE = "azure"
     GCP = "gcp"
 
+class ResourceLifecycleState(str, Enum):
+    ACTIVE = "active"
+    DECOMMISSIONED = "decommissioned"
+
 class CloudResourceBase(BaseModel):
     name: str = Field(..., description="Resource name")
     resource_type: ResourceType = Field(..., description="Type of resource")
     provider: CloudProvider = Field(..., description="Cloud provider")
     instance_type: str = Field(..., description="Instance type or specification")
+    region: Optional[str] = Field(None, description="Provider region, e.g. us-east-1")
     size: Optional[str] = Field(None, description="Size for storage resources")
     cpu_utilization: Optional[float] = Field(None, ge=0, le=100, description="CPU utilization percentage")
     memory_utilization: Optional[float] = Field(None, ge=0, le=100, description="Memory utilization percentage")
     storage_usage: Optional[float] = Field(None, ge=0, description="Storage usage in GB")
     monthly_cost: float = Field(..., gt=0, description="Monthly cost in USD")
+    tags: Dict[str, str] = Field(default_factory=dict, description="Labels such as team, environment or project")
 
 class CloudResourceCreate(CloudResourceBase):
     pass
 
 class CloudResourceResponse(CloudResourceBase):
     id: int
+    health_score: Optional[int] = Field(None, description="Utilization health, 0-100")
+    health_status: Optional[str] = Field(None, description="optimal, over-provisioned or under-provisioned")
+    lifecycle_state: ResourceLifecycleState = Field(ResourceLifecycleState.ACTIVE, description="active or decommissioned")
+    decommissioned_at: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime]
 
     class Config:
         from_attributes = True
 
+class ResourceSearchResult(BaseModel):
+    id: int
+    name: str
+    resource_type: ResourceType
+    provider: CloudProvider
+    instance_type: str
+    region: Optional[str]
+    monthly_cost: float
+    health_status: Optional[str]
+
+class ResourceSearchPage(BaseModel):
+    query: str
+    total: int = Field(..., description="Ranked matches, at most SEARCH_MAX_MATCHES")
+    truncated: bool = Field(..., description="More names matched than were ranked")
+    offset: int
+    limit: int
+    results: List[ResourceSearchResult]
+
 class OptimizationRecommendation(BaseModel):
     resource_id: int
     resource_name: str
@@ -46,6 +74,16 @@ class OptimizationRecommendation(BaseModel):
     estimated_savings: float
     confidence_level: str
 
+class RecommendationChange(OptimizationRecommendation):
+    change_type: str = Field(..., description="created, changed or resolved")
+    status: str
+    version: int
+
+class RecommendationDelta(BaseModel):
+    since_version: int
+    current_version: int
+    changes: List[RecommendationChange]
+
 class OptimizationSummary(BaseModel):
     total_resources: int
     total_monthly_cost: float
@@ -53,6 +91,89 @@ class OptimizationSummary(BaseModel):
     recommendations: List[OptimizationRecommendation]
     savings_percentage: float
 
+class RecommendationSnapshotInfo(BaseModel):
+    id: int
+    taken_at: datetime
+    data_version: int
+    total_resources: int
+    total_monthly_cost: float
+    total_potential_savings: float
+    savings_percentage: float
+    recommendation_count: int
+
+    class Config:
+        from_attributes = True
+
+class RecommendationDiffChange(BaseModel):
+    resource_id: int
+    recommendation_type: str
+    before: OptimizationRecommendation
+    after: OptimizationRecommendation
+    savings_change: float
+
+class RecommendationDiff(BaseModel):
+    from_snapshot: RecommendationSnapshotInfo
+    to_snapshot: RecommendationSnapshotInfo
+    savings_change: float
+    cost_change: float
+    added: List[OptimizationRecommendation]
+    removed: List[OptimizationRecommendation]
+    changed: List[RecommendationDiffChange]
+
+class WhatIfRequest(BaseModel):
+    cpu_thresholds: Optional[List[float]] = Field(None, max_length=200, description="CPU % thresholds for downsizing")
+    memory_thresholds: Optional[List[float]] = Field(None, max_length=200, description="Memory % thresholds for downsizing")
+    storage_thresholds: Optional[List[float]] = Field(None, max_length=200, description="Storage GB thresholds for storage optimization")
+
+class RuleThresholdValues(BaseModel):
+    downsize_cpu: Optional[float] = Field(None, ge=0, le=100, description="Downsize below this CPU %")
+    downsize_memory: Optional[float] = Field(None, ge=0, le=100, description="Downsize below this memory %")
+    terminate_cpu: Optional[float] = Field(None, ge=0, le=100, description="Terminate below this CPU %")
+    terminate_memory: Optional[float] = Field(None, ge=0, le=100, description="Terminate below this memory %")
+    storage_size: Optional[float] = Field(None, ge=0, description="Optimize storage above this many GB")
+    storage_rate: Optional[float] = Field(None, ge=0, le=1, description="Share of storage cost saved")
+
+class RuleThresholdOverride(BaseModel):
+    resource_type: Optional[ResourceType] = Field(None, description="Resource type, or every type if omitted")
+    provider: Optional[CloudProvider] = Field(None, description="Provider, or every provider if omitted")
+    thresholds: RuleThresholdValues = Field(..., description="Thresholds to override; omitted ones are inherited")
+
+class RuleThresholdsUpdate(BaseModel):
+    overrides: List[RuleThresholdOverride] = Field(..., max_length=100)
+
+class SavingsSurface(BaseModel):
+    savings: list
+    resource_count: list
+
+class TerminateTotals(BaseModel):
+    savings: float
+    resource_count: int
+
+class WhatIfResult(BaseModel):
+    data_version: int
+    resources_evaluated: int
+    total_monthly_cost: float
+    cpu_thresholds: List[float]
+    memory_thresholds: List[float]
+    storage_thresholds: List[float]
+    downsize: SavingsSurface
+    storage_optimization: SavingsSurface
+    terminate: TerminateTotals
+
+class BillingImportRequest(BaseModel):
+    path: str = Field(..., description="Export file, relative to the billing import directory")
+    workers: Optional[int] = Field(None, ge=1, le=64, description="Parser processes")
+    restart: bool = Field(False, description="Discard progress from an earlier run of this file")
+
+class AllocationNodeCreate(BaseModel):
+    name: str = Field(..., min_length=1, description="Node name, e.g. Payments")
+    parent_id: Optional[int] = Field(None, description="Parent node; omit for a new org")
+    tag_key: Optional[str] = Field(None, description="Allocate resources tagged tag_key=tag_value here")
+    tag_value: Optional[str] = Field(None, description="Tag value matched together with tag_key")
+
+class ResourceAssignment(BaseModel):
+    node_id: Optional[int] = Field(None, description="Node to pin the resource to; null returns it to tag rules")
+
 class APIResponse(BaseModel):
     success: bool
     message: str
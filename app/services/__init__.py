@@ -1 +1,10 @@
 from .optimization_service import OptimizationService
+# Importing the store registers its resource write handler.
+from .recommendation_store import RecommendationStore
+from .cost_history_service import CostHistoryService
+from .anomaly_detector import AnomalyDetector
+# Importing the tag service registers the handler that maintains resource_tags.
+from .tag_service import TagService
+from .allocation_service import AllocationService
+# Importing the search service registers the handler that maintains the SQLite name index.
+from .search_service import SearchService
@@ -0,0 +1,239 @@
+"""
+Hierarchical cost allocation: org -> department -> team -> service.
+
+A resource is allocated to the node it was explicitly assigned to, or else
+to the deepest node whose tag rule it matches. Every node stores cost,
+savings potential and resource count for its whole subtree. When a resource
+changes, its old contribution is subtracted from the nodes on its old path
+and the new one added along its new path, so reading any subtree is a single
+row and a full drilldown is one pass over the nodes.
+
+Totals are refreshed after the recommendation store has reconciled the
+touched resources, so savings always reflect the current recommendations.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+from app.models.allocation import AllocationNode, ResourceAllocation
+from app.models.cloud_resource import CloudResource, ACTIVE_RESOURCES
+from app.models.fleet_aggregate import FleetAggregate
+from app.models.recommendation import Recommendation, RecommendationStatus
+from app.services import recommendation_store
+from app.services.recommendation_store import FLEET_KEY
+from app.services.tag_service import TagService
+
+LEVELS = ("org", "department", "team", "service")
+
+_CHUNK_SIZE = 500
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for start in range(0, len(ids), _CHUNK_SIZE):
+        yield ids[start:start + _CHUNK_SIZE]
+
+def _ancestors(path: str) -> List[int]:
+    return [int(part) for part in path.strip("/").split("/")]
+
+class AllocationService:
+    """
+    Maintains the allocation hierarchy and its precomputed subtree totals.
+    """
+
+    def create_node(self, db: Session, name: str, parent_id: Optional[int] = None,
+                    tag_key: Optional[str] = None, tag_value: Optional[str] = None) -> AllocationNode:
+        """
+        Add a node under ``parent_id`` (or a new root). A tag rule pulls in
+        every resource carrying that tag that is not assigned explicitly.
+        """
+        if (tag_key is None) != (tag_value is None):
+            raise ValueError("tag_key and tag_value must be given together")
+        parent = None
+        if parent_id is not None:
+            parent = db.get(AllocationNode, parent_id)
+            if parent is None:
+                raise ValueError(f"Parent node {parent_id} not found")
+        depth = parent.depth + 1 if parent is not None else 0
+        if depth >= len(LEVELS):
+            raise ValueError(f"A {parent.level} node cannot have children")
+        if tag_key is not None and db.execute(
+            select(AllocationNode.id).where(AllocationNode.tag_key == tag_key, AllocationNode.tag_value == tag_value)
+        ).first():
+            raise ValueError(f"Tag {tag_key}:{tag_value} is already mapped to another node")
+
+        node = AllocationNode(name=name, level=LEVELS[depth], parent_id=parent_id, path="", depth=depth,
+                              tag_key=tag_key, tag_value=tag_value,
+                              subtree_cost=0.0, subtree_savings=0.0, subtree_resources=0)
+        db.add(node)
+        db.flush()
+        node.path = f"{parent.path if parent is not None else '/'}{node.id}/"
+        db.flush()
+        if tag_key is not None:
+            self.refresh_resources(db, set(TagService().resource_ids_with_tag(db, tag_key, tag_value)))
+            db.refresh(node)
+        return node
+
+    def assign_resource(self, db: Session, resource_id: int, node_id: Optional[int]) -> Optional[ResourceAllocation]:
+        """
+        Pin a resource to ``node_id``, or with None return it to tag-based
+        allocation. Returns its allocation, if it has one.
+        """
+        if db.get(CloudResource, resource_id) is None:
+            raise LookupError(f"Resource with ID {resource_id} not found")
+        if node_id is not None and db.get(AllocationNode, node_id) is None:
+            raise ValueError(f"Node {node_id} not found")
+        self.refresh_resources(db, {resource_id}, assignments={resource_id: node_id})
+        return db.get(ResourceAllocation, resource_id)
+
+    def refresh_resources(self, db: Session, resource_ids: Set[int],
+                          assignments: Optional[Dict[int, Optional[int]]] = None) -> None:
+        """
+        Reallocate the given resources and move the difference between their
+        old and new contributions through the affected subtree totals.
+        ``assignments`` overrides the explicit node of individual resources.
+        """
+        assignments = assignments or {}
+        nodes = {node_id: (path, depth) for node_id, path, depth in db.execute(
+            select(AllocationNode.id, AllocationNode.path, AllocationNode.depth))}
+        if not nodes:
+            return
+        rules = {
+            (key, value): node_id
+            for node_id, key, value in db.execute(
+                select(AllocationNode.id, AllocationNode.tag_key, AllocationNode.tag_value)
+                .where(AllocationNode.tag_key.is_not(None))
+            )
+        }
+
+        deltas = defaultdict(lambda: [0.0, 0.0, 0])
+        for chunk in _chunks(sorted(resource_ids)):
+            resources = {resource_id: (tags, cost) for resource_id, tags, cost in db.execute(
+                select(CloudResource.id, CloudResource.tags, CloudResource.monthly_cost)
+                .where(CloudResource.id.in_(chunk), ACTIVE_RESOURCES))}
+            savings = dict(db.execute(
+                select(Recommendation.resource_id, func.sum(Recommendation.estimated_savings))
+                .where(Recommendation.resource_id.in_(chunk), Recommendation.status == RecommendationStatus.ACTIVE,
+                       Recommendation.recommendation_type.in_(recommendation_store.RESOURCE_RULE_TYPES))
+                .group_by(Recommendation.resource_id)
+            ).all())
+            allocations = {
+                row.resource_id: row
+                for row in db.query(ResourceAllocation).filter(ResourceAllocation.resource_id.in_(chunk))
+            }
+
+            for resource_id in chunk:
+                allocation = allocations.get(resource_id)
+                if resource_id in assignments:
+                    pinned = assignments[resource_id]
+                else:
+                    pinned = allocation.node_id if allocation is not None and allocation.explicit else None
+                node_id = None
+                if resource_id in resources:
+                    tags, cost = resources[resource_id]
+                    node_id = pinned if pinned is not None else self._match(tags, rules, nodes)
+
+                if allocation is not None:
+                    self._add(deltas, nodes[allocation.node_id][0],
+                              -allocation.monthly_cost, -allocation.potential_savings, -1)
+                if node_id is None:
+                    if allocation is not None:
+                        db.delete(allocation)
+                    continue
+                saved = savings.get(resource_id) or 0.0
+                self._add(deltas, nodes[node_id][0], cost, saved, 1)
+                if allocation is None:
+                    allocation = ResourceAllocation(resource_id=resource_id)
+                    db.add(allocation)
+                allocation.node_id = node_id
+                allocation.explicit = pinned is not None
+                allocation.monthly_cost = cost
+                allocation.potential_savings = saved
+
+        db.flush()
+        self._apply(db, deltas)
+
+    def get_node(self, db: Session, node_id: int) -> Optional[Dict]:
+        """Totals of one subtree, read from its node row."""
+        node = db.get(AllocationNode, node_id)
+        return self._to_dict(node) if node is not None else None
+
+    def get_tree(self, db: Session) -> Dict:
+        """
+        The whole hierarchy with subtree totals, largest cost first at every
+        level, plus what is not allocated to any node.
+        """
+        nodes = db.query(AllocationNode).order_by(AllocationNode.depth, AllocationNode.id).all()
+        entries = {node.id: {**self._to_dict(node), "children": []} for node in nodes}
+        roots = []
+        for node in nodes:
+            siblings = entries[node.parent_id]["children"] if node.parent_id is not None else roots
+            siblings.append(entries[node.id])
+        for entry in list(entries.values()) + [{"children": roots}]:
+            entry["children"].sort(key=lambda child: (-child["total_cost"], child["id"]))
+
+        fleet = db.get(FleetAggregate, FLEET_KEY)
+        fleet_cost, fleet_savings, fleet_count = (
+            (fleet.monthly_cost, fleet.potential_savings, fleet.resource_count) if fleet else (0.0, 0.0, 0))
+        allocated_cost = sum(root["total_cost"] for root in roots)
+        return {
+            "levels": list(LEVELS),
+            "nodes": roots,
+            "allocated_cost": round(allocated_cost, 2),
+            "unallocated": {
+                "total_cost": round(max(fleet_cost - allocated_cost, 0.0), 2),
+                "potential_savings": round(max(fleet_savings - sum(r["potential_savings"] for r in roots), 0.0), 2),
+                "resource_count": max(fleet_count - sum(r["resource_count"] for r in roots), 0),
+            },
+        }
+
+    def _match(self, tags: Optional[Dict], rules: Dict, nodes: Dict) -> Optional[int]:
+        # The most specific (deepest) matching node wins; ties go to the oldest.
+        best = None
+        for key, value in (tags or {}).items():
+            node_id = rules.get((key, str(value)))
+            if node_id is not None and (best is None or (-nodes[node_id][1], node_id) < (-nodes[best][1], best)):
+                best = node_id
+        return best
+
+    def _add(self, deltas: Dict, path: str, cost: float, savings: float, count: int) -> None:
+        for node_id in _ancestors(path):
+            delta = deltas[node_id]
+            delta[0] += cost
+            delta[1] += savings
+            delta[2] += count
+
+    def _apply(self, db: Session, deltas: Dict) -> None:
+        rows = [
+            {"node_id": node_id, "cost": cost, "savings": savings, "count": count}
+            for node_id, (cost, savings, count) in deltas.items()
+            if cost or savings or count
+        ]
+        if not rows:
+            return
+        table = AllocationNode.__table__
+        db.execute(
+            update(table).where(table.c.id == bindparam("node_id")).values(
+                subtree_cost=table.c.subtree_cost + bindparam("cost"),
+                subtree_savings=table.c.subtree_savings + bindparam("savings"),
+                subtree_resources=table.c.subtree_resources + bindparam("count"),
+            ),
+            rows,
+        )
+
+    def _to_dict(self, node: AllocationNode) -> Dict:
+        return {
+            "id": node.id,
+            "name": node.name,
+            "level": node.level,
+            "parent_id": node.parent_id,
+            "path": node.path,
+            "tag": f"{node.tag_key}:{node.tag_value}" if node.tag_key is not None else None,
+            "total_cost": round(node.subtree_cost, 2),
+            "potential_savings": round(node.subtree_savings, 2),
+            "resource_count": node.subtree_resources,
+        }
+
+def _refresh_allocations(db: Session, resource_ids: Set[int]) -> None:
+    AllocationService().refresh_resources(db, resource_ids)
+
+recommendation_store.register_refresh_listener(_refresh_allocations)
@@ -0,0 +1,206 @@
+"""
+Streaming cost and utilization anomaly detection.
+
+Each resource keeps an exponentially weighted mean and variance per metric in
+``resource_metric_states``. A sample is scored against the state before it is
+folded in, so detection is O(1) per sample and never reads cost history back;
+the scoring itself is vectorized over a chunk of resources with numpy.
+
+Samples come from resource writes: the write handler scores the metrics whose
+value differs from the resource's pre-image, so a write that leaves a metric
+unchanged (a tag edit, a re-import of the same cost) does not count as another
+identical sample, and stores the new state and any anomalies in the same
+transaction as the write. Every
+process that writes resources - API workers and the billing import CLI alike -
+therefore feeds the same state, a rolled back write never reaches it, and
+concurrent writers are serialized by the data version row lock they already
+take before the handlers run.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from app.models.anomaly import CostAnomaly, ResourceMetricState
+from app.models.cloud_resource import CloudResource, ACTIVE_RESOURCES
+from app.services import resource_events
+from app.services.cost_history_service import to_utc
+
+METRICS = ("monthly_cost", "cpu_utilization", "memory_utilization")
+
+EWMA_ALPHA = 0.2
+Z_THRESHOLD = 3.0
+WARMUP_SAMPLES = 3
+# Relative floor on the standard deviation, so a step change on a series that
+# has been perfectly flat still scores as anomalous instead of dividing by zero.
+MIN_RELATIVE_STD = 0.05
+# Anomalies retained; older ones are pruned as new ones are recorded.
+MAX_ANOMALIES = 10000
+
+_CHUNK_SIZE = 500
+
+class AnomalyDetector:
+    """
+    Scores samples against per-resource EWMA state.
+
+    ``score`` works on plain (resources, len(METRICS)) arrays; ``ingest``
+    loads and stores that state and records what it flags.
+    """
+
+    def __init__(self, alpha: float = EWMA_ALPHA, threshold: float = Z_THRESHOLD,
+                 warmup: int = WARMUP_SAMPLES):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+
+    def score(self, values: np.ndarray, mean: np.ndarray, variance: np.ndarray, count: np.ndarray):
+        """
+        Score ``values`` (NaN where a metric was not reported) against the
+        prior state and fold them in. Returns the new mean, variance and count
+        arrays, the z-scores and a boolean mask of anomalous samples.
+        """
+        present = ~np.isnan(values)
+        deviation = np.where(present, values - mean, 0.0)
+        std = np.maximum(np.sqrt(variance), MIN_RELATIVE_STD * np.abs(mean))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z_scores = np.where(std > 0, deviation / std, 0.0)
+        flagged = present & (count >= self.warmup) & (np.abs(z_scores) > self.threshold)
+
+        # Incremental EWMA mean and variance; the first sample seeds the mean.
+        first = present & (count == 0)
+        increment = self.alpha * deviation
+        new_mean = np.where(first, values, np.where(present, mean + increment, mean))
+        new_variance = np.where(present & ~first, (1 - self.alpha) * (variance + deviation * increment), variance)
+        return new_mean, new_variance, count + present, z_scores, flagged
+
+    def ingest(self, db: Session, resource_ids: List[int], values: np.ndarray,
+               observed_at: Optional[datetime] = None, version: Optional[int] = None) -> List[Dict]:
+        """
+        Score and fold in one sample per resource, storing the new state and
+        the detected anomalies in ``db``. ``values`` is a
+        (len(resource_ids), len(METRICS)) array with NaN for metrics that were
+        not reported. Returns the anomalies detected in this batch.
+        """
+        observed_at = observed_at or datetime.now(timezone.utc)
+        values = np.asarray(values, dtype=np.float64).reshape(len(resource_ids), len(METRICS))
+        detected = []
+        for start in range(0, len(resource_ids), _CHUNK_SIZE):
+            chunk = list(resource_ids[start:start + _CHUNK_SIZE])
+            detected.extend(self._ingest_chunk(db, chunk, values[start:start + _CHUNK_SIZE], observed_at, version))
+        if detected:
+            db.execute(insert(CostAnomaly), detected)
+            newest = select(func.max(CostAnomaly.id)).scalar_subquery()
+            db.execute(delete(CostAnomaly).where(CostAnomaly.id <= newest - MAX_ANOMALIES))
+        return detected
+
+    def _ingest_chunk(self, db: Session, resource_ids: List[int], values: np.ndarray,
+                      observed_at: datetime, version: Optional[int]) -> List[Dict]:
+        position = {resource_id: row for row, resource_id in enumerate(resource_ids)}
+        column = {metric: index for index, metric in enumerate(METRICS)}
+        mean = np.zeros(values.shape)
+        variance = np.zeros(values.shape)
+        count = np.zeros(values.shape, dtype=np.int64)
+        for state in db.execute(
+            select(ResourceMetricState.resource_id, ResourceMetricState.metric, ResourceMetricState.mean,
+                   ResourceMetricState.variance, ResourceMetricState.sample_count)
+            .where(ResourceMetricState.resource_id.in_(resource_ids))
+        ):
+            if state.metric in column:
+                cell = (position[state.resource_id], column[state.metric])
+                mean[cell], variance[cell], count[cell] = state.mean, state.variance, state.sample_count
+
+        new_mean, new_variance, new_count, z_scores, flagged = self.score(values, mean, variance, count)
+
+        db.execute(delete(ResourceMetricState).where(ResourceMetricState.resource_id.in_(resource_ids)))
+        states = [
+            {"resource_id": resource_ids[row], "metric": METRICS[col], "mean": float(new_mean[row, col]),
+             "variance": float(new_variance[row, col]), "sample_count": int(new_count[row, col])}
+            for row, col in zip(*np.nonzero(new_count))
+        ]
+        if states:
+            db.execute(insert(ResourceMetricState), states)
+
+        return [
+            {
+                "resource_id": resource_ids[row],
+                "metric": METRICS[col],
+                "value": round(float(values[row, col]), 2),
+                "expected": round(float(mean[row, col]), 2),
+                "z_score": round(float(z_scores[row, col]), 2),
+                "direction": "spike" if z_scores[row, col] > 0 else "drop",
+                "detected_at": observed_at,
+                "data_version": version,
+            }
+            for row, col in zip(*np.nonzero(flagged))
+        ]
+
+    def forget(self, db: Session, resource_ids: List[int]) -> None:
+        """
+        Drop the state of deleted or decommissioned resources. Their recorded
+        anomalies are kept until pruned.
+        """
+        for start in range(0, len(resource_ids), _CHUNK_SIZE):
+            db.execute(delete(ResourceMetricState).where(
+                ResourceMetricState.resource_id.in_(resource_ids[start:start + _CHUNK_SIZE])))
+
+    def get_anomalies(self, db: Session, limit: int = 100, metric: Optional[str] = None,
+                      resource_id: Optional[int] = None) -> Dict:
+        """
+        Return the most recent anomalies, newest first.
+        """
+        criteria = []
+        if metric is not None:
+            criteria.append(CostAnomaly.metric == metric)
+        if resource_id is not None:
+            criteria.append(CostAnomaly.resource_id == resource_id)
+        total = db.execute(select(func.count()).select_from(CostAnomaly).where(*criteria)).scalar()
+        tracked = db.execute(select(func.count(func.distinct(ResourceMetricState.resource_id)))).scalar()
+        anomalies = db.execute(
+            select(CostAnomaly).where(*criteria).order_by(CostAnomaly.id.desc()).limit(limit)
+        ).scalars()
+        return {
+            "tracked_resources": tracked,
+            "total_anomalies": total,
+            "anomalies": [
+                {
+                    "resource_id": anomaly.resource_id,
+                    "metric": anomaly.metric,
+                    "value": anomaly.value,
+                    "expected": anomaly.expected,
+                    "z_score": anomaly.z_score,
+                    "direction": anomaly.direction,
+                    "detected_at": to_utc(anomaly.detected_at).isoformat(),
+                    "data_version": anomaly.data_version,
+                }
+                for anomaly in anomalies
+            ],
+        }
+
+def _changed_metrics(row, image: Optional[resource_events.ResourceImage]) -> List[float]:
+    # NaN for metrics that are unset or equal to the pre-image; a new or
+    # unknown prior state counts every reported metric as a sample.
+    return [
+        np.nan if value is None or (image is not None and value == getattr(image, metric)) else value
+        for metric, value in zip(METRICS, row[1:])
+    ]
+
+def _score_samples(db: Session, resource_ids: Set[int], version: int) -> None:
+    ids = sorted(resource_ids)
+    rows = []
+    for start in range(0, len(ids), _CHUNK_SIZE):
+        rows.extend(db.execute(
+            select(CloudResource.id, *(getattr(CloudResource, metric) for metric in METRICS))
+            .where(CloudResource.id.in_(ids[start:start + _CHUNK_SIZE]), ACTIVE_RESOURCES)
+        ))
+    found = {row[0] for row in rows}
+    detector = AnomalyDetector()
+    preimages = resource_events.get_preimages(db)
+    samples = [(row[0], _changed_metrics(row, preimages.get(row[0]))) for row in rows]
+    samples = [(resource_id, values) for resource_id, values in samples if not np.isnan(values).all()]
+    if samples:
+        detector.ingest(db, [resource_id for resource_id, _ in samples],
+                        np.array([values for _, values in samples], dtype=np.float64), version=version)
+    detector.forget(db, [resource_id for resource_id in ids if resource_id not in found])
+
+resource_events.register_handler(_score_samples)
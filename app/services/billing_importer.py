@@ -0,0 +1,469 @@
+"""
+Streaming importer for provider billing exports (AWS Cost and Usage Report
+style CSV, plain or gzip).
+
+The export is read in large byte chunks cut at record boundaries and parsed
+in a process pool. Each worker reduces its chunk to per-(resource, month)
+cost totals, so only the reduced totals cross the process boundary. Totals
+are upserted into ``billing_staged_totals`` in batches, and each batch
+commits together with the checkpoint offset, so an interrupted import resumes
+exactly where the last batch ended without counting any row twice.
+
+Once the whole file is staged, the totals are applied to ``cloud_resources``
+and ``cost_history`` in batches with bulk statements. The write handlers run
+as for any other write, using the pre-images passed to ``mark_touched``.
+"""
+
+import csv
+import io
+import gzip
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Dict, Iterator, Optional, Tuple
+from sqlalchemy import func, select, delete, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.billing_import import BillingStagedTotal, ImportCheckpoint
+from app.models.cloud_resource import CloudResource, CloudProvider, ResourceType
+from app.services import resource_events
+from app.services.cost_history_service import CostHistoryService, Observation, to_utc
+
+logger = logging.getLogger(__name__)
+
+# Accepted header names per field: CUR (legacy) and CUR 2.0 / Data Exports.
+COLUMN_ALIASES = {
+    "resource_id": ("lineItem/ResourceId", "line_item_resource_id"),
+    "usage_start": ("lineItem/UsageStartDate", "line_item_usage_start_date"),
+    "product_code": ("lineItem/ProductCode", "line_item_product_code"),
+    "cost": ("lineItem/UnblendedCost", "line_item_unblended_cost"),
+    "product_family": ("product/productFamily", "product_product_family"),
+    "instance_type": ("product/instanceType", "product_instance_type"),
+    "region": ("product/region", "product_region_code", "product_region"),
+}
+REQUIRED_COLUMNS = ("resource_id", "usage_start", "product_code", "cost")
+
+PRODUCT_RESOURCE_TYPES = {
+    "AmazonEC2": ResourceType.COMPUTE,
+    "AmazonRDS": ResourceType.DATABASE,
+    "AmazonElastiCache": ResourceType.CACHE,
+    "AmazonS3": ResourceType.STORAGE,
+    "AmazonEFS": ResourceType.STORAGE,
+}
+# EC2 line items for volumes and snapshots.
+STORAGE_PRODUCT_FAMILIES = {"Storage", "Storage Snapshot"}
+
+CHUNK_BYTES = 16 * 1024 * 1024
+BATCH_ROWS = 200_000
+
+_UPSERT_CHUNK = 500
+
+def resolve_columns(header: bytes) -> Dict[str, int]:
+    """
+    Map field names to column positions, raising ValueError if a required
+    column is missing.
+    """
+    names = next(csv.reader(io.StringIO(header.decode("utf-8-sig"))))
+    positions = {name: index for index, name in enumerate(names)}
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in positions:
+                columns[field] = positions[alias]
+                break
+    missing = [field for field in REQUIRED_COLUMNS if field not in columns]
+    if missing:
+        raise ValueError(f"Billing export is missing columns for: {', '.join(missing)}")
+    return columns
+
+def parse_chunk(columns: Dict[str, int], data: bytes) -> Tuple[Dict, int, int]:
+    """
+    Reduce a chunk of CSV records to ``{(resource_key, "YYYY-MM"): [resource_type,
+    instance_type, region, cost, last_usage]}``. Runs in a worker process.
+    Returns the totals with the number of rows read and skipped.
+    """
+    totals = {}
+    rows = skipped = 0
+    resource_column, usage_column = columns["resource_id"], columns["usage_start"]
+    product_column, cost_column = columns["product_code"], columns["cost"]
+    family_column = columns.get("product_family")
+    instance_column = columns.get("instance_type")
+    region_column = columns.get("region")
+
+    for record in csv.reader(io.StringIO(data.decode("utf-8"))):
+        if not record:
+            continue
+        rows += 1
+        try:
+            resource_key = record[resource_column]
+            product = record[product_column]
+            usage = record[usage_column]
+            _parse_time(usage)
+            cost = float(record[cost_column] or 0.0)
+            family = record[family_column] if family_column is not None else None
+            instance_type = record[instance_column] if instance_column is not None else ""
+            region = record[region_column] if region_column is not None else ""
+        except (IndexError, ValueError):
+            # Short rows and unparseable dates or costs.
+            skipped += 1
+            continue
+        resource_type = PRODUCT_RESOURCE_TYPES.get(product)
+        if not resource_key or resource_type is None:
+            skipped += 1
+            continue
+        if resource_type == ResourceType.COMPUTE and family in STORAGE_PRODUCT_FAMILIES:
+            resource_type = ResourceType.STORAGE
+
+        key = (resource_key, usage[:7])
+        entry = totals.get(key)
+        if entry is None:
+            totals[key] = [resource_type.value, instance_type or product, region or None, cost, usage]
+        else:
+            entry[3] += cost
+            if usage > entry[4]:
+                entry[4] = usage
+    return totals, rows, skipped
+
+def read_chunks(stream, offset: int, chunk_bytes: int = CHUNK_BYTES) -> Iterator[Tuple[bytes, int]]:
+    """
+    Yield ``(data, end_offset)`` chunks of whole records starting at ``offset``.
+    """
+    pending = b""
+    while True:
+        block = stream.read(chunk_bytes)
+        if not block:
+            if pending.strip():
+                yield pending, offset + len(pending)
+            return
+        data = pending + block
+        cut = data.rfind(b"\n") + 1
+        # A newline inside a quoted field is not a record boundary.
+        while cut and data.count(b'"', 0, cut) % 2:
+            cut = data.rfind(b"\n", 0, cut - 1) + 1
+        if not cut:
+            pending = data
+            continue
+        offset += cut
+        yield data[:cut], offset
+        pending = data[cut:]
+
+def open_export(path: str):
+    with open(path, "rb") as probe:
+        compressed = probe.read(2) == b"\x1f\x8b"
+    return gzip.open(path, "rb") if compressed else open(path, "rb")
+
+def fingerprint(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+class _InlineExecutor:
+    """
+    Executor stand-in that parses in the calling process, for ``workers=1``.
+    """
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class BillingImporter:
+    """
+    Imports one billing export into ``cloud_resources`` and ``cost_history``.
+    """
+
+    provider = CloudProvider.AWS
+
+    def __init__(self, workers: Optional[int] = None, chunk_bytes: int = CHUNK_BYTES,
+                 batch_rows: int = BATCH_ROWS):
+        self.workers = workers or settings.BILLING_IMPORT_WORKERS or os.cpu_count() or 1
+        self.chunk_bytes = chunk_bytes
+        self.batch_rows = batch_rows
+
+    def run(self, db: Session, path: str, restart: bool = False) -> Dict:
+        """
+        Import ``path``, resuming a previous run of the same file unless
+        ``restart`` is set. Returns the throughput report.
+        """
+        source = os.path.abspath(path)
+        current = fingerprint(source)
+        checkpoint = db.get(ImportCheckpoint, source)
+        if checkpoint is not None and (restart or checkpoint.fingerprint != current):
+            db.execute(delete(BillingStagedTotal).where(BillingStagedTotal.source == source))
+            db.delete(checkpoint)
+            db.flush()
+            checkpoint = None
+        if checkpoint is None:
+            checkpoint = ImportCheckpoint(source=source, fingerprint=current, status="staging", byte_offset=0,
+                                          total_bytes=os.path.getsize(source), rows_processed=0, rows_skipped=0,
+                                          resources_imported=0, elapsed_seconds=0.0)
+            db.add(checkpoint)
+            db.commit()
+        elif checkpoint.status == "completed":
+            return self.report(checkpoint)
+
+        try:
+            if checkpoint.status == "staging":
+                self._stage_file(db, checkpoint)
+            if checkpoint.status == "applying":
+                self._apply(db, checkpoint)
+        except Exception as e:
+            db.rollback()
+            checkpoint = db.get(ImportCheckpoint, source)
+            checkpoint.error = str(e)
+            db.commit()
+            raise
+        return self.report(checkpoint)
+
+    def report(self, checkpoint: ImportCheckpoint) -> Dict:
+        elapsed = checkpoint.elapsed_seconds or 0.0
+        return {
+            "source": checkpoint.source,
+            "status": checkpoint.status,
+            "rows_processed": checkpoint.rows_processed,
+            "rows_skipped": checkpoint.rows_skipped,
+            "bytes_processed": checkpoint.byte_offset,
+            "total_bytes": checkpoint.total_bytes,
+            "resources_imported": checkpoint.resources_imported,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(checkpoint.rows_processed / elapsed, 1) if elapsed else None,
+            "mb_per_second": round(checkpoint.byte_offset / elapsed / 1e6, 2) if elapsed else None,
+            "error": checkpoint.error,
+        }
+
+    def _stage_file(self, db: Session, checkpoint: ImportCheckpoint) -> None:
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            pool = _InlineExecutor()
+        with open_export(checkpoint.source) as stream, pool:
+            header = stream.readline()
+            columns = resolve_columns(header)
+            offset = checkpoint.byte_offset or len(header)
+            stream.seek(offset)
+
+            in_flight = deque()
+            batch, batch_rows, batch_skipped = {}, 0, 0
+            started = time.perf_counter()
+            for data, end in read_chunks(stream, offset, self.chunk_bytes):
+                in_flight.append((pool.submit(parse_chunk, columns, data), end))
+                # Bounded read-ahead keeps memory at a few chunks per worker.
+                while len(in_flight) > 2 * self.workers or (in_flight and in_flight[0][0].done()):
+                    future, end_offset = in_flight.popleft()
+                    totals, rows, skipped = future.result()
+                    _merge(batch, totals)
+                    batch_rows += rows
+                    batch_skipped += skipped
+                    offset = end_offset
+                    if batch_rows >= self.batch_rows:
+                        started = self._commit_batch(db, checkpoint, batch, batch_rows, batch_skipped, offset, started)
+                        batch, batch_rows, batch_skipped = {}, 0, 0
+            while in_flight:
+                future, offset = in_flight.popleft()
+                totals, rows, skipped = future.result()
+                _merge(batch, totals)
+                batch_rows += rows
+                batch_skipped += skipped
+            checkpoint.status = "applying"
+            self._commit_batch(db, checkpoint, batch, batch_rows, batch_skipped, offset, started)
+
+    def _commit_batch(self, db: Session, checkpoint: ImportCheckpoint, batch: Dict, rows: int, skipped: int,
+                      offset: int, started: float) -> float:
+        self._stage_totals(db, checkpoint.source, batch)
+        now = time.perf_counter()
+        checkpoint.byte_offset = offset
+        checkpoint.rows_processed += rows
+        checkpoint.rows_skipped += skipped
+        checkpoint.elapsed_seconds += now - started
+        checkpoint.error = None
+        db.commit()
+        logger.info(
+            f"Billing import {checkpoint.source}: {checkpoint.rows_processed} rows, "
+            f"{checkpoint.byte_offset / 1e6:.1f} MB, "
+            f"{checkpoint.rows_processed / max(checkpoint.elapsed_seconds, 1e-9):.0f} rows/s"
+        )
+        return now
+
+    def _stage_totals(self, db: Session, source: str, batch: Dict) -> None:
+        rows = [
+            {
+                "source": source,
+                "resource_key": resource_key,
+                "month": date.fromisoformat(f"{month}-01"),
+                "resource_type": resource_type,
+                "instance_type": instance_type,
+                "region": region,
+                "cost": cost,
+                "last_usage": _parse_time(last_usage),
+            }
+            for (resource_key, month), (resource_type, instance_type, region, cost, last_usage) in batch.items()
+        ]
+        dialect = db.get_bind().dialect.name
+        if dialect not in ("postgresql", "sqlite"):
+            for row in rows:
+                staged = db.get(BillingStagedTotal, (row["source"], row["resource_key"], row["month"]))
+                if staged is None:
+                    db.add(BillingStagedTotal(**row))
+                else:
+                    staged.cost += row["cost"]
+                    staged.last_usage = max(to_utc(staged.last_usage), row["last_usage"])
+            db.flush()
+            return
+
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        latest = func.greatest if dialect == "postgresql" else func.max
+        table = BillingStagedTotal.__table__
+        for start in range(0, len(rows), _UPSERT_CHUNK):
+            stmt = dialect_insert(table).values(rows[start:start + _UPSERT_CHUNK])
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.source, table.c.resource_key, table.c.month],
+                set_={
+                    "cost": table.c.cost + stmt.excluded.cost,
+                    "last_usage": latest(table.c.last_usage, stmt.excluded.last_usage),
+                    "instance_type": stmt.excluded.instance_type,
+                    "region": func.coalesce(stmt.excluded.region, table.c.region),
+                },
+            ))
+
+    def _apply(self, db: Session, checkpoint: ImportCheckpoint) -> None:
+        """
+        Write staged totals to resources and cost history, a batch of
+        resources per transaction, then drop the staged rows.
+        """
+        source = checkpoint.source
+        history = CostHistoryService()
+        history.ensure_partitions(db.get_bind().engine, db.execute(
+            select(BillingStagedTotal.month).distinct().where(BillingStagedTotal.source == source)).scalars())
+        last_key = ""
+        started = time.perf_counter()
+        while True:
+            keys = list(db.execute(
+                select(BillingStagedTotal.resource_key).distinct()
+                .where(BillingStagedTotal.source == source, BillingStagedTotal.resource_key > last_key)
+                .order_by(BillingStagedTotal.resource_key)
+                .limit(_UPSERT_CHUNK)
+            ).scalars())
+            if not keys:
+                break
+            last_key = keys[-1]
+            staged = db.execute(
+                select(BillingStagedTotal)
+                .where(BillingStagedTotal.source == source, BillingStagedTotal.resource_key.in_(keys))
+                .order_by(BillingStagedTotal.resource_key, BillingStagedTotal.month)
+            ).scalars().all()
+            ids = self._upsert_resources(db, {row.resource_key: row for row in staged})
+            history.record(db, [
+                Observation(ids[row.resource_key], to_utc(row.last_usage), ResourceType(row.resource_type),
+                            self.provider, round(row.cost, 2))
+                for row in staged
+            ])
+            checkpoint.resources_imported += len(keys)
+            now = time.perf_counter()
+            checkpoint.elapsed_seconds += now - started
+            started = now
+            db.commit()
+
+        db.execute(delete(BillingStagedTotal).where(BillingStagedTotal.source == source))
+        checkpoint.status = "completed"
+        db.commit()
+        logger.info(f"Billing import {source} completed: {checkpoint.resources_imported} resources")
+
+    def _upsert_resources(self, db: Session, latest: Dict[str, BillingStagedTotal]) -> Dict[str, int]:
+        """
+        Insert or update one resource per staged key from its latest month.
+        Returns resource ids by key.
+        """
+        existing = {
+            row.name: row for row in db.execute(
+                select(CloudResource.id, CloudResource.name, CloudResource.resource_type,
+                       CloudResource.provider, CloudResource.monthly_cost, CloudResource.lifecycle_state,
+                       CloudResource.cpu_utilization, CloudResource.memory_utilization)
+                .where(CloudResource.name.in_(list(latest)))
+            )
+        }
+        preimages = {}
+        updates, inserts = [], []
+        for key, staged in latest.items():
+            values = {
+                "resource_type": ResourceType(staged.resource_type),
+                "instance_type": staged.instance_type,
+                "region": staged.region,
+                "monthly_cost": round(staged.cost, 2),
+            }
+            current = existing.get(key)
+            if current is None:
+                inserts.append({"name": key, "provider": self.provider, **values})
+            else:
+                preimages[current.id] = resource_events.ResourceImage(
+                    current.resource_type, current.provider, current.monthly_cost, current.lifecycle_state,
+                    current.cpu_utilization, current.memory_utilization)
+                updates.append({"id": current.id, **values})
+
+        if updates:
+            db.execute(update(CloudResource), updates)
+        if inserts:
+            db.execute(insert(CloudResource), inserts)
+        ids = {key: row.id for key, row in existing.items()}
+        if inserts:
+            for resource_id, name in db.execute(
+                select(CloudResource.id, CloudResource.name)
+                .where(CloudResource.name.in_([row["name"] for row in inserts]))
+            ):
+                ids[name] = resource_id
+                preimages[resource_id] = None
+        resource_events.mark_touched(db, ids.values(), preimages)
+        return ids
+
+    def get_status(self, db: Session, path: str) -> Optional[Dict]:
+        checkpoint = db.get(ImportCheckpoint, os.path.abspath(path))
+        return self.report(checkpoint) if checkpoint is not None else None
+
+def resolve_import_path(path: str) -> str:
+    """
+    Resolve a path relative to ``BILLING_IMPORT_DIR``, refusing anything that
+    escapes it.
+    """
+    root = os.path.realpath(settings.BILLING_IMPORT_DIR)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError("Path must be inside the billing import directory")
+    return resolved
+
+def run_billing_import(path: str, workers: Optional[int] = None, restart: bool = False) -> None:
+    """
+    Background task entry point: import with a session of its own.
+    """
+    db = SessionLocal()
+    try:
+        BillingImporter(workers).run(db, path, restart)
+    except Exception as e:
+        logger.error(f"Billing import {path} failed: {e}")
+    finally:
+        db.close()
+
+def _merge(batch: Dict, totals: Dict) -> None:
+    for key, values in totals.items():
+        entry = batch.get(key)
+        if entry is None:
+            batch[key] = values
+        else:
+            entry[3] += values[3]
+            if values[4] > entry[4]:
+                entry[4] = values[4]
+            if values[2]:
+                entry[2] = values[2]
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
@@ -0,0 +1,240 @@
+"""
+Commitment (reserved capacity) sizing per instance family.
+
+For every provider/family, hourly usage in normalized units (vCPUs) over the
+lookback window is rebuilt from cost history: each observation means the
+resource ran until its next observation, or for one snapshot interval. The
+history is streamed one family and one block of resources at a time into a
+difference array, so memory is O(hours) per family and the resources x hours
+usage matrix is never materialized.
+
+A commitment of ``c`` units costs ``c * hours * rate * (1 - discount)`` and
+leaves ``sum(max(u_t - c, 0))`` on demand. Sorting the hourly usage once and
+taking cumulative sums gives that overflow for every candidate level at once,
+so the whole coverage curve costs O(H log H) instead of O(H) per level.
+"""
+
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.cloud_resource import CloudResource, ACTIVE_RESOURCES
+from app.models.cost_history import CostHistory
+from app.schemas import OptimizationRecommendation
+from app.services.cost_history_service import month_start, to_utc
+from app.services.instance_catalog import COMMITMENT_DISCOUNTS, INSTANCE_CATALOG
+
+COMMITMENT_TYPE = "commitment"
+
+HOURS_PER_MONTH = 730
+
+CURVE_POINTS = 20
+
+FamilyMember = namedtuple("FamilyMember", ["resource_id", "name", "instance_type", "units", "monthly_cost"])
+
+_BLOCK_SIZE = 500
+
+def coverage_curve(usage: np.ndarray, hourly_rate: float, discount: float) -> Dict[str, np.ndarray]:
+    """
+    Evaluate every useful commitment level for an hourly usage series.
+
+    The optimum always lies on an observed usage value, so the candidate
+    levels are 0 plus the distinct values of ``usage``. Returns the levels
+    with their coverage (share of usage committed), utilization (share of the
+    commitment used) and net monthly savings versus all on-demand.
+    """
+    hours = len(usage)
+    ordered = np.sort(usage)
+    prefix = np.concatenate(([0.0], np.cumsum(ordered)))
+    total = prefix[-1]
+    levels = np.unique(np.concatenate(([0.0], ordered)))
+
+    # Hours strictly above each level and their summed usage.
+    above = np.searchsorted(ordered, levels, side="right")
+    overflow = (total - prefix[above]) - (hours - above) * levels
+    covered = total - overflow
+
+    committed_cost = levels * hours * hourly_rate * (1 - discount)
+    savings = total * hourly_rate - (committed_cost + overflow * hourly_rate)
+    monthly = HOURS_PER_MONTH / hours if hours else 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coverage = np.where(total > 0, covered / total, 0.0)
+        utilization = np.where(levels > 0, covered / (levels * hours), 0.0)
+    return {
+        "levels": levels,
+        "coverage": coverage,
+        "utilization": utilization,
+        "monthly_savings": savings * monthly,
+    }
+
+class CommitmentService:
+    """
+    Recommends how many vCPUs of 1-year commitment to buy per instance family
+    and which resources that commitment would cover.
+    """
+
+    def load_families(self, db: Session) -> Dict[Tuple, List[FamilyMember]]:
+        families = defaultdict(list)
+        rows = db.execute(
+            select(CloudResource.id, CloudResource.name, CloudResource.provider,
+                   CloudResource.instance_type, CloudResource.monthly_cost)
+            .where(ACTIVE_RESOURCES)
+            .order_by(CloudResource.id)
+        )
+        for resource_id, name, provider, instance_type, cost in rows:
+            spec = INSTANCE_CATALOG.get(instance_type)
+            if spec is None or spec.provider != provider:
+                continue
+            families[(provider, spec.family)].append(FamilyMember(resource_id, name, instance_type, spec.vcpu, cost))
+        return families
+
+    def hourly_usage(self, db: Session, members: List[FamilyMember], start: datetime,
+                     hours: int) -> Tuple[np.ndarray, Dict[int, int]]:
+        """
+        Stream the family's history in blocks of resources and return its
+        hourly usage in vCPUs plus the running hours of each resource.
+        """
+        interval = timedelta(hours=settings.COST_SNAPSHOT_INTERVAL_HOURS or 24)
+        end = start + timedelta(hours=hours)
+        units = {member.resource_id: member.units for member in members}
+        difference = np.zeros(hours + 1)
+        running_hours = {}
+
+        ids = sorted(units)
+        for block_start in range(0, len(ids), _BLOCK_SIZE):
+            block = ids[block_start:block_start + _BLOCK_SIZE]
+            rows = db.execute(
+                select(CostHistory.resource_id, CostHistory.recorded_at)
+                .where(CostHistory.resource_id.in_(block))
+                .where(CostHistory.month >= month_start((start - interval).date()))
+                .where(CostHistory.recorded_at >= start - interval, CostHistory.recorded_at < end)
+                .order_by(CostHistory.resource_id, CostHistory.recorded_at)
+            ).all()
+            if not rows:
+                continue
+            resource_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+            offsets = np.fromiter(
+                ((to_utc(row[1]) - start).total_seconds() / 3600 for row in rows), dtype=np.float64, count=len(rows))
+
+            # Each observation covers the time until the next one of the same
+            # resource, or one snapshot interval, whichever is shorter.
+            until = offsets + interval.total_seconds() / 3600
+            same_resource = resource_ids[1:] == resource_ids[:-1]
+            until[:-1] = np.where(same_resource, np.minimum(until[:-1], offsets[1:]), until[:-1])
+            first_hour = np.clip(np.floor(offsets), 0, hours).astype(np.int64)
+            last_hour = np.clip(np.floor(until), 0, hours).astype(np.int64)
+            weights = np.fromiter((units[rid] for rid in resource_ids), dtype=np.float64, count=len(rows))
+
+            np.add.at(difference, first_hour, weights)
+            np.add.at(difference, last_hour, -weights)
+            spans = np.bincount(np.searchsorted(block, resource_ids), weights=last_hour - first_hour,
+                                minlength=len(block))
+            for resource_id, span in zip(block, spans):
+                if span:
+                    running_hours[resource_id] = int(span)
+
+        return np.cumsum(difference)[:hours], running_hours
+
+    def plan(self, db: Session, lookback_days: int = 30,
+             now: Optional[datetime] = None) -> Tuple[Dict, List[OptimizationRecommendation]]:
+        """
+        Size a commitment for every family and return the plan with one
+        recommendation per resource the commitment would cover.
+        """
+        # The window ends with the current hour.
+        end = to_utc(now or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        hours = lookback_days * 24
+        start = end - timedelta(hours=hours)
+
+        families = []
+        recommendations = []
+        for (provider, family), members in sorted(self.load_families(db).items(),
+                                                  key=lambda item: (item[0][0].value, item[0][1])):
+            usage, running_hours = self.hourly_usage(db, members, start, hours)
+            if not usage.any():
+                continue
+            # On-demand price per vCPU-hour, weighted by each member's vCPUs.
+            unit_prices = [INSTANCE_CATALOG[m.instance_type].monthly_cost / HOURS_PER_MONTH
+                           / INSTANCE_CATALOG[m.instance_type].vcpu for m in members]
+            hourly_rate = float(np.average(unit_prices, weights=[m.units for m in members]))
+            curve = coverage_curve(usage, hourly_rate, COMMITMENT_DISCOUNTS[provider])
+            best = int(np.argmax(curve["monthly_savings"]))
+            level = float(curve["levels"][best])
+
+            summary = {
+                "provider": provider.value,
+                "family": family,
+                "hourly_rate": round(hourly_rate, 4),
+                "discount": COMMITMENT_DISCOUNTS[provider],
+                "peak_vcpus": float(usage.max()),
+                "average_vcpus": round(float(usage.mean()), 2),
+                "recommended_vcpus": level,
+                "coverage": round(float(curve["coverage"][best]), 4),
+                "utilization": round(float(curve["utilization"][best]), 4),
+                "estimated_savings": round(float(curve["monthly_savings"][best]), 2),
+                "curve": _downsample(curve),
+            }
+            families.append(summary)
+            if level > 0:
+                recommendations.extend(self._covered_resources(
+                    provider, family, members, running_hours, hours, level, summary, lookback_days))
+
+        return {
+            "lookback_days": lookback_days,
+            "families": families,
+            "resources_covered": len(recommendations),
+            "estimated_savings": round(sum(family["estimated_savings"] for family in families), 2),
+        }, recommendations
+
+    def _covered_resources(self, provider, family: str, members: List[FamilyMember], running_hours: Dict[int, int],
+                           hours: int, level: float, summary: Dict,
+                           lookback_days: int) -> List[OptimizationRecommendation]:
+        # The steadiest resources are the ones a commitment would actually cover.
+        steady = sorted((m for m in members if running_hours.get(m.resource_id)),
+                        key=lambda m: (-running_hours[m.resource_id], m.resource_id))
+        covered = []
+        remaining = level
+        for member in steady:
+            if remaining <= 0:
+                break
+            covered.append(member)
+            remaining -= member.units
+
+        weights = [member.units * running_hours[member.resource_id] for member in covered]
+        total_weight = sum(weights)
+        confidence = "high" if summary["utilization"] >= 0.95 else "medium"
+        return [
+            OptimizationRecommendation(
+                resource_id=member.resource_id,
+                resource_name=member.name,
+                current_cost=member.monthly_cost,
+                recommendation_type=COMMITMENT_TYPE,
+                description=(
+                    f"{member.instance_type} ran {running_hours[member.resource_id] * 100 // hours}% of the last "
+                    f"{lookback_days} days; the {provider.value} {family} family uses at least "
+                    f"{level:g} vCPUs most of the time"
+                ),
+                recommended_action=(
+                    f"Cover with a 1-year {provider.value} {family} commitment of {level:g} vCPUs "
+                    f"({summary['coverage']:.0%} coverage)"
+                ),
+                estimated_savings=round(summary["estimated_savings"] * weight / total_weight, 2),
+                confidence_level=confidence,
+            )
+            for member, weight in zip(covered, weights)
+        ]
+
+def _downsample(curve: Dict[str, np.ndarray]) -> List[Dict]:
+    picks = np.unique(np.linspace(0, len(curve["levels"]) - 1, min(CURVE_POINTS, len(curve["levels"]))).astype(int))
+    return [
+        {
+            "vcpus": float(curve["levels"][i]),
+            "coverage": round(float(curve["coverage"][i]), 4),
+            "utilization": round(float(curve["utilization"][i]), 4),
+            "monthly_savings": round(float(curve["monthly_savings"][i]), 2),
+        }
+        for i in picks
+    ]
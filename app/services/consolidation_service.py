@@ -0,0 +1,250 @@
+"""
+Workload consolidation via two-dimensional bin packing.
+
+Underutilized compute instances are packed by their absolute CPU and memory
+demand onto larger hosts, separately for every provider and region and for
+each candidate host size, keeping the size that saves the most. Packing is
+first-fit decreasing: items are placed largest first into the lowest-numbered
+host with room.
+
+Scanning the open hosts for each item is quadratic, and a max-segment-tree does
+not help in two dimensions because a subtree's CPU and memory headroom can
+come from different hosts. Instead hosts are filed on a fixed grid of remaining
+capacity (see ``_HostGrid``), which makes each placement a heap update plus a
+vectorized minimum over at most GRID_LEVELS^2 cells, independent of how many
+hosts are open: O(n log n) overall. The price is that demand is rounded up to
+1/GRID_LEVELS of a host when looking for room.
+"""
+
+import heapq
+import math
+from collections import defaultdict, namedtuple
+from typing import Dict, List, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.cloud_resource import CloudResource, ResourceType, ACTIVE_RESOURCES
+from app.schemas import OptimizationRecommendation
+from app.services.instance_catalog import CONSOLIDATION_HOSTS, INSTANCE_CATALOG, InstanceSpec
+from app.services.rule_plan import RulePlan, RuleThresholds, get_rule_plan
+
+CONSOLIDATE_TYPE = "consolidate"
+
+UNASSIGNED_REGION = "unassigned"
+
+Workload = namedtuple("Workload", ["resource_id", "name", "instance_type", "cpu_utilization",
+                                   "memory_utilization", "monthly_cost", "cpu", "memory"])
+
+# Remaining host capacity is tracked in steps of 1/GRID_LEVELS per dimension.
+GRID_LEVELS = 64
+
+_NO_HOST = np.iinfo(np.int64).max
+
+# Slack for floating point demand sums.
+_EPSILON = 1e-9
+
+def is_candidate(resource, thresholds: RuleThresholds) -> bool:
+    """
+    Whether ``resource`` passes the consolidation candidate filter: a compute
+    instance below the downsize CPU and memory ``thresholds`` of its cell
+    whose instance type is in the catalog.
+    """
+    return (
+        resource.resource_type == ResourceType.COMPUTE
+        and resource.cpu_utilization is not None and resource.cpu_utilization < thresholds.downsize_cpu
+        and resource.memory_utilization is not None and resource.memory_utilization < thresholds.downsize_memory
+        and resource.instance_type in INSTANCE_CATALOG
+        and resource.provider in CONSOLIDATION_HOSTS
+    )
+
+class _HostGrid:
+    """
+    Open hosts filed by remaining capacity.
+
+    Each host sits in the cell given by its remaining CPU and memory, each
+    rounded down to ``1/levels`` of a host, and ``lowest`` holds the lowest
+    host number per cell. Every host in a cell at or above the demand rounded
+    up to the grid has room, so the first such host is a minimum over that
+    corner of the grid. Hosts only ever move to lower cells, so stale heap
+    entries are recognized by comparing against the host's current cell.
+    """
+
+    def __init__(self, cpu_capacity: float, memory_capacity: float, levels: int):
+        self.cpu_capacity = cpu_capacity
+        self.memory_capacity = memory_capacity
+        self.levels = levels
+        self.lowest = np.full((levels + 1, levels + 1), _NO_HOST, dtype=np.int64)
+        self.members: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self.cells: List[Tuple[int, int]] = []
+        self.cpu: List[float] = []
+        self.memory: List[float] = []
+
+    def _level(self, remaining: float, capacity: float) -> int:
+        return min(int(remaining / capacity * self.levels + _EPSILON), self.levels)
+
+    def place(self, cpu: float, memory: float) -> int:
+        """
+        Put a workload on the first host with room for it, opening a new host
+        if none has. Returns the host number, or -1 if it exceeds an empty host.
+        """
+        if cpu > self.cpu_capacity + _EPSILON or memory > self.memory_capacity + _EPSILON:
+            return -1
+        cpu_level = max(math.ceil(cpu / self.cpu_capacity * self.levels - _EPSILON), 1)
+        memory_level = max(math.ceil(memory / self.memory_capacity * self.levels - _EPSILON), 1)
+        corner = self.lowest[cpu_level:, memory_level:]
+        host = int(corner.min()) if corner.size else _NO_HOST
+
+        if host == _NO_HOST:
+            host = len(self.cells)
+            self.cells.append(None)
+            self.cpu.append(self.cpu_capacity)
+            self.memory.append(self.memory_capacity)
+        self.cpu[host] -= cpu
+        self.memory[host] -= memory
+
+        old, new = self.cells[host], (self._level(self.cpu[host], self.cpu_capacity),
+                                      self._level(self.memory[host], self.memory_capacity))
+        if old != new:
+            self.cells[host] = new
+            heapq.heappush(self.members[new], host)
+            if host < self.lowest[new]:
+                self.lowest[new] = host
+            if old is not None:
+                members = self.members[old]
+                while members and self.cells[members[0]] != old:
+                    heapq.heappop(members)
+                self.lowest[old] = members[0] if members else _NO_HOST
+        return host
+
+def pack_first_fit_decreasing(workloads: List[Workload], cpu_capacity: float, memory_capacity: float,
+                              levels: int = GRID_LEVELS) -> Tuple[List[int], int]:
+    """
+    Assign each workload to a host, largest dominant share first. Returns the
+    host per workload (-1 if it does not fit on an empty host) and the number
+    of hosts used.
+    """
+    order = sorted(
+        range(len(workloads)),
+        key=lambda i: (-max(workloads[i].cpu / cpu_capacity, workloads[i].memory / memory_capacity),
+                       workloads[i].resource_id),
+    )
+    grid = _HostGrid(cpu_capacity, memory_capacity, levels)
+    assignment = [-1] * len(workloads)
+    for i in order:
+        assignment[i] = grid.place(workloads[i].cpu, workloads[i].memory)
+    return assignment, len(grid.cells)
+
+class ConsolidationService:
+    """
+    Produces ``consolidate`` recommendations for underutilized compute instances.
+    """
+
+    def __init__(self, target_utilization: float = None):
+        # Fraction of each host's capacity that packed demand may use.
+        self.target_utilization = target_utilization or settings.CONSOLIDATION_TARGET_UTILIZATION
+
+    def load_workloads(self, db: Session, rules: RulePlan = None) -> Dict[Tuple, List[Workload]]:
+        """
+        Read consolidation candidates grouped by (provider, region): compute
+        instances below the downsize CPU and memory thresholds of their
+        provider whose instance type is in the catalog.
+        """
+        rules = rules or get_rule_plan(db)
+        thresholds = {provider: rules.thresholds(ResourceType.COMPUTE, provider) for provider in CONSOLIDATION_HOSTS}
+        groups = defaultdict(list)
+        # The loosest thresholds narrow the scan; each row is then checked
+        # against its own provider's.
+        rows = db.execute(
+            select(CloudResource.id, CloudResource.name, CloudResource.provider, CloudResource.region,
+                   CloudResource.instance_type, CloudResource.cpu_utilization,
+                   CloudResource.memory_utilization, CloudResource.monthly_cost)
+            .where(ACTIVE_RESOURCES, CloudResource.resource_type == ResourceType.COMPUTE)
+            .where(CloudResource.provider.in_(list(CONSOLIDATION_HOSTS)))
+            .where(CloudResource.cpu_utilization < max(cell.downsize_cpu for cell in thresholds.values()))
+            .where(CloudResource.memory_utilization < max(cell.downsize_memory for cell in thresholds.values()))
+            .order_by(CloudResource.id)
+        )
+        for resource_id, name, provider, region, instance_type, cpu, memory, cost in rows:
+            spec = INSTANCE_CATALOG.get(instance_type)
+            if (spec is None or cpu >= thresholds[provider].downsize_cpu
+                    or memory >= thresholds[provider].downsize_memory):
+                continue
+            groups[(provider, region or UNASSIGNED_REGION)].append(Workload(
+                resource_id, name, instance_type, cpu, memory, cost,
+                spec.vcpu * cpu / 100, spec.memory_gb * memory / 100,
+            ))
+        return groups
+
+    def plan(self, db: Session) -> Tuple[Dict, List[OptimizationRecommendation]]:
+        """
+        Pack every provider/region group and return a summary of the plan and
+        one recommendation per resource that shares a host profitably.
+        """
+        groups = []
+        recommendations = []
+        for (provider, region), workloads in sorted(self.load_workloads(db).items(),
+                                                    key=lambda item: (item[0][0].value, item[0][1])):
+            # One packing per candidate host size; keep the one that saves most.
+            group, group_recommendations = max(
+                (self._plan_group(provider, region, host_type, INSTANCE_CATALOG[host_type], workloads)
+                 for host_type in CONSOLIDATION_HOSTS[provider]),
+                key=lambda planned: planned[0]["estimated_savings"],
+            )
+            groups.append(group)
+            recommendations.extend(group_recommendations)
+
+        return {
+            "groups": groups,
+            "candidates": sum(group["candidates"] for group in groups),
+            "resources_consolidated": len(recommendations),
+            "estimated_savings": round(sum(rec.estimated_savings for rec in recommendations), 2),
+        }, recommendations
+
+    def _plan_group(self, provider, region: str, host_type: str, host: InstanceSpec,
+                    workloads: List[Workload]) -> Tuple[Dict, List[OptimizationRecommendation]]:
+        assignment, _ = pack_first_fit_decreasing(
+            workloads, host.vcpu * self.target_utilization, host.memory_gb * self.target_utilization)
+
+        members = defaultdict(list)
+        for workload, slot in zip(workloads, assignment):
+            if slot >= 0:
+                members[slot].append(workload)
+
+        recommendations = []
+        hosts_used = 0
+        for slot in sorted(members):
+            sharing = members[slot]
+            current_cost = sum(workload.monthly_cost for workload in sharing)
+            savings = current_cost - host.monthly_cost
+            # A host with one workload is a resize, not a consolidation.
+            if len(sharing) < 2 or savings <= 0:
+                continue
+            hosts_used += 1
+            for workload in sharing:
+                recommendations.append(OptimizationRecommendation(
+                    resource_id=workload.resource_id,
+                    resource_name=workload.name,
+                    current_cost=workload.monthly_cost,
+                    recommendation_type=CONSOLIDATE_TYPE,
+                    description=(
+                        f"Underutilized {workload.instance_type} ({workload.cpu_utilization}% CPU, "
+                        f"{workload.memory_utilization}% memory) can share a host with "
+                        f"{len(sharing) - 1} other workload{'s' if len(sharing) > 2 else ''} "
+                        f"in {provider.value}/{region}"
+                    ),
+                    recommended_action=f"Consolidate onto {host_type} host {hosts_used} in {region}",
+                    # The host's saving is split in proportion to what each workload costs today.
+                    estimated_savings=round(savings * workload.monthly_cost / current_cost, 2),
+                    confidence_level="medium",
+                ))
+
+        return {
+            "provider": provider.value,
+            "region": region,
+            "host_type": host_type,
+            "candidates": len(workloads),
+            "hosts_needed": hosts_used,
+            "resources_consolidated": len(recommendations),
+            "estimated_savings": round(sum(rec.estimated_savings for rec in recommendations), 2),
+        }, recommendations
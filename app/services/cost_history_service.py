@@ -0,0 +1,276 @@
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy import select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.models.cloud_resource import CloudResource, ACTIVE_RESOURCES
+from app.models.cost_history import CostHistory, CostRollup
+from app.services import resource_events
+
+Observation = namedtuple("Observation", ["resource_id", "recorded_at", "resource_type", "provider", "monthly_cost"])
+
+GRANULARITIES = ("day", "month")
+TREND_DIMENSIONS = ("fleet", "resource_type", "provider")
+
+_CHUNK_SIZE = 500
+
+# Months after the current one whose PostgreSQL partitions are created ahead.
+PARTITION_MONTHS_AHEAD = 2
+# Bound on waiting for the parent table lock while creating a partition.
+_PARTITION_LOCK_TIMEOUT = "5s"
+
+def to_utc(value: datetime) -> datetime:
+    """
+    Return ``value`` as an aware UTC datetime. SQLite hands timezone-aware
+    columns back as naive UTC datetimes.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def _rollup_keys(resource_type, provider):
+    return [("fleet", "all"), ("resource_type", resource_type.value), ("provider", provider.value)]
+
+class CostHistoryService:
+    """
+    Appends cost observations to ``cost_history`` and keeps the daily and
+    monthly rollups in ``cost_rollups`` current as each observation arrives.
+    """
+
+    # PostgreSQL partitions known to be committed, shared across instances.
+    _partitions: Set[date] = set()
+
+    def record(self, db: Session, observations: Iterable[Observation]) -> int:
+        """
+        Append observations and fold them into the rollups. An observation that
+        is older than one already recorded in the same bucket is kept in the
+        history but does not change that bucket's total. Returns the number of
+        rows appended.
+        """
+        by_month: Dict[date, List[Observation]] = defaultdict(list)
+        for observation in observations:
+            observation = observation._replace(recorded_at=to_utc(observation.recorded_at))
+            by_month[month_start(observation.recorded_at.date())].append(observation)
+
+        # Before anything is written, so creating a partition never waits on
+        # this transaction's own lock on cost_history.
+        for month in by_month:
+            self._ensure_partition(db, month)
+
+        deltas = defaultdict(lambda: [0.0, 0])
+        appended = 0
+        for month, items in sorted(by_month.items()):
+            items.sort(key=lambda o: o.recorded_at)
+            latest, recorded = self._month_state(db, month, {o.resource_id for o in items})
+
+            for observation in items:
+                if (observation.resource_id, observation.recorded_at) in recorded:
+                    continue  # Already in history, e.g. a resumed import
+                recorded.add((observation.resource_id, observation.recorded_at))
+                day = observation.recorded_at.date()
+                buckets = (("month", month, observation.resource_id),
+                           ("day", day, (observation.resource_id, day)))
+
+                for granularity, bucket, state_key in buckets:
+                    previous = latest.get(state_key)
+                    if previous is not None and previous.recorded_at > observation.recorded_at:
+                        continue
+                    if previous is not None:
+                        for dimension, key in _rollup_keys(previous.resource_type, previous.provider):
+                            deltas[(granularity, dimension, bucket, key)][0] -= previous.monthly_cost
+                            deltas[(granularity, dimension, bucket, key)][1] -= 1
+                    for dimension, key in _rollup_keys(observation.resource_type, observation.provider):
+                        deltas[(granularity, dimension, bucket, key)][0] += observation.monthly_cost
+                        deltas[(granularity, dimension, bucket, key)][1] += 1
+                    latest[state_key] = observation
+
+                db.add(CostHistory(month=month, **observation._asdict()))
+                appended += 1
+
+        self._apply_rollups(db, deltas)
+        db.flush()
+        return appended
+
+    def observe(self, db: Session, resources: List[CloudResource], now: Optional[datetime] = None) -> int:
+        """
+        Record the current cost of each resource unless it was already observed
+        today with the same cost, type and provider.
+        """
+        now = to_utc(now or datetime.now(timezone.utc))
+        day_start = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+        observations = []
+        for start in range(0, len(resources), _CHUNK_SIZE):
+            chunk = resources[start:start + _CHUNK_SIZE]
+            today = {}
+            rows = db.execute(
+                select(CostHistory.resource_id, CostHistory.recorded_at, CostHistory.resource_type,
+                       CostHistory.provider, CostHistory.monthly_cost)
+                .where(CostHistory.month == month_start(now.date()))
+                .where(CostHistory.resource_id.in_([resource.id for resource in chunk]))
+                .where(CostHistory.recorded_at >= day_start)
+            )
+            for row in rows:
+                current = today.get(row.resource_id)
+                if current is None or to_utc(row.recorded_at) > to_utc(current.recorded_at):
+                    today[row.resource_id] = row
+
+            for resource in chunk:
+                last = today.get(resource.id)
+                if last is not None and (last.resource_type, last.provider, last.monthly_cost) == (
+                        resource.resource_type, resource.provider, resource.monthly_cost):
+                    continue
+                observations.append(Observation(resource.id, now, resource.resource_type,
+                                                resource.provider, resource.monthly_cost))
+        return self.record(db, observations)
+
+    def record_snapshot(self, db: Session) -> int:
+        """
+        Observe every active resource. Run periodically so buckets stay
+        populated for resources whose cost has not changed.
+        """
+        ids = list(db.execute(select(CloudResource.id).where(ACTIVE_RESOURCES).order_by(CloudResource.id)).scalars())
+        appended = 0
+        for start in range(0, len(ids), _CHUNK_SIZE):
+            chunk = db.query(CloudResource).filter(CloudResource.id.in_(ids[start:start + _CHUNK_SIZE])).all()
+            appended += self.observe(db, chunk)
+        if appended:
+            # Cached analytics derived from history are keyed by data version.
+            resource_events.next_data_version(db)
+        db.commit()
+        return appended
+
+    def get_trend(self, db: Session, granularity: str = "month", periods: int = 24,
+                  group_by: str = "resource_type", end: Optional[date] = None) -> Dict:
+        """
+        Return per-bucket totals for the last ``periods`` buckets, read only from
+        the rollups: one indexed range scan returning a row per bucket and group.
+        """
+        end = end or datetime.now(timezone.utc).date()
+        if granularity == "month":
+            last = month_start(end)
+            buckets = [add_months(last, offset) for offset in range(1 - periods, 1)]
+        else:
+            buckets = [end - timedelta(days=offset) for offset in range(periods - 1, -1, -1)]
+
+        rows = (
+            db.query(CostRollup)
+            .filter(CostRollup.granularity == granularity)
+            .filter(CostRollup.dimension.in_({"fleet", group_by}))
+            .filter(CostRollup.bucket >= buckets[0], CostRollup.bucket <= buckets[-1])
+            .all()
+        )
+
+        series = {bucket: {"bucket": bucket.isoformat(), "total_cost": 0.0, "resource_count": 0, "groups": {}}
+                  for bucket in buckets}
+        for row in rows:
+            entry = series[row.bucket]
+            if row.dimension == "fleet":
+                entry["total_cost"] = round(row.total_cost, 2)
+                entry["resource_count"] = row.resource_count
+            if row.dimension == group_by and row.resource_count > 0:
+                entry["groups"][row.key] = {"cost": round(row.total_cost, 2), "count": row.resource_count}
+
+        return {
+            "granularity": granularity,
+            "group_by": group_by,
+            "periods": periods,
+            "buckets": [series[bucket] for bucket in buckets],
+        }
+
+    def _month_state(self, db: Session, month: date, resource_ids: Set[int]):
+        """
+        Latest observation per resource for the month and per (resource, day),
+        plus the set of (resource_id, recorded_at) keys already stored.
+        """
+        latest = {}
+        recorded = set()
+        ids = sorted(resource_ids)
+        for start in range(0, len(ids), _CHUNK_SIZE):
+            rows = db.execute(
+                select(CostHistory.resource_id, CostHistory.recorded_at, CostHistory.resource_type,
+                       CostHistory.provider, CostHistory.monthly_cost)
+                .where(CostHistory.month == month)
+                .where(CostHistory.resource_id.in_(ids[start:start + _CHUNK_SIZE]))
+            )
+            for row in rows:
+                observation = Observation(*row)._replace(recorded_at=to_utc(row.recorded_at))
+                recorded.add((observation.resource_id, observation.recorded_at))
+                day = observation.recorded_at.date()
+                for state_key in (observation.resource_id, (observation.resource_id, day)):
+                    current = latest.get(state_key)
+                    if current is None or observation.recorded_at > current.recorded_at:
+                        latest[state_key] = observation
+        return latest, recorded
+
+    def _apply_rollups(self, db: Session, deltas: Dict) -> None:
+        for (granularity, dimension, bucket, key), (cost, count) in deltas.items():
+            if not cost and not count:
+                continue
+            rollup = db.get(CostRollup, (granularity, dimension, bucket, key))
+            if rollup is None:
+                rollup = CostRollup(granularity=granularity, dimension=dimension, bucket=bucket,
+                                    key=key, total_cost=0.0, resource_count=0)
+                db.add(rollup)
+            rollup.total_cost += cost
+            rollup.resource_count += count
+
+    def ensure_partitions(self, engine: Engine, months: Iterable[date]) -> None:
+        """
+        Create the PostgreSQL partitions of ``months`` that do not exist yet,
+        in a short transaction of their own. Creating a partition locks
+        ``cost_history`` exclusively, so this runs ahead of the writes: at
+        startup for the coming months, and before a billing import for the
+        months it covers. A month is remembered only once its partition is
+        committed.
+        """
+        if engine.dialect.name != "postgresql":
+            return
+        missing = sorted({month_start(month) for month in months} - self._partitions)
+        if not missing:
+            return
+        with engine.begin() as conn:
+            conn.execute(text(f"SET LOCAL lock_timeout = '{_PARTITION_LOCK_TIMEOUT}'"))
+            for month in missing:
+                name = _partition_name(month)
+                if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+                    conn.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF cost_history "
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                    ))
+        self._partitions.update(missing)
+
+    def ensure_upcoming_partitions(self, engine: Engine, today: Optional[date] = None) -> None:
+        """Create the partitions of the current month and PARTITION_MONTHS_AHEAD after it."""
+        current = month_start(today or datetime.now(timezone.utc).date())
+        self.ensure_partitions(engine, [add_months(current, offset) for offset in range(PARTITION_MONTHS_AHEAD + 1)])
+
+    def _ensure_partition(self, db: Session, month: date) -> None:
+        bind = db.get_bind()
+        if bind.dialect.name != "postgresql" or month in self._partitions:
+            return
+        # Usually created ahead; only a month nobody prepared pays for the DDL.
+        if db.execute(text("SELECT to_regclass(:name)"), {"name": _partition_name(month)}).scalar() is not None:
+            self._partitions.add(month)
+            return
+        self.ensure_partitions(bind.engine, [month])
+
+def _partition_name(month: date) -> str:
+    return f"cost_history_{month.year:04d}_{month.month:02d}"
+
+def _record_resource_writes(db: Session, resource_ids: Set[int], version: int) -> None:
+    ids = sorted(resource_ids)
+    resources = []
+    for start in range(0, len(ids), _CHUNK_SIZE):
+        resources.extend(db.query(CloudResource)
+                         .filter(CloudResource.id.in_(ids[start:start + _CHUNK_SIZE]), ACTIVE_RESOURCES).all())
+    CostHistoryService().observe(db, resources)
+
+resource_events.register_handler(_record_resource_writes)
@@ -0,0 +1,233 @@
+"""
+Fleet-wide cost forecasting from cost history.
+
+History is pivoted into a resources x months matrix and every model is fitted
+to all rows at once with array operations, so the work per model is a handful
+of passes over the matrix instead of one Python loop per resource. Fitted
+coefficients are cached per data version, which moves whenever new history is
+recorded.
+"""
+
+import threading
+import weakref
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.cloud_resource import CloudResource, ResourceType, ACTIVE_RESOURCES
+from app.models.cost_history import CostHistory
+from app.services import resource_events
+from app.services.cost_history_service import add_months, month_start
+
+FORECAST_MODELS = ("linear", "seasonal_naive", "exponential")
+
+SEASON_LENGTH = 12
+SMOOTHING_ALPHA = 0.5
+SMOOTHING_BETA = 0.3
+
+_BATCH_SIZE = 100_000
+
+class HistoryMatrix:
+    """
+    Monthly cost per resource: ``values[i, t]`` is the latest cost observed for
+    ``resource_ids[i]`` in ``months[t]``, carried forward over months without
+    observations and NaN before the first one.
+    """
+
+    def __init__(self, resource_ids: np.ndarray, resource_types: np.ndarray, months: List[date], values: np.ndarray):
+        self.resource_ids = resource_ids
+        self.resource_types = resource_types
+        self.months = months
+        self.values = values
+
+class FittedForecast:
+    """
+    Per-resource model state from which any horizon can be projected.
+    """
+
+    def __init__(self, model: str, history: HistoryMatrix, state: Dict[str, np.ndarray]):
+        self.model = model
+        self.history = history
+        self.state = state
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    # Index of the last observed column at or before each position, per row.
+    observed = ~np.isnan(values)
+    index = np.where(observed, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    filled = values[np.arange(values.shape[0])[:, None], index]
+    # Positions before a row's first observation stay missing.
+    filled[np.logical_not(np.logical_or.accumulate(observed, axis=1))] = np.nan
+    return filled
+
+def load_history_matrix(db: Session, history_months: int, end: Optional[date] = None) -> HistoryMatrix:
+    """
+    Pivot the last ``history_months`` months of cost history into a matrix.
+    Only active resources are included: decommissioned and archived ones
+    will not cost anything in the months being forecast.
+    """
+    last = month_start(end or datetime.now(timezone.utc).date())
+    months = [add_months(last, offset) for offset in range(1 - history_months, 1)]
+    month_index = {month: index for index, month in enumerate(months)}
+    type_codes = {resource_type: code for code, resource_type in enumerate(ResourceType)}
+
+    stmt = (
+        select(CostHistory.resource_id, CostHistory.month, CostHistory.resource_type, CostHistory.monthly_cost)
+        .where(CostHistory.month >= months[0], CostHistory.month <= months[-1])
+        .where(CostHistory.resource_id.in_(select(CloudResource.id).where(ACTIVE_RESOURCES)))
+        .order_by(CostHistory.resource_id, CostHistory.month, CostHistory.recorded_at)
+        .execution_options(yield_per=_BATCH_SIZE)
+    )
+    chunks = []
+    for partition in db.execute(stmt).partitions():
+        ids, row_months, types, costs = zip(*partition)
+        chunks.append((
+            np.fromiter(ids, dtype=np.int64, count=len(ids)),
+            np.fromiter((month_index[m] for m in row_months), dtype=np.int32, count=len(ids)),
+            np.fromiter((type_codes[t] for t in types), dtype=np.int8, count=len(ids)),
+            np.fromiter(costs, dtype=np.float64, count=len(ids)),
+        ))
+
+    if not chunks:
+        return HistoryMatrix(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8), months,
+                             np.empty((0, len(months))))
+
+    ids, columns, types, costs = (np.concatenate(parts) for parts in zip(*chunks))
+    # Rows arrive ordered by (resource, month, recorded_at): keep the last of each group.
+    last_in_group = np.ones(len(ids), dtype=bool)
+    last_in_group[:-1] = (ids[1:] != ids[:-1]) | (columns[1:] != columns[:-1])
+    ids, columns, types, costs = ids[last_in_group], columns[last_in_group], types[last_in_group], costs[last_in_group]
+
+    resource_ids, rows = np.unique(ids, return_inverse=True)
+    values = np.full((len(resource_ids), len(months)), np.nan)
+    values[rows, columns] = costs
+    # The type from each resource's most recent observation.
+    resource_types = np.empty(len(resource_ids), dtype=np.int8)
+    resource_types[rows] = types
+
+    return HistoryMatrix(resource_ids, resource_types, months, _forward_fill(values))
+
+class ForecastService:
+    """
+    Fits linear, seasonal-naive or exponential smoothing models to every
+    resource's monthly cost history in one batch.
+    """
+
+    def fit(self, history: HistoryMatrix, model: str) -> FittedForecast:
+        values = history.values
+        if model == "linear":
+            state = self._fit_linear(values)
+        elif model == "seasonal_naive":
+            state = {"season": values[:, -SEASON_LENGTH:], "last": values[:, -1]}
+        elif model == "exponential":
+            state = self._fit_exponential(values)
+        else:
+            raise ValueError(f"Unknown forecast model '{model}'")
+        return FittedForecast(model, history, state)
+
+    def project(self, fitted: FittedForecast, horizon: int) -> np.ndarray:
+        """
+        Return a resources x horizon matrix of projected monthly costs.
+        """
+        steps = np.arange(1, horizon + 1)
+        state = fitted.state
+        if fitted.model == "linear":
+            t = state["t_last"] + steps
+            projected = state["intercept"][:, None] + state["slope"][:, None] * t[None, :]
+        elif fitted.model == "seasonal_naive":
+            season = state["season"]
+            if season.shape[1] == SEASON_LENGTH:
+                projected = season[:, (steps - 1) % SEASON_LENGTH]
+                # Fall back to the last value where last year's month is missing.
+                projected = np.where(np.isnan(projected), state["last"][:, None], projected)
+            else:
+                projected = np.repeat(state["last"][:, None], horizon, axis=1)
+        else:
+            projected = state["level"][:, None] + state["trend"][:, None] * steps[None, :]
+        return np.clip(np.nan_to_num(projected, nan=0.0), 0.0, None)
+
+    def _fit_linear(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        # Weighted least squares per row; missing months get zero weight.
+        weights = (~np.isnan(values)).astype(np.float64)
+        y = np.nan_to_num(values)
+        t = np.arange(values.shape[1], dtype=np.float64)
+        n = weights.sum(axis=1)
+        sum_t = weights @ t
+        sum_tt = weights @ (t * t)
+        sum_y = (weights * y).sum(axis=1)
+        sum_ty = (weights * y) @ t
+        denominator = n * sum_tt - sum_t * sum_t
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(denominator > 0, (n * sum_ty - sum_t * sum_y) / denominator, 0.0)
+            intercept = np.where(n > 0, (sum_y - slope * sum_t) / n, 0.0)
+        return {"slope": slope, "intercept": intercept, "t_last": np.float64(values.shape[1] - 1)}
+
+    def _fit_exponential(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        # Holt's linear trend method, stepping through time with all rows at once.
+        first_observed = np.argmax(~np.isnan(values), axis=1)
+        start = values[np.arange(values.shape[0]), first_observed]
+        y = np.where(np.isnan(values), start[:, None], values)
+        level = y[:, 0].copy()
+        trend = np.zeros(values.shape[0])
+        for t in range(1, values.shape[1]):
+            previous_level = level
+            level = SMOOTHING_ALPHA * y[:, t] + (1 - SMOOTHING_ALPHA) * (level + trend)
+            trend = SMOOTHING_BETA * (level - previous_level) + (1 - SMOOTHING_BETA) * trend
+        return {"level": level, "trend": trend}
+
+    def get_forecast(self, db: Session, horizon: int = 3, model: str = "linear", history_months: int = 24,
+                     resource_limit: int = 0) -> Dict:
+        """
+        Project fleet, per-type and (optionally) per-resource monthly cost.
+        ``resource_limit`` returns that many resources with the largest
+        projected cost at the end of the horizon.
+        """
+        fitted = _cached_fit(db, self, model, history_months)
+        projected = self.project(fitted, horizon)
+        history = fitted.history
+        last_month = history.months[-1]
+        months = [add_months(last_month, step).isoformat() for step in range(1, horizon + 1)]
+
+        by_type = {}
+        for code, resource_type in enumerate(ResourceType):
+            rows = history.resource_types == code
+            if rows.any():
+                by_type[resource_type.value] = np.round(projected[rows].sum(axis=0), 2).tolist()
+
+        result = {
+            "model": model,
+            "history_months": history_months,
+            "resources_forecast": int(len(history.resource_ids)),
+            "months": months,
+            "total": np.round(projected.sum(axis=0), 2).tolist(),
+            "by_type": by_type,
+        }
+        if resource_limit:
+            top = np.argsort(-projected[:, -1], kind="stable")[:resource_limit] if len(projected) else []
+            result["resources"] = [
+                {"resource_id": int(history.resource_ids[i]), "forecast": np.round(projected[i], 2).tolist()}
+                for i in top
+            ]
+        return result
+
+# Fitted models per engine, keyed by (model, history months, month, data version).
+_fits = weakref.WeakKeyDictionary()
+_fits_lock = threading.Lock()
+
+def _cached_fit(db: Session, service: ForecastService, model: str, history_months: int) -> FittedForecast:
+    bind = db.get_bind()
+    key = (model, history_months, month_start(datetime.now(timezone.utc).date()),
+           resource_events.get_data_version(db))
+    with _fits_lock:
+        fits = _fits.setdefault(bind, {})
+        fitted = fits.get(key)
+    if fitted is None:
+        fitted = service.fit(load_history_matrix(db, history_months), model)
+        with _fits_lock:
+            # Anything keyed by an older data version is stale now.
+            fits = _fits.setdefault(bind, {})
+            for stale in [k for k in fits if k[3] != key[3]]:
+                del fits[stale]
+            fits[key] = fitted
+    return fitted
@@ -0,0 +1,62 @@
+"""
+Instance type catalog: capacity and list price of common instance types.
+
+Prices are approximate on-demand monthly list prices (hourly x 730) in a
+typical US region and are only used to compare placements against each other.
+"""
+
+from collections import namedtuple
+from typing import Dict, List
+from app.models.cloud_resource import CloudProvider
+
+InstanceSpec = namedtuple("InstanceSpec", ["provider", "family", "vcpu", "memory_gb", "monthly_cost"])
+
+INSTANCE_CATALOG: Dict[str, InstanceSpec] = {
+    # AWS
+    "t3.medium": InstanceSpec(CloudProvider.AWS, "t3", 2, 4, 30.37),
+    "t3.large": InstanceSpec(CloudProvider.AWS, "t3", 2, 8, 60.74),
+    "t3.xlarge": InstanceSpec(CloudProvider.AWS, "t3", 4, 16, 121.47),
+    "t3.2xlarge": InstanceSpec(CloudProvider.AWS, "t3", 8, 32, 242.94),
+    "m5.large": InstanceSpec(CloudProvider.AWS, "m5", 2, 8, 70.08),
+    "m5.xlarge": InstanceSpec(CloudProvider.AWS, "m5", 4, 16, 140.16),
+    "m5.2xlarge": InstanceSpec(CloudProvider.AWS, "m5", 8, 32, 280.32),
+    "m5.4xlarge": InstanceSpec(CloudProvider.AWS, "m5", 16, 64, 560.64),
+    "m5.8xlarge": InstanceSpec(CloudProvider.AWS, "m5", 32, 128, 1121.28),
+    "c5.large": InstanceSpec(CloudProvider.AWS, "c5", 2, 4, 62.05),
+    "c5.xlarge": InstanceSpec(CloudProvider.AWS, "c5", 4, 8, 124.10),
+    "c5.2xlarge": InstanceSpec(CloudProvider.AWS, "c5", 8, 16, 248.20),
+    "r5.large": InstanceSpec(CloudProvider.AWS, "r5", 2, 16, 91.98),
+    "r5.xlarge": InstanceSpec(CloudProvider.AWS, "r5", 4, 32, 183.96),
+    "r5.2xlarge": InstanceSpec(CloudProvider.AWS, "r5", 8, 64, 367.92),
+    # Azure
+    "Standard_B2s": InstanceSpec(CloudProvider.AZURE, "B", 2, 4, 30.37),
+    "Standard_D2s_v3": InstanceSpec(CloudProvider.AZURE, "Dsv3", 2, 8, 70.08),
+    "Standard_D4s_v3": InstanceSpec(CloudProvider.AZURE, "Dsv3", 4, 16, 140.16),
+    "Standard_D8s_v3": InstanceSpec(CloudProvider.AZURE, "Dsv3", 8, 32, 280.32),
+    "Standard_D16s_v3": InstanceSpec(CloudProvider.AZURE, "Dsv3", 16, 64, 560.64),
+    # GCP
+    "n1-standard-1": InstanceSpec(CloudProvider.GCP, "n1", 1, 3.75, 24.27),
+    "n1-standard-2": InstanceSpec(CloudProvider.GCP, "n1", 2, 7.5, 48.55),
+    "n1-standard-4": InstanceSpec(CloudProvider.GCP, "n1", 4, 15, 97.09),
+    "n1-standard-8": InstanceSpec(CloudProvider.GCP, "n1", 8, 30, 194.18),
+    "n1-standard-16": InstanceSpec(CloudProvider.GCP, "n1", 16, 60, 388.36),
+    "e2-standard-2": InstanceSpec(CloudProvider.GCP, "e2", 2, 8, 48.91),
+    "e2-standard-4": InstanceSpec(CloudProvider.GCP, "e2", 4, 16, 97.83),
+    "e2-standard-8": InstanceSpec(CloudProvider.GCP, "e2", 8, 32, 195.67),
+    "e2-standard-16": InstanceSpec(CloudProvider.GCP, "e2", 16, 64, 391.34),
+}
+
+# Host types that consolidated workloads may be packed onto, per provider.
+CONSOLIDATION_HOSTS: Dict[CloudProvider, List[str]] = {
+    CloudProvider.AWS: ["m5.xlarge", "m5.2xlarge", "m5.4xlarge"],
+    CloudProvider.AZURE: ["Standard_D4s_v3", "Standard_D8s_v3", "Standard_D16s_v3"],
+    CloudProvider.GCP: ["n1-standard-4", "n1-standard-8", "n1-standard-16"],
+}
+
+# Typical 1-year commitment discount off on-demand (reserved instances, savings
+# plans, committed use discounts).
+COMMITMENT_DISCOUNTS: Dict[CloudProvider, float] = {
+    CloudProvider.AWS: 0.37,
+    CloudProvider.AZURE: 0.36,
+    CloudProvider.GCP: 0.37,
+}
@@ -0,0 +1,46 @@
+"""
+Single-runner claims for periodic background jobs.
+
+With several worker processes, or several hosts, every process schedules the
+same jobs. Before running a job a process claims the current round with one
+conditional UPDATE on its ``scheduled_jobs`` row, which only succeeds while
+the job is due, so exactly one process runs each round no matter how many
+timers fire.
+"""
+
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.scheduled_job import ScheduledJob
+
+def _holder() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def claim_job(db: Session, name: str, interval_hours: float, now: Optional[datetime] = None) -> bool:
+    """
+    Claim this round of job ``name`` and schedule the next one
+    ``interval_hours`` later. Returns False if the job is not due yet because
+    another process already claimed it. Commits the claim.
+    """
+    now = now or datetime.now(timezone.utc)
+    next_run_at = now + timedelta(hours=interval_hours)
+    claimed = db.execute(
+        update(ScheduledJob)
+        .where(ScheduledJob.name == name, ScheduledJob.next_run_at <= now)
+        .values(next_run_at=next_run_at, claimed_by=_holder())
+    ).rowcount == 1
+    if not claimed and db.get(ScheduledJob, name) is None:
+        db.add(ScheduledJob(name=name, next_run_at=next_run_at, claimed_by=_holder()))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another process created the row first and holds this round.
+            db.rollback()
+            return False
+        return True
+    db.commit()
+    return claimed
@@ -1,7 +1,9 @@
 from typing import List, Dict
 from sqlalchemy.orm import Session
-from app.models.cloud_resource import CloudResource, ResourceType
+from app.models.cloud_resource import CloudResource, ResourceType, ACTIVE_RESOURCES
 from app.schemas import OptimizationRecommendation, OptimizationSummary
+from app.services.rule_plan import RuleThresholds, default_thresholds, get_rule_plan
+from app.tracing import traced
 
 class OptimizationService:
     """
@@ -16,20 +18,29 @@ class OptimizationService:
             "Standard_D2s_v3": {"to": "Standard_D2s_v2", "savings": 35},
         }
         
-        # Storage optimization rates
-        self.storage_optimization_rate = 0.3  # 30% potential savings
+        # Default storage optimization rate (30% from settings); rule
+        # threshold overrides replace it per resource type and provider.
+        self.storage_optimization_rate = default_thresholds().storage_rate
+        
+        # Savings rates of downsizing an instance type missing from the table
+        # (typically 25-40% of the cost) and of terminating a resource
+        self.downsizing_default_rate = 0.35
+        self.termination_savings_rate = 0.8
     
+    @traced()
     def analyze_resources(self, db: Session) -> OptimizationSummary:
         """
-        Analyze all resources and generate comprehensive optimization recommendations.
+        Analyze all active resources and generate comprehensive optimization recommendations.
         """
-        resources = db.query(CloudResource).all()
+        resources = db.query(CloudResource).filter(ACTIVE_RESOURCES).all()
+        plan = get_rule_plan(db)
         recommendations = []
         total_cost = sum(resource.monthly_cost for resource in resources)
         total_savings = 0
         
         for resource in resources:
-            resource_recommendations = self._analyze_single_resource(resource)
+            resource_recommendations = self._analyze_single_resource(
+                resource, plan.thresholds(resource.resource_type, resource.provider))
             recommendations.extend(resource_recommendations)
             total_savings += sum(rec.estimated_savings for rec in resource_recommendations)
         
@@ -43,16 +54,20 @@ class OptimizationService:
             savings_percentage=round(savings_percentage, 2)
         )
     
-    def _analyze_single_resource(self, resource: CloudResource) -> List[OptimizationRecommendation]:
+    def _analyze_single_resource(self, resource: CloudResource,
+                                 thresholds: RuleThresholds = None) -> List[OptimizationRecommendation]:
         """
-        Analyze a single resource and generate recommendations.
+        Analyze a single resource and generate recommendations, using the
+        settings defaults unless the thresholds of its rule plan cell are given.
         """
+        thresholds = thresholds or default_thresholds()
         recommendations = []
         
         # Check for over-provisioned compute instances
         if resource.resource_type in [ResourceType.COMPUTE, ResourceType.DATABASE, ResourceType.CACHE]:
             if (resource.cpu_utilization and resource.memory_utilization and 
-                resource.cpu_utilization < 30 and resource.memory_utilization < 50):
+                resource.cpu_utilization < thresholds.downsize_cpu and
+                resource.memory_utilization < thresholds.downsize_memory):
                 
                 savings = self._calculate_downsizing_savings(resource)
                 recommendations.append(
@@ -70,8 +85,8 @@ class OptimizationService:
         
         # Check for large storage volumes
         if resource.resource_type == ResourceType.STORAGE:
-            if resource.storage_usage and resource.storage_usage > 500:
-                savings = resource.monthly_cost * self.storage_optimization_rate
+            if resource.storage_usage and resource.storage_usage > thresholds.storage_size:
+                savings = resource.monthly_cost * thresholds.storage_rate
                 recommendations.append(
                     OptimizationRecommendation(
                         resource_id=resource.id,
@@ -86,8 +101,8 @@ class OptimizationService:
                 )
         
         # Check for unused or underutilized resources
-        if (resource.cpu_utilization and resource.cpu_utilization < 10 and 
-            resource.memory_utilization and resource.memory_utilization < 20):
+        if (resource.cpu_utilization and resource.cpu_utilization < thresholds.terminate_cpu and 
+            resource.memory_utilization and resource.memory_utilization < thresholds.terminate_memory):
             
             recommendations.append(
                 OptimizationRecommendation(
@@ -97,7 +112,7 @@ class OptimizationService:
                     recommendation_type="terminate",
                     description=f"Severely underutilized resource with {resource.cpu_utilization}% CPU usage",
                     recommended_action="Consider terminating this resource if not needed",
-                    estimated_savings=resource.monthly_cost * 0.8,  # 80% savings if terminated
+                    estimated_savings=resource.monthly_cost * self.termination_savings_rate,
                     confidence_level="medium"
                 )
             )
@@ -112,12 +127,16 @@ class OptimizationService:
             savings_amount = self.downsizing_savings[resource.instance_type]["savings"]
             return savings_amount
         
-        # Default savings estimate based on typical downsizing (25-40% cost reduction)
-        return resource.monthly_cost * 0.35
+        # Default savings estimate based on typical downsizing
+        return resource.monthly_cost * self.downsizing_default_rate
     
+    @traced()
     def get_resource_health_score(self, resource: CloudResource) -> Dict:
         """
         Calculate a health score for a resource based on utilization metrics.
+
+        The score and status are also stored on every resource as generated
+        columns (see ``HEALTH_SCORE_SQL``); keep the two in step.
         """
         score = 100
         status = "optimal"
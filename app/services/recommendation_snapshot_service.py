@@ -0,0 +1,203 @@
+"""
+Scheduled snapshots of the optimization summary and diffs between them.
+
+A snapshot stores the active recommendations column by column: ids and
+amounts as numpy arrays, text columns as integer codes into one string table
+(descriptions and actions repeat heavily across resources), all in a
+compressed ``.npz`` blob. Rows are sorted by (resource_id,
+recommendation_type) when written, so two snapshots are diffed with a single
+merge pass in O(n + m) instead of comparing every pair.
+"""
+
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session, defer
+from app.config import settings
+from app.models.fleet_aggregate import FleetAggregate
+from app.models.recommendation import Recommendation, RecommendationStatus
+from app.models.recommendation_snapshot import RecommendationSnapshot
+from app.schemas import OptimizationRecommendation
+from app.services.recommendation_store import FLEET_KEY
+from app.services.resource_events import get_data_version
+
+_STRING_COLUMNS = ("recommendation_type", "resource_name", "description", "recommended_action", "confidence_level")
+
+# Text columns compared, with both amounts, to decide whether a recommendation
+# present in both snapshots changed.
+_COMPARED_STRINGS = ("resource_name", "description", "recommended_action", "confidence_level")
+
+class SnapshotColumns:
+    """
+    Decoded snapshot rows as parallel Python lists, sorted by key.
+    """
+
+    def __init__(self, resource_id: List[int], current_cost: List[float], estimated_savings: List[float],
+                 strings: Dict[str, List[str]]):
+        self.resource_id = resource_id
+        self.current_cost = current_cost
+        self.estimated_savings = estimated_savings
+        self.strings = strings
+
+    def __len__(self):
+        return len(self.resource_id)
+
+    def row(self, index: int) -> OptimizationRecommendation:
+        return OptimizationRecommendation(
+            resource_id=self.resource_id[index],
+            current_cost=self.current_cost[index],
+            estimated_savings=self.estimated_savings[index],
+            **{column: values[index] for column, values in self.strings.items()},
+        )
+
+def encode_recommendations(rows: List[OptimizationRecommendation]) -> bytes:
+    rows = sorted(rows, key=lambda row: (row.resource_id, row.recommendation_type))
+    table: Dict[str, int] = {}
+    arrays = {
+        "resource_id": np.array([row.resource_id for row in rows], dtype=np.int64),
+        "current_cost": np.array([row.current_cost for row in rows], dtype=np.float64),
+        "estimated_savings": np.array([row.estimated_savings for row in rows], dtype=np.float64),
+    }
+    for column in _STRING_COLUMNS:
+        arrays[column] = np.array([table.setdefault(getattr(row, column), len(table)) for row in rows],
+                                  dtype=np.int32)
+    arrays["strings"] = np.frombuffer(json.dumps(list(table)).encode(), dtype=np.uint8)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+def decode_recommendations(payload: bytes) -> SnapshotColumns:
+    with np.load(io.BytesIO(payload), allow_pickle=False) as arrays:
+        table = json.loads(arrays["strings"].tobytes())
+        return SnapshotColumns(
+            resource_id=arrays["resource_id"].tolist(),
+            current_cost=arrays["current_cost"].tolist(),
+            estimated_savings=arrays["estimated_savings"].tolist(),
+            strings={column: [table[code] for code in arrays[column].tolist()] for column in _STRING_COLUMNS},
+        )
+
+def diff_columns(before: SnapshotColumns, after: SnapshotColumns) -> Dict:
+    """
+    Merge two key-sorted snapshots into added, removed and changed entries.
+    Rows are compared column by column and only built for the entries returned.
+    """
+    before_keys = list(zip(before.resource_id, before.strings["recommendation_type"]))
+    after_keys = list(zip(after.resource_id, after.strings["recommendation_type"]))
+    before_values = list(zip(before.current_cost, before.estimated_savings,
+                             *(before.strings[column] for column in _COMPARED_STRINGS)))
+    after_values = list(zip(after.current_cost, after.estimated_savings,
+                            *(after.strings[column] for column in _COMPARED_STRINGS)))
+
+    added, removed, changed = [], [], []
+    i = j = 0
+    while i < len(before_keys) or j < len(after_keys):
+        if j == len(after_keys) or (i < len(before_keys) and before_keys[i] < after_keys[j]):
+            removed.append(before.row(i))
+            i += 1
+        elif i == len(before_keys) or after_keys[j] < before_keys[i]:
+            added.append(after.row(j))
+            j += 1
+        else:
+            if before_values[i] != after_values[j]:
+                old, new = before.row(i), after.row(j)
+                changed.append({
+                    "resource_id": new.resource_id,
+                    "recommendation_type": new.recommendation_type,
+                    "before": old,
+                    "after": new,
+                    "savings_change": round(new.estimated_savings - old.estimated_savings, 2),
+                })
+            i += 1
+            j += 1
+    return {"added": added, "removed": removed, "changed": changed}
+
+class RecommendationSnapshotService:
+    """
+    Takes, lists, diffs and prunes recommendation snapshots.
+    """
+
+    def take_snapshot(self, db: Session, now: Optional[datetime] = None) -> RecommendationSnapshot:
+        """
+        Store the current summary, then prune snapshots past the retention period.
+        """
+        now = now or datetime.now(timezone.utc)
+        columns = [getattr(Recommendation, field) for field in OptimizationRecommendation.model_fields]
+        rows = [
+            OptimizationRecommendation(**row._mapping)
+            for row in db.execute(select(*columns).where(Recommendation.status == RecommendationStatus.ACTIVE))
+        ]
+        fleet = db.get(FleetAggregate, FLEET_KEY)
+        total_cost = fleet.monthly_cost if fleet else 0.0
+        total_savings = fleet.potential_savings if fleet else 0.0
+
+        snapshot = RecommendationSnapshot(
+            taken_at=now,
+            data_version=get_data_version(db),
+            total_resources=fleet.resource_count if fleet else 0,
+            total_monthly_cost=round(total_cost, 2),
+            total_potential_savings=round(total_savings, 2),
+            savings_percentage=round(total_savings / total_cost * 100, 2) if total_cost > 0 else 0.0,
+            recommendation_count=len(rows),
+            payload=encode_recommendations(rows),
+        )
+        db.add(snapshot)
+        db.flush()
+        self.prune(db, now)
+        db.commit()
+        return snapshot
+
+    def prune(self, db: Session, now: datetime) -> int:
+        """
+        Delete snapshots older than the retention period, always keeping the newest.
+        """
+        if settings.RECOMMENDATION_SNAPSHOT_RETENTION_DAYS <= 0:
+            return 0
+        newest = db.execute(select(RecommendationSnapshot.id).order_by(RecommendationSnapshot.taken_at.desc(),
+                                                                       RecommendationSnapshot.id.desc()).limit(1)).scalar()
+        cutoff = now - timedelta(days=settings.RECOMMENDATION_SNAPSHOT_RETENTION_DAYS)
+        result = db.execute(
+            delete(RecommendationSnapshot)
+            .where(RecommendationSnapshot.taken_at < cutoff, RecommendationSnapshot.id != newest)
+        )
+        return result.rowcount
+
+    def list_snapshots(self, db: Session) -> List[RecommendationSnapshot]:
+        # Listing only needs the totals, not the compressed payloads.
+        return (
+            db.query(RecommendationSnapshot)
+            .options(defer(RecommendationSnapshot.payload))
+            .order_by(RecommendationSnapshot.taken_at.desc(), RecommendationSnapshot.id.desc())
+            .all()
+        )
+
+    def newest(self, db: Session) -> Optional[RecommendationSnapshot]:
+        return (
+            db.query(RecommendationSnapshot)
+            .order_by(RecommendationSnapshot.taken_at.desc(), RecommendationSnapshot.id.desc())
+            .limit(1)
+            .first()
+        )
+
+    def diff(self, db: Session, from_id: int, to_id: Optional[int] = None) -> Dict:
+        """
+        Compare snapshot ``from_id`` with ``to_id``, or with the newest
+        snapshot if omitted. Raises LookupError for unknown snapshots.
+        """
+        before = db.get(RecommendationSnapshot, from_id)
+        if before is None:
+            raise LookupError(f"Snapshot {from_id} not found")
+        after = db.get(RecommendationSnapshot, to_id) if to_id is not None else self.newest(db)
+        if after is None:
+            raise LookupError(f"Snapshot {to_id} not found")
+
+        result = diff_columns(decode_recommendations(before.payload), decode_recommendations(after.payload))
+        result.update({
+            "from_snapshot": before,
+            "to_snapshot": after,
+            "savings_change": round(after.total_potential_savings - before.total_potential_savings, 2),
+            "cost_change": round(after.total_monthly_cost - before.total_monthly_cost, 2),
+        })
+        return result
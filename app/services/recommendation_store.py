@@ -0,0 +1,522 @@
+from collections import defaultdict, namedtuple
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+from sqlalchemy import and_, or_, select, func, delete
+from sqlalchemy.orm import Session
+from app.database import COMMITTED_VERSION_KEY
+from app.models.cloud_resource import CloudResource, ResourceLifecycleState, ACTIVE_RESOURCES
+from app.models.data_version import DataVersion
+from app.models.fleet_aggregate import FleetAggregate
+from app.models.recommendation import Recommendation, RecommendationStatus
+from app.schemas import OptimizationRecommendation, OptimizationSummary, RecommendationChange, RecommendationDelta
+from app.services.consolidation_service import CONSOLIDATE_TYPE, is_candidate as is_consolidation_candidate
+from app.services.optimization_service import OptimizationService
+from app.services.rule_plan import Cell, RulePlan, get_rule_plan
+from app.services import resource_events
+from app.tracing import traced
+
+# Recommendation types produced by evaluating one resource in isolation. Only
+# these count toward savings totals: fleet-level types such as consolidation
+# and commitments are alternatives to them for the same resources, not
+# savings that add up.
+RESOURCE_RULE_TYPES = {"downsize", "storage_optimization", "terminate"}
+
+# Columns compared to decide whether a recommendation actually changed.
+_TRACKED_FIELDS = (
+    "resource_name",
+    "current_cost",
+    "description",
+    "recommended_action",
+    "estimated_savings",
+    "confidence_level",
+)
+
+# Columns the top-K query may rank by; each has a (status, column) index.
+TOP_K_COLUMNS = {
+    "estimated_savings": Recommendation.estimated_savings,
+    "current_cost": Recommendation.current_cost,
+}
+
+# Keep IN lists well below driver parameter limits.
+_CHUNK_SIZE = 500
+
+FLEET_KEY = ("fleet", "all")
+
+# The resource columns a recommendation row copies.
+_ResourceKey = namedtuple("_ResourceKey", ["id", "resource_type", "provider"])
+
+# Called as ``listener(session, resource_ids)`` once the recommendations of
+# those resources have been reconciled, e.g. to maintain savings rollups.
+RefreshListener = Callable[[Session, Set[int]], None]
+_refresh_listeners: List[RefreshListener] = []
+
+def register_refresh_listener(listener: RefreshListener) -> RefreshListener:
+    if listener not in _refresh_listeners:
+        _refresh_listeners.append(listener)
+    return listener
+
+def _notify_refreshed(db: Session, resource_ids: Set[int]) -> None:
+    if not _refresh_listeners or not resource_ids:
+        return
+    db.flush()
+    for listener in _refresh_listeners:
+        listener(db, resource_ids)
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for start in range(0, len(ids), _CHUNK_SIZE):
+        yield ids[start:start + _CHUNK_SIZE]
+
+def _aggregate_keys(resource_type, provider) -> List[Tuple[str, str]]:
+    keys = [FLEET_KEY]
+    if resource_type is not None:
+        keys.append(("resource_type", resource_type.value))
+    if provider is not None:
+        keys.append(("provider", provider.value))
+    return keys
+
+class _AggregateDeltas:
+    """
+    Accumulates signed changes to fleet aggregates before they are written.
+    """
+
+    def __init__(self):
+        # key -> [resource_count, monthly_cost, potential_savings, recommendation_count]
+        self.deltas = defaultdict(lambda: [0, 0.0, 0.0, 0])
+
+    def add_resource(self, resource_type, provider, monthly_cost: float, sign: int) -> None:
+        for key in _aggregate_keys(resource_type, provider):
+            self.deltas[key][0] += sign
+            self.deltas[key][1] += sign * monthly_cost
+
+    def add_recommendations(self, rows: Iterable[Recommendation], sign: int) -> None:
+        for row in rows:
+            if row.status != RecommendationStatus.ACTIVE or row.recommendation_type not in RESOURCE_RULE_TYPES:
+                continue
+            for key in _aggregate_keys(row.resource_type, row.provider):
+                self.deltas[key][2] += sign * row.estimated_savings
+                self.deltas[key][3] += sign
+
+    def apply(self, db: Session, include_resources: bool = True) -> None:
+        for key, (count, cost, savings, rec_count) in self.deltas.items():
+            if not include_resources:
+                count, cost = 0, 0.0
+            if not (count or cost or savings or rec_count):
+                continue
+            aggregate = db.get(FleetAggregate, key)
+            if aggregate is None:
+                aggregate = FleetAggregate(
+                    dimension=key[0], key=key[1], resource_count=0,
+                    monthly_cost=0.0, potential_savings=0.0, recommendation_count=0,
+                )
+                db.add(aggregate)
+            aggregate.resource_count += count
+            aggregate.monthly_cost += cost
+            aggregate.potential_savings += savings
+            aggregate.recommendation_count += rec_count
+
+class RecommendationStore:
+    """
+    Maintains the persisted ``recommendations`` table incrementally.
+
+    Only the resources touched by a write are re-evaluated, and a row's version
+    is bumped only when its content or status changes, so a delta sync costs
+    work proportional to the number of changes rather than the fleet size.
+    Fleet totals in ``fleet_aggregates`` are adjusted by the same deltas.
+    """
+
+    def __init__(self, optimization_service: OptimizationService = None):
+        self.optimization_service = optimization_service or OptimizationService()
+
+    @traced()
+    def refresh(self, db: Session, resource_ids: Set[int], version: int,
+                plan: RulePlan = None, include_resources: bool = True) -> None:
+        """
+        Re-evaluate the given resources and reconcile their recommendation rows.
+        Ids that no longer exist or were decommissioned have all of their
+        recommendations resolved and leave the fleet totals. Without
+        ``include_resources`` the resources are known to be unchanged and only
+        the recommendation totals are adjusted.
+        """
+        preimages = resource_events.get_preimages(db)
+        plan = plan or get_rule_plan(db)
+        deltas = _AggregateDeltas()
+        unknown_preimages = False
+
+        for chunk in _chunks(sorted(resource_ids)):
+            resources = db.query(CloudResource).filter(CloudResource.id.in_(chunk), ACTIVE_RESOURCES).all()
+            existing = db.query(Recommendation).filter(Recommendation.resource_id.in_(chunk)).all()
+            deltas.add_recommendations(existing, -1)
+
+            current: Dict[Tuple[int, str], Recommendation] = {
+                (row.resource_id, row.recommendation_type): row for row in existing
+            }
+            seen = set()
+            rows = list(existing)
+
+            for resource in resources:
+                thresholds = plan.thresholds(resource.resource_type, resource.provider)
+                for rec in self.optimization_service._analyze_single_resource(resource, thresholds):
+                    key = (resource.id, rec.recommendation_type)
+                    seen.add(key)
+                    row = self._upsert(db, current.get(key), resource, rec, version)
+                    if key not in current:
+                        rows.append(row)
+
+            resources_by_id = {resource.id: resource for resource in resources}
+            for key, row in current.items():
+                if key in seen or row.status == RecommendationStatus.RESOLVED:
+                    continue
+                # Fleet-level types are owned by their own passes while the
+                # resource exists, unless it no longer qualifies for them.
+                resource = resources_by_id.get(row.resource_id)
+                if resource is not None and row.recommendation_type not in RESOURCE_RULE_TYPES and not (
+                        row.recommendation_type == CONSOLIDATE_TYPE and not is_consolidation_candidate(
+                            resource, plan.thresholds(resource.resource_type, resource.provider))):
+                    continue
+                row.status = RecommendationStatus.RESOLVED
+                row.version = version
+
+            deltas.add_recommendations(rows, 1)
+            if not include_resources:
+                continue
+
+            for resource_id in chunk:
+                if resource_id not in preimages:
+                    unknown_preimages = True
+                    continue
+                old = preimages[resource_id]
+                if old is not None and old.lifecycle_state == ResourceLifecycleState.ACTIVE:
+                    deltas.add_resource(old.resource_type, old.provider, old.monthly_cost, -1)
+                new = resources_by_id.get(resource_id)
+                if new is not None:
+                    deltas.add_resource(new.resource_type, new.provider, new.monthly_cost, 1)
+
+        deltas.apply(db, include_resources=include_resources and not unknown_preimages)
+        if unknown_preimages:
+            # Writes that bypassed the ORM without pre-images: recount resources.
+            self._recount_resources(db)
+        _notify_refreshed(db, resource_ids)
+
+    @traced()
+    def sync_type(self, db: Session, recommendation_type: str,
+                  recommendations: List[OptimizationRecommendation]) -> int:
+        """
+        Make ``recommendations`` the complete set of active recommendations of
+        a fleet-level type, such as the output of a consolidation pass. Rows
+        that are no longer recommended are resolved. The data version is only
+        bumped if something changed; returns the number of rows changed.
+        """
+        existing = {
+            row.resource_id: row
+            for row in db.query(Recommendation).filter(Recommendation.recommendation_type == recommendation_type)
+        }
+        resources = {}
+        for chunk in _chunks(sorted({rec.resource_id for rec in recommendations})):
+            for row in db.execute(
+                select(CloudResource.id, CloudResource.resource_type, CloudResource.provider)
+                .where(CloudResource.id.in_(chunk), ACTIVE_RESOURCES)
+            ):
+                resources[row.id] = _ResourceKey(*row)
+        wanted = {rec.resource_id: rec for rec in recommendations if rec.resource_id in resources}
+
+        changed = [
+            resource_id for resource_id, rec in wanted.items()
+            if self._differs(existing.get(resource_id), resources[resource_id], rec)
+        ]
+        stale = [
+            row for resource_id, row in existing.items()
+            if resource_id not in wanted and row.status == RecommendationStatus.ACTIVE
+        ]
+        if not changed and not stale:
+            return 0
+
+        version = resource_events.next_data_version(db)
+        deltas = _AggregateDeltas()
+        before = [existing[resource_id] for resource_id in changed if resource_id in existing] + stale
+        deltas.add_recommendations(before, -1)
+        after = [
+            self._upsert(db, existing.get(resource_id), resources[resource_id], wanted[resource_id], version)
+            for resource_id in changed
+        ]
+        for row in stale:
+            row.status = RecommendationStatus.RESOLVED
+            row.version = version
+        deltas.add_recommendations(after + stale, 1)
+        deltas.apply(db)
+        _notify_refreshed(db, set(changed) | {row.resource_id for row in stale})
+        db.info[COMMITTED_VERSION_KEY] = version
+        return len(changed) + len(stale)
+
+    @traced()
+    def reevaluate(self, db: Session, cells: List[Cell], plan: RulePlan = None) -> Tuple[int, int]:
+        """
+        Re-run the per-resource rules for the active resources of the given
+        (resource type, provider) cells, e.g. after their thresholds changed.
+        The data version is only bumped if a recommendation changed. Returns
+        the number of resources evaluated and of recommendations changed.
+        """
+        if not cells:
+            return 0, 0
+        resource_ids = set(db.execute(
+            select(CloudResource.id).where(ACTIVE_RESOURCES, or_(*(
+                and_(CloudResource.resource_type == resource_type, CloudResource.provider == provider)
+                for resource_type, provider in cells
+            )))
+        ).scalars())
+        if not resource_ids:
+            return 0, 0
+
+        savepoint = db.begin_nested()
+        version = resource_events.next_data_version(db)
+        self.refresh(db, resource_ids, version, plan=plan, include_resources=False)
+        db.flush()
+        changed = db.execute(
+            select(func.count()).select_from(Recommendation).where(Recommendation.version == version)
+        ).scalar()
+        if changed:
+            savepoint.commit()
+            db.info[COMMITTED_VERSION_KEY] = version
+        else:
+            # Nothing to report to sync clients, so keep cached results valid.
+            savepoint.rollback()
+        return len(resource_ids), changed
+
+    def rebuild(self, db: Session) -> int:
+        """
+        Re-evaluate every resource from scratch. Used to backfill the tables.
+        """
+        version = resource_events.next_data_version(db)
+        resource_ids = set(db.execute(select(CloudResource.id)).scalars())
+        resource_ids.update(db.execute(select(Recommendation.resource_id)).scalars())
+        self.refresh(db, resource_ids, version)
+        self.rebuild_aggregates(db)
+        return version
+
+    def rebuild_aggregates(self, db: Session) -> None:
+        """
+        Recompute every fleet aggregate from the base tables.
+        """
+        db.flush()
+        db.execute(delete(FleetAggregate))
+        self._recount_resources(db)
+        deltas = _AggregateDeltas()
+        rows = db.execute(
+            select(
+                Recommendation.resource_type,
+                Recommendation.provider,
+                func.count(Recommendation.id),
+                func.coalesce(func.sum(Recommendation.estimated_savings), 0.0),
+            )
+            .where(Recommendation.status == RecommendationStatus.ACTIVE,
+                   Recommendation.recommendation_type.in_(RESOURCE_RULE_TYPES))
+            .group_by(Recommendation.resource_type, Recommendation.provider)
+        ).all()
+        for resource_type, provider, rec_count, savings in rows:
+            for key in _aggregate_keys(resource_type, provider):
+                deltas.deltas[key][2] += savings
+                deltas.deltas[key][3] += rec_count
+        deltas.apply(db, include_resources=False)
+
+    def ensure_initialized(self, db: Session) -> None:
+        """
+        Backfill the tables on first start against an existing database.
+        """
+        if db.get(DataVersion, 1) is None:
+            self.rebuild(db)
+            db.commit()
+        elif db.get(FleetAggregate, FLEET_KEY) is None:
+            self.rebuild_aggregates(db)
+            db.commit()
+
+    @traced()
+    def get_summary(self, db: Session) -> OptimizationSummary:
+        """
+        Build the optimization summary from the persisted recommendations and
+        fleet aggregates without re-analyzing any resource.
+        """
+        fleet = db.get(FleetAggregate, FLEET_KEY)
+        rows = (
+            db.query(Recommendation)
+            .filter(Recommendation.status == RecommendationStatus.ACTIVE)
+            .order_by(Recommendation.resource_id, Recommendation.recommendation_type)
+            .all()
+        )
+        total_cost = fleet.monthly_cost if fleet else 0.0
+        total_savings = fleet.potential_savings if fleet else 0.0
+        savings_percentage = (total_savings / total_cost * 100) if total_cost > 0 else 0
+
+        return OptimizationSummary(
+            total_resources=fleet.resource_count if fleet else 0,
+            total_monthly_cost=round(total_cost, 2),
+            total_potential_savings=round(total_savings, 2),
+            recommendations=[self._to_schema(row) for row in rows],
+            savings_percentage=round(savings_percentage, 2)
+        )
+
+    @traced()
+    def get_top(self, db: Session, k: int, by: str = "estimated_savings",
+                recommendation_type: str = None, provider=None) -> List[OptimizationRecommendation]:
+        """
+        Return the k active recommendations with the largest ``by`` value.
+
+        The ORDER BY ... LIMIT runs in the database against a (status, column)
+        index, so only k rows are ever hydrated regardless of fleet size.
+        """
+        column = TOP_K_COLUMNS[by]
+        query = db.query(Recommendation).filter(Recommendation.status == RecommendationStatus.ACTIVE)
+        if recommendation_type:
+            query = query.filter(Recommendation.recommendation_type == recommendation_type)
+        if provider:
+            query = query.filter(Recommendation.provider == provider)
+        rows = query.order_by(column.desc(), Recommendation.id).limit(k).all()
+        return [self._to_schema(row) for row in rows]
+
+    @traced()
+    def get_cost_summary(self, db: Session) -> Dict:
+        """
+        Return cost totals by type and provider with optimization potential,
+        read entirely from the running aggregates.
+        """
+        aggregates = db.query(FleetAggregate).filter(FleetAggregate.resource_count > 0).all()
+        fleet = db.get(FleetAggregate, FLEET_KEY)
+        by_dimension = {"resource_type": {}, "provider": {}}
+        for aggregate in aggregates:
+            if aggregate.dimension in by_dimension:
+                by_dimension[aggregate.dimension][aggregate.key] = {
+                    "count": aggregate.resource_count,
+                    "cost": round(aggregate.monthly_cost, 2),
+                }
+
+        total_cost = fleet.monthly_cost if fleet else 0.0
+        total_savings = fleet.potential_savings if fleet else 0.0
+        savings_percentage = (total_savings / total_cost * 100) if total_cost > 0 else 0
+
+        return {
+            "total_monthly_cost": round(total_cost, 2),
+            "total_resources": fleet.resource_count if fleet else 0,
+            "cost_by_type": by_dimension["resource_type"],
+            "cost_by_provider": by_dimension["provider"],
+            "optimization_potential": {
+                "potential_savings": round(total_savings, 2),
+                "savings_percentage": round(savings_percentage, 2),
+                "recommendations_count": fleet.recommendation_count if fleet else 0
+            }
+        }
+
+    @traced()
+    def get_changes_since(self, db: Session, since_version: int) -> RecommendationDelta:
+        """
+        Return recommendations created, changed or resolved after ``since_version``.
+        """
+        current_version = resource_events.get_data_version(db)
+        rows = (
+            db.query(Recommendation)
+            .filter(Recommendation.version > since_version)
+            .order_by(Recommendation.version, Recommendation.id)
+            .all()
+        )
+
+        changes = []
+        for row in rows:
+            if row.status == RecommendationStatus.RESOLVED:
+                change_type = "resolved"
+            elif row.created_version > since_version:
+                change_type = "created"
+            else:
+                change_type = "changed"
+            changes.append(
+                RecommendationChange(
+                    **self._to_schema(row).model_dump(),
+                    change_type=change_type,
+                    status=row.status.value,
+                    version=row.version,
+                )
+            )
+
+        return RecommendationDelta(
+            since_version=since_version,
+            current_version=current_version,
+            changes=changes,
+        )
+
+    def _recount_resources(self, db: Session) -> None:
+        db.flush()
+        counts = db.execute(
+            select(
+                CloudResource.resource_type,
+                CloudResource.provider,
+                func.count(CloudResource.id),
+                func.coalesce(func.sum(CloudResource.monthly_cost), 0.0),
+            ).where(ACTIVE_RESOURCES).group_by(CloudResource.resource_type, CloudResource.provider)
+        ).all()
+        for aggregate in db.query(FleetAggregate).all():
+            aggregate.resource_count = 0
+            aggregate.monthly_cost = 0.0
+        deltas = _AggregateDeltas()
+        for resource_type, provider, count, cost in counts:
+            for key in _aggregate_keys(resource_type, provider):
+                deltas.deltas[key][0] += count
+                deltas.deltas[key][1] += cost
+        deltas.apply(db)
+        # New aggregate rows must be visible to db.get() in later passes.
+        db.flush()
+
+    def _to_schema(self, row: Recommendation) -> OptimizationRecommendation:
+        return OptimizationRecommendation(
+            resource_id=row.resource_id,
+            resource_name=row.resource_name,
+            current_cost=row.current_cost,
+            recommendation_type=row.recommendation_type,
+            description=row.description,
+            recommended_action=row.recommended_action,
+            estimated_savings=row.estimated_savings,
+            confidence_level=row.confidence_level,
+        )
+
+    def _differs(self, row: Recommendation, resource, rec: OptimizationRecommendation) -> bool:
+        return (
+            row is None
+            or row.status == RecommendationStatus.RESOLVED
+            or row.resource_type != resource.resource_type
+            or row.provider != resource.provider
+            or any(getattr(row, field) != getattr(rec, field) for field in _TRACKED_FIELDS)
+        )
+
+    def _upsert(self, db: Session, row: Recommendation, resource: CloudResource,
+                rec: OptimizationRecommendation, version: int) -> Recommendation:
+        values = {field: getattr(rec, field) for field in _TRACKED_FIELDS}
+
+        if row is None:
+            row = Recommendation(
+                resource_id=resource.id,
+                recommendation_type=rec.recommendation_type,
+                resource_type=resource.resource_type,
+                provider=resource.provider,
+                status=RecommendationStatus.ACTIVE,
+                created_version=version,
+                version=version,
+                **values,
+            )
+            db.add(row)
+            return row
+
+        changed = any(getattr(row, field) != value for field, value in values.items())
+        if row.status == RecommendationStatus.RESOLVED:
+            # A recommendation that comes back is new again for sync clients.
+            row.status = RecommendationStatus.ACTIVE
+            row.created_version = version
+            changed = True
+        if row.resource_type != resource.resource_type or row.provider != resource.provider:
+            row.resource_type = resource.resource_type
+            row.provider = resource.provider
+            changed = True
+
+        if changed:
+            for field, value in values.items():
+                setattr(row, field, value)
+            row.version = version
+        return row
+
+def _refresh_recommendations(db: Session, resource_ids: Set[int], version: int) -> None:
+    RecommendationStore().refresh(db, resource_ids, version)
+
+resource_events.register_handler(_refresh_recommendations)
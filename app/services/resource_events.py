@@ -0,0 +1,164 @@
+"""
+Change tracking for writes to cloud resources.
+
+Session listeners collect the ids of CloudResource rows inserted, updated or
+deleted while a transaction is open. Right before the transaction commits the
+data version is bumped once and every registered handler is called with the
+touched ids, so derived tables are maintained in the same transaction as the
+write that invalidated them.
+
+Alongside the ids, the listeners remember each resource's state as of the
+start of the transaction (its "pre-image") so handlers can maintain running
+aggregates by subtracting the old contribution and adding the new one.
+"""
+
+from collections import namedtuple
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from sqlalchemy import event, select, update, insert, inspect
+from sqlalchemy.orm import Session
+from app.database import COMMITTED_VERSION_KEY
+from app.models.cloud_resource import CloudResource
+from app.models.data_version import DataVersion
+
+ResourceWriteHandler = Callable[[Session, Set[int], int], None]
+
+# Committed state of a resource before the current transaction; None for inserts.
+ResourceImage = namedtuple("ResourceImage", ["resource_type", "provider", "monthly_cost", "lifecycle_state",
+                                             "cpu_utilization", "memory_utilization"])
+
+_TOUCHED_KEY = "touched_resource_ids"
+_PREIMAGES_KEY = "resource_preimages"
+_DISPATCHING_KEY = "dispatching_preimages"
+_handlers: List[ResourceWriteHandler] = []
+
+def register_handler(handler: ResourceWriteHandler) -> ResourceWriteHandler:
+    """
+    Register a callable invoked as ``handler(session, resource_ids, version)``
+    before a transaction that touched cloud resources commits.
+    """
+    if handler not in _handlers:
+        _handlers.append(handler)
+    return handler
+
+def mark_touched(session: Session, resource_ids: Iterable[int],
+                 preimages: Optional[Dict[int, Optional[ResourceImage]]] = None) -> None:
+    """
+    Record resource ids written outside the ORM unit of work (e.g. Core bulk
+    statements) so that handlers still see them on commit. Callers that know
+    the prior state of those rows should pass it as ``preimages``.
+    """
+    session.info.setdefault(_TOUCHED_KEY, set()).update(resource_ids)
+    if preimages:
+        known = session.info.setdefault(_PREIMAGES_KEY, {})
+        for resource_id, image in preimages.items():
+            known.setdefault(resource_id, image)
+
+def get_preimages(session: Session) -> Dict[int, Optional[ResourceImage]]:
+    """
+    Return pre-images for the resources being dispatched to handlers.
+    Touched ids missing from the mapping have an unknown prior state.
+    """
+    return session.info.get(_DISPATCHING_KEY, {})
+
+def get_data_version(db: Session) -> int:
+    """
+    Return the current data version, or 0 if nothing has been written yet.
+    """
+    version = db.execute(select(DataVersion.version).where(DataVersion.id == 1)).scalar()
+    return version or 0
+
+def last_committed_version(db: Session):
+    """
+    Return the data version produced by the last commit of this session, if any.
+    """
+    return db.info.get(COMMITTED_VERSION_KEY)
+
+def next_data_version(db: Session) -> int:
+    """
+    Increment and return the data version.
+
+    The UPDATE takes a row lock on the counter, which serializes concurrent
+    writers so versions are handed out in commit order.
+    """
+    version = db.execute(
+        update(DataVersion).where(DataVersion.id == 1)
+        .values(version=DataVersion.version + 1)
+        .returning(DataVersion.version)
+    ).scalar()
+    if version is None:
+        version = 1
+        db.execute(insert(DataVersion).values(id=1, version=version))
+    return version
+
+def _committed_image(obj: CloudResource) -> Optional[ResourceImage]:
+    """
+    Prior state from attribute history, or None if an attribute was assigned
+    while expired and its old value was never loaded.
+    """
+    state = inspect(obj)
+    values = []
+    for field in ResourceImage._fields:
+        history = state.attrs[field].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.added:
+            return None
+        else:
+            values.append(getattr(obj, field))
+    return ResourceImage(*values)
+
+@event.listens_for(Session, "before_flush")
+def _capture_preimages(session, flush_context, instances):
+    images = session.info.setdefault(_PREIMAGES_KEY, {})
+    unloaded = []
+    for obj in chain(session.dirty, session.deleted):
+        if isinstance(obj, CloudResource) and obj.id is not None and obj.id not in images:
+            image = _committed_image(obj)
+            if image is None:
+                unloaded.append(obj.id)
+            else:
+                images[obj.id] = image
+    if unloaded:
+        # Nothing has been flushed for these rows yet, so the table still
+        # holds their committed state.
+        rows = session.connection().execute(
+            select(CloudResource.id, *(getattr(CloudResource, f) for f in ResourceImage._fields))
+            .where(CloudResource.id.in_(unloaded))
+        )
+        for resource_id, *values in rows:
+            images[resource_id] = ResourceImage(*values)
+
+@event.listens_for(Session, "after_flush")
+def _collect_touched_resources(session, flush_context):
+    touched = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, CloudResource) and obj.id is not None:
+            touched.add(obj.id)
+    if touched:
+        images = session.info.setdefault(_PREIMAGES_KEY, {})
+        for obj in session.new:
+            if isinstance(obj, CloudResource):
+                images.setdefault(obj.id, None)
+        mark_touched(session, touched)
+
+@event.listens_for(Session, "before_commit")
+def _dispatch_resource_writes(session):
+    session.flush()
+    # Handlers may write resources themselves; keep going until quiescent.
+    while session.info.get(_TOUCHED_KEY):
+        touched = session.info.pop(_TOUCHED_KEY)
+        session.info[_DISPATCHING_KEY] = session.info.pop(_PREIMAGES_KEY, {})
+        version = next_data_version(session)
+        try:
+            for handler in _handlers:
+                handler(session, touched, version)
+            session.flush()
+        finally:
+            session.info.pop(_DISPATCHING_KEY, None)
+        session.info[COMMITTED_VERSION_KEY] = version
+
+@event.listens_for(Session, "after_rollback")
+def _discard_touched_resources(session):
+    session.info.pop(_TOUCHED_KEY, None)
+    session.info.pop(_PREIMAGES_KEY, None)
@@ -0,0 +1,60 @@
+"""
+Filters and sort orders for resource listings.
+
+Health filters and ``sort=health`` read the stored ``health_score`` and
+``health_status`` columns through their (status, score, id) and (score, id)
+indexes, so they never evaluate the health rules per row. Those indexes only
+cover active resources, which is what listings return unless asked otherwise.
+"""
+
+from typing import List, Optional, Tuple
+from app.models.cloud_resource import CloudResource, ACTIVE_RESOURCES, DECOMMISSIONED_RESOURCES
+
+HEALTH_STATUSES = ("optimal", "over-provisioned", "under-provisioned")
+
+LIFECYCLE_FILTERS = {
+    "active": ACTIVE_RESOURCES,
+    "decommissioned": DECOMMISSIONED_RESOURCES,
+    "all": None,
+}
+
+SORT_COLUMNS = {
+    "id": CloudResource.id,
+    "health": CloudResource.health_score,
+    "monthly_cost": CloudResource.monthly_cost,
+}
+
+def resource_clauses(min_health: Optional[int] = None, max_health: Optional[int] = None,
+                     health_status: Optional[str] = None, sort: Optional[str] = None,
+                     lifecycle_state: str = "active") -> Tuple[List, List]:
+    """
+    Build the WHERE and ORDER BY clauses of a resource listing. ``sort`` is
+    a key of SORT_COLUMNS, prefixed with ``-`` for descending order; ties
+    are broken by id. ``lifecycle_state`` is a key of LIFECYCLE_FILTERS.
+    Raises ValueError for invalid combinations.
+    """
+    if lifecycle_state not in LIFECYCLE_FILTERS:
+        raise ValueError(f"Unknown lifecycle state '{lifecycle_state}'. Choose one of: {', '.join(LIFECYCLE_FILTERS)}")
+    where = [] if LIFECYCLE_FILTERS[lifecycle_state] is None else [LIFECYCLE_FILTERS[lifecycle_state]]
+    if min_health is not None and max_health is not None and min_health > max_health:
+        raise ValueError("min_health must not exceed max_health")
+    if min_health is not None:
+        where.append(CloudResource.health_score >= min_health)
+    if max_health is not None:
+        where.append(CloudResource.health_score <= max_health)
+    if health_status is not None:
+        if health_status not in HEALTH_STATUSES:
+            raise ValueError(f"Unknown status '{health_status}'. Choose one of: {', '.join(HEALTH_STATUSES)}")
+        where.append(CloudResource.health_status == health_status)
+
+    order_by = []
+    if sort is not None:
+        descending = sort.startswith("-")
+        column = SORT_COLUMNS.get(sort.lstrip("-"))
+        if column is None:
+            raise ValueError(f"Cannot sort by '{sort}'. Choose one of: {', '.join(SORT_COLUMNS)}, "
+                             f"optionally prefixed with '-'")
+        order_by = [column.desc(), CloudResource.id.desc()] if descending else [column, CloudResource.id]
+        if column is CloudResource.id:
+            order_by = order_by[:1]
+    return where, order_by
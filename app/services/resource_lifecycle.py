@@ -0,0 +1,88 @@
+"""
+Decommissioning and archival of cloud resources.
+
+Decommissioning is a soft delete: the row stays in ``cloud_resources`` with
+``lifecycle_state`` set, so it can still be looked up, but every derived
+table treats it as gone (the write handlers only read active rows) and hot
+queries skip it through the partial indexes on active resources.
+
+Rows decommissioned for longer than ``RESOURCE_ARCHIVE_AFTER_DAYS`` are moved
+to ``cloud_resources_archive`` by a periodic job, in chunks, with an
+``INSERT ... SELECT`` followed by a ``DELETE`` in the same transaction, so
+the live table only ever holds recently decommissioned rows.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import delete, insert, literal, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.archived_resource import ArchivedResource
+from app.models.cloud_resource import CloudResource, ResourceLifecycleState, DECOMMISSIONED_RESOURCES
+from app.services import resource_events
+
+_CHUNK_SIZE = 500
+
+# Columns copied verbatim into the archive.
+_ARCHIVED_COLUMNS = ("id", "name", "resource_type", "provider", "instance_type", "region", "size",
+                     "cpu_utilization", "memory_utilization", "storage_usage", "monthly_cost", "tags",
+                     "created_at", "updated_at", "decommissioned_at")
+
+class ResourceLifecycleService:
+    """Soft-deletes resources and archives them once they are old enough."""
+
+    def decommission(self, db: Session, resource_id: int, now: Optional[datetime] = None) -> CloudResource:
+        """
+        Mark a resource decommissioned. Decommissioning an already
+        decommissioned resource keeps its original timestamp. Raises
+        LookupError for unknown resources.
+        """
+        resource = db.get(CloudResource, resource_id)
+        if resource is None:
+            raise LookupError(f"Resource with ID {resource_id} not found")
+        if resource.lifecycle_state != ResourceLifecycleState.DECOMMISSIONED:
+            resource.lifecycle_state = ResourceLifecycleState.DECOMMISSIONED
+            resource.decommissioned_at = now or datetime.now(timezone.utc)
+            db.commit()
+            db.refresh(resource)
+        return resource
+
+    def archive(self, db: Session, now: Optional[datetime] = None) -> int:
+        """
+        Move resources decommissioned before the retention cutoff into the
+        archive table. Returns the number of resources archived.
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=settings.RESOURCE_ARCHIVE_AFTER_DAYS)
+        candidates = (
+            select(CloudResource.id, CloudResource.resource_type, CloudResource.provider,
+                   CloudResource.monthly_cost, CloudResource.lifecycle_state,
+                   CloudResource.cpu_utilization, CloudResource.memory_utilization)
+            .where(DECOMMISSIONED_RESOURCES, CloudResource.decommissioned_at < cutoff)
+            .order_by(CloudResource.decommissioned_at)
+            .limit(_CHUNK_SIZE)
+        )
+        columns = [getattr(CloudResource, name) for name in _ARCHIVED_COLUMNS]
+        archived_at = literal(now, ArchivedResource.archived_at.type)
+        archived = 0
+        while True:
+            rows = db.execute(candidates).all()
+            if not rows:
+                break
+            ids = [row.id for row in rows]
+            db.execute(
+                insert(ArchivedResource).from_select(
+                    [*_ARCHIVED_COLUMNS, "archived_at"],
+                    select(*columns, archived_at).where(CloudResource.id.in_(ids)),
+                )
+            )
+            db.execute(delete(CloudResource).where(CloudResource.id.in_(ids)))
+            resource_events.mark_touched(db, ids, {
+                row.id: resource_events.ResourceImage(row.resource_type, row.provider, row.monthly_cost,
+                                                      row.lifecycle_state, row.cpu_utilization,
+                                                      row.memory_utilization)
+                for row in rows
+            })
+            db.commit()
+            archived += len(ids)
+        return archived
@@ -0,0 +1,55 @@
+"""
+Sparse fieldsets for resource listings.
+
+``?fields=name,monthly_cost`` selects only those columns in SQL and
+serializes them through a response model that declares only those fields,
+so both the rows read and the payload shrink with the projection. Models
+and their list adapters are built once per distinct field set.
+"""
+
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple, Type
+from pydantic import BaseModel, TypeAdapter, create_model
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.cloud_resource import CloudResource
+from app.schemas import CloudResourceResponse
+
+RESOURCE_FIELDS = tuple(CloudResourceResponse.model_fields)
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Split a comma-separated ``fields`` parameter into a tuple of known field
+    names, keeping the requested order and dropping duplicates. Returns None
+    when no projection was requested; raises ValueError for unknown fields.
+    """
+    if fields is None:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    if not names:
+        raise ValueError("fields must name at least one field")
+    unknown = [name for name in names if name not in CloudResourceResponse.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Choose from: {', '.join(RESOURCE_FIELDS)}")
+    return names
+
+@lru_cache(maxsize=128)
+def projection_model(names: Tuple[str, ...]) -> Type[BaseModel]:
+    """Response model with only ``names``, reusing each field's declaration."""
+    definitions = {
+        name: (CloudResourceResponse.model_fields[name].annotation, CloudResourceResponse.model_fields[name])
+        for name in names
+    }
+    return create_model("CloudResourceProjection", **definitions)
+
+@lru_cache(maxsize=128)
+def _list_adapter(names: Tuple[str, ...]) -> TypeAdapter:
+    return TypeAdapter(List[projection_model(names)])
+
+def load_projected_resources(db: Session, names: Tuple[str, ...], where: Sequence = (),
+                             order_by: Sequence = ()) -> bytes:
+    """Select only the requested columns and return the JSON list payload."""
+    columns = [getattr(CloudResource, name) for name in names]
+    rows = db.execute(select(*columns).where(*where).order_by(*order_by)).all()
+    payload = [dict(zip(names, row)) for row in rows]
+    return _list_adapter(names).dump_json(_list_adapter(names).validate_python(payload))
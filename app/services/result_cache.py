@@ -0,0 +1,186 @@
+"""
+Result cache shared by every worker process on a host.
+
+Serialized responses are kept in a memory-mapped file under /dev/shm, split
+into fixed-size slots. A slot holds one result, identified by a digest of
+its key and the data version it was computed at, so entries go stale by
+themselves as soon as a write bumps the version. Each slot is guarded by a
+byte-range ``fcntl`` lock: the first worker to miss computes the result
+while holding the slot exclusively, and the others block on the same lock
+and then read what it wrote instead of repeating the work. ``fcntl`` locks
+belong to the process, so threads of one worker also take a per-slot thread
+lock; a slow computation holds up only the keys that share its slot.
+
+Where ``fcntl`` is unavailable (Windows) each process keeps a small local
+cache instead.
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import ExitStack
+from typing import Callable, Optional
+from app.config import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"COCACHE1"
+_HEADER = struct.Struct("<8sII")  # magic, slot count, slot size
+_SLOT_HEADER = struct.Struct("<16sqI")  # key digest, data version, payload length
+_HEADER_SIZE = 64
+
+def default_cache_path() -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"cloud-optimization-cache-{settings.API_PORT}")
+
+def _digest(key: str) -> bytes:
+    # The database URL is part of the key so a cache file never serves
+    # results computed against another database.
+    return hashlib.blake2b(f"{settings.DATABASE_URL}\0{key}".encode(), digest_size=16).digest()
+
+class SharedResultCache:
+    """
+    Fixed-slot cache in a memory-mapped file shared between processes.
+    """
+
+    def __init__(self, path: str, size_mb: int, slots: int):
+        self.path = path
+        self.slots = slots
+        self.slot_size = (size_mb * 1024 * 1024) // slots
+        size = _HEADER_SIZE + self.slots * self.slot_size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        # Serializes threads of this process per slot; fcntl locks only separate processes.
+        self._slot_locks = [threading.Lock() for _ in range(self.slots)]
+
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, _HEADER_SIZE, 0)
+        try:
+            header = os.pread(self._fd, _HEADER.size, 0)
+            if len(header) < _HEADER.size or _HEADER.unpack(header) != (_MAGIC, self.slots, self.slot_size):
+                # New file or a different layout: start over.
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, self.slots, self.slot_size), 0)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, _HEADER_SIZE, 0)
+        self._map = mmap.mmap(self._fd, size)
+
+    def get_or_compute(self, key: str, version: int, compute: Callable[[], bytes]) -> bytes:
+        """
+        Return the cached result for ``key`` at ``version``, computing and
+        storing it if no worker has done so yet.
+        """
+        digest = _digest(key)
+        slot = int.from_bytes(digest[:8], "little") % self.slots
+        offset = _HEADER_SIZE + slot * self.slot_size
+
+        with self._slot_locks[slot]:
+            fcntl.lockf(self._fd, fcntl.LOCK_SH, 1, offset)
+            try:
+                cached = self._read(offset, digest, version)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+            if cached is not None:
+                return cached
+
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, offset)
+            try:
+                # Another worker may have filled the slot while we waited.
+                cached = self._read(offset, digest, version)
+                if cached is not None:
+                    return cached
+                result = compute()
+                self._write(offset, digest, version, result)
+                return result
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+
+    def clear(self) -> None:
+        # Slot locks are taken in order, so this cannot deadlock with a lookup.
+        with ExitStack() as stack:
+            for lock in self._slot_locks:
+                stack.enter_context(lock)
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.slots * self.slot_size, _HEADER_SIZE)
+            try:
+                for slot in range(self.slots):
+                    offset = _HEADER_SIZE + slot * self.slot_size
+                    self._map[offset:offset + _SLOT_HEADER.size] = bytes(_SLOT_HEADER.size)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.slots * self.slot_size, _HEADER_SIZE)
+
+    def _read(self, offset: int, digest: bytes, version: int) -> Optional[bytes]:
+        stored_digest, stored_version, length = _SLOT_HEADER.unpack_from(self._map, offset)
+        if stored_digest != digest or stored_version != version or not length:
+            return None
+        start = offset + _SLOT_HEADER.size
+        return zlib.decompress(self._map[start:start + length])
+
+    def _write(self, offset: int, digest: bytes, version: int, result: bytes) -> None:
+        payload = zlib.compress(result, 1)
+        if _SLOT_HEADER.size + len(payload) > self.slot_size:
+            logger.debug(f"Result of {len(payload)} bytes does not fit a cache slot; not cached")
+            return
+        start = offset + _SLOT_HEADER.size
+        self._map[start:start + len(payload)] = payload
+        _SLOT_HEADER.pack_into(self._map, offset, digest, version, len(payload))
+
+class LocalResultCache:
+    """
+    Per-process fallback with the same interface, bounded to ``slots`` entries.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: str, version: int, compute: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+        # Computed without the lock so a slow key does not block the others;
+        # concurrent misses on the same key may each compute it.
+        result = compute()
+        with self._lock:
+            self._entries[key] = (version, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.slots:
+                self._entries.popitem(last=False)
+            return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+_cache = None
+_cache_pid = None
+
+def get_result_cache():
+    """
+    The cache for this process, opened on first use and reopened after a fork.
+    """
+    global _cache, _cache_pid
+    if _cache is None or _cache_pid != os.getpid():
+        path = settings.RESULT_CACHE_PATH or default_cache_path()
+        if fcntl is None or not settings.RESULT_CACHE_MB:
+            _cache = LocalResultCache(settings.RESULT_CACHE_SLOTS)
+        else:
+            try:
+                _cache = SharedResultCache(path, settings.RESULT_CACHE_MB, settings.RESULT_CACHE_SLOTS)
+            except OSError as e:
+                logger.warning(f"Shared result cache unavailable at {path}, using a per-process cache: {e}")
+                _cache = LocalResultCache(settings.RESULT_CACHE_SLOTS)
+        _cache_pid = os.getpid()
+    return _cache
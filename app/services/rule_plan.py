@@ -0,0 +1,108 @@
+"""
+Optimization rule thresholds per resource type and provider.
+
+Overrides live in the ``rule_thresholds`` table and are applied over the
+settings defaults from least to most specific: fleet-wide, provider,
+resource type, then (resource type, provider). The result is compiled into
+a RulePlan holding the resolved thresholds of every (type, provider) cell,
+so evaluating a resource costs one dict lookup.
+
+Each process keeps the current plan per engine. ``get_rule_plan`` reads the
+override set's row count and revision, one aggregate over a handful of rows,
+and recompiles only when they changed. The new plan replaces the old one in
+a single assignment, so an evaluation already running keeps the plan it
+started with, and every process picks up a change the next time it
+evaluates anything.
+"""
+
+import threading
+import weakref
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.cloud_resource import ResourceType, CloudProvider
+from app.models.rule_threshold import RuleThreshold
+
+THRESHOLD_FIELDS = ("downsize_cpu", "downsize_memory", "terminate_cpu", "terminate_memory",
+                    "storage_size", "storage_rate")
+
+RuleThresholds = namedtuple("RuleThresholds", THRESHOLD_FIELDS)
+
+Cell = Tuple[ResourceType, CloudProvider]
+
+# The termination rule has no settings of its own.
+_TERMINATE_CPU = 10.0
+_TERMINATE_MEMORY = 20.0
+
+def default_thresholds() -> RuleThresholds:
+    return RuleThresholds(
+        downsize_cpu=settings.CPU_THRESHOLD,
+        downsize_memory=settings.MEMORY_THRESHOLD,
+        terminate_cpu=_TERMINATE_CPU,
+        terminate_memory=_TERMINATE_MEMORY,
+        storage_size=settings.STORAGE_SIZE_THRESHOLD,
+        storage_rate=settings.STORAGE_OPTIMIZATION_RATE,
+    )
+
+def _specificity(override: Dict) -> int:
+    return (override["provider"] is not None) + 2 * (override["resource_type"] is not None)
+
+class RulePlan:
+    """
+    Resolved thresholds for every (resource type, provider) cell.
+    """
+
+    def __init__(self, overrides: List[Dict], fingerprint: Tuple = (0, None)):
+        self.overrides = overrides
+        self.fingerprint = fingerprint
+        defaults = default_thresholds()._asdict()
+        ordered = sorted(overrides, key=_specificity)
+        self.cells: Dict[Cell, RuleThresholds] = {}
+        for resource_type in ResourceType:
+            for provider in CloudProvider:
+                values = dict(defaults)
+                for override in ordered:
+                    if override["resource_type"] in (None, resource_type) and override["provider"] in (None, provider):
+                        values.update((field, override[field]) for field in THRESHOLD_FIELDS
+                                      if override[field] is not None)
+                self.cells[(resource_type, provider)] = RuleThresholds(**values)
+
+    def thresholds(self, resource_type: ResourceType, provider: CloudProvider) -> RuleThresholds:
+        return self.cells[(resource_type, provider)]
+
+    def changed_cells(self, other: Optional["RulePlan"]) -> List[Cell]:
+        """Cells whose resolved thresholds differ from ``other``'s."""
+        return [cell for cell, thresholds in self.cells.items()
+                if other is None or other.cells[cell] != thresholds]
+
+def _fingerprint(db: Session) -> Tuple:
+    return tuple(db.execute(select(func.count(), func.max(RuleThreshold.revision))).one())
+
+def load_overrides(db: Session) -> List[Dict]:
+    return [
+        {"resource_type": row.resource_type, "provider": row.provider,
+         **{field: getattr(row, field) for field in THRESHOLD_FIELDS}}
+        for row in db.query(RuleThreshold).order_by(RuleThreshold.id)
+    ]
+
+# One plan per engine, like the other per-database caches.
+_plans = weakref.WeakKeyDictionary()
+_plans_lock = threading.Lock()
+
+def get_rule_plan(db: Session) -> RulePlan:
+    """
+    Return the plan compiled from the overrides visible to ``db``.
+    """
+    bind = db.get_bind()
+    fingerprint = _fingerprint(db)
+    plan = _plans.get(bind)
+    if plan is not None and plan.fingerprint == fingerprint:
+        return plan
+    with _plans_lock:
+        plan = _plans.get(bind)
+        if plan is None or plan.fingerprint != fingerprint:
+            plan = RulePlan(load_overrides(db), fingerprint)
+            _plans[bind] = plan
+        return plan
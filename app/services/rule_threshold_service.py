@@ -0,0 +1,75 @@
+"""
+Reading and replacing the per resource type and provider rule thresholds.
+"""
+
+import uuid
+from typing import Dict, List
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.models.data_version import DataVersion
+from app.models.rule_threshold import RuleThreshold
+from app.services.recommendation_store import RecommendationStore
+from app.services.rule_plan import THRESHOLD_FIELDS, default_thresholds, get_rule_plan
+
+class RuleThresholdService:
+    """Manages the threshold overrides and applies changes to them."""
+
+    def describe(self, db: Session) -> Dict:
+        """
+        Return the defaults, the overrides and the thresholds in effect for
+        every (resource type, provider) cell.
+        """
+        plan = get_rule_plan(db)
+        return {
+            "defaults": default_thresholds()._asdict(),
+            "overrides": [
+                {"resource_type": override["resource_type"], "provider": override["provider"],
+                 "thresholds": {field: override[field] for field in THRESHOLD_FIELDS}}
+                for override in plan.overrides
+            ],
+            "effective": [
+                {"resource_type": resource_type, "provider": provider, "thresholds": thresholds._asdict()}
+                for (resource_type, provider), thresholds in plan.cells.items()
+            ],
+        }
+
+    def replace(self, db: Session, overrides: List[Dict]) -> Dict:
+        """
+        Make ``overrides`` the complete set of threshold overrides and
+        re-evaluate the resources of the cells whose thresholds changed, in
+        one transaction. Each override is a dict with ``resource_type``,
+        ``provider`` (either may be None) and the THRESHOLD_FIELDS. Raises
+        ValueError if two overrides have the same scope.
+        """
+        scopes = set()
+        for override in overrides:
+            scope = (override["resource_type"], override["provider"])
+            if scope in scopes:
+                raise ValueError(f"More than one override for resource_type={scope[0] and scope[0].value}, "
+                                 f"provider={scope[1] and scope[1].value}")
+            scopes.add(scope)
+
+        # Queue behind resource writers on the data version row, so none of
+        # them commits a result evaluated against the thresholds being replaced.
+        db.execute(select(DataVersion.id).where(DataVersion.id == 1).with_for_update())
+        old_plan = get_rule_plan(db)
+        db.execute(delete(RuleThreshold))
+        revision = uuid.uuid4().hex
+        db.add_all(
+            RuleThreshold(revision=revision, resource_type=override["resource_type"], provider=override["provider"],
+                          **{field: override.get(field) for field in THRESHOLD_FIELDS})
+            for override in overrides
+        )
+        db.flush()
+        new_plan = get_rule_plan(db)
+        cells = new_plan.changed_cells(old_plan)
+        evaluated, changed = RecommendationStore().reevaluate(db, cells, new_plan)
+        db.commit()
+
+        result = self.describe(db)
+        result.update({
+            "changed_cells": [{"resource_type": resource_type, "provider": provider} for resource_type, provider in cells],
+            "resources_reevaluated": evaluated,
+            "recommendations_changed": changed,
+        })
+        return result
@@ -0,0 +1,153 @@
+"""
+Resource search by partial name.
+
+Matches are found through indexes only and ranked exact, then prefix, then
+substring matches, earlier and shorter matches first:
+
+* PostgreSQL: prefixes are ``lower(name) LIKE 'q%'`` on a
+  ``text_pattern_ops`` btree over ``lower(name)``; substrings of three or
+  more characters are ``LIKE '%q%'`` on a ``pg_trgm`` GIN index, which
+  cannot serve shorter patterns.
+* SQLite: prefixes are a range scan of the ``lower(name)`` index; substrings
+  of three or more characters are looked up in an FTS5 trigram table kept in
+  step by a resource write handler.
+
+Shorter queries match prefixes only. Prefix candidates are collected before
+substring candidates and at most ``SEARCH_MAX_MATCHES`` of them are ranked,
+so the cost of a query is bounded by the cap rather than by how many names
+contain it. Candidates are taken in a fixed order, so a query that hits the
+cap always keeps the same matches: prefixes by name, and substrings by match
+position, length and name on PostgreSQL or by id on SQLite.
+"""
+
+from typing import Dict, List, Set, Tuple
+from sqlalchemy import bindparam, func, select, text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.cloud_resource import CloudResource, ACTIVE_RESOURCES, NAME_SEARCH_TABLE, create_name_search_table
+from app.services import resource_events
+
+_CHUNK_SIZE = 500
+# Shortest substring the trigram index can look up.
+_MIN_TRIGRAM_QUERY = 3
+_RESULT_COLUMNS = (CloudResource.id, CloudResource.name, CloudResource.resource_type, CloudResource.provider,
+                   CloudResource.instance_type, CloudResource.region, CloudResource.monthly_cost,
+                   CloudResource.health_status)
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _rank(name: str, query: str) -> Tuple:
+    lowered = name.lower()
+    if lowered == query:
+        tier = 0
+    elif lowered.startswith(query):
+        tier = 1
+    else:
+        tier = 2
+    return tier, lowered.find(query), len(name), name
+
+def _has_name_table(db: Session) -> bool:
+    return db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": NAME_SEARCH_TABLE}
+    ).first() is not None
+
+class SearchService:
+    """Ranked, capped and paginated lookup of active resources by name."""
+
+    def search(self, db: Session, query: str, limit: int = 20, offset: int = 0) -> Dict:
+        """
+        Return one page of the resources whose name contains ``query``
+        (case-insensitive). ``total`` counts the ranked matches, which stop at
+        the cap; ``truncated`` says whether more names matched.
+        """
+        term = query.strip()
+        query = term.lower()
+        if not query:
+            raise ValueError("q must not be blank")
+        cap = settings.SEARCH_MAX_MATCHES
+
+        candidates = dict(self._prefix_matches(db, query, cap + 1))
+        if len(candidates) <= cap:
+            for resource_id, name in self._substring_matches(db, query, cap + 1 - len(candidates), candidates):
+                candidates[resource_id] = name
+        truncated = len(candidates) > cap
+
+        ranked = sorted(candidates.items(), key=lambda item: _rank(item[1], query))[:cap]
+        page_ids = [resource_id for resource_id, _ in ranked[offset:offset + limit]]
+        rows = {row.id: row for row in db.execute(select(*_RESULT_COLUMNS).where(CloudResource.id.in_(page_ids)))}
+        return {
+            "query": term,
+            "total": len(ranked),
+            "truncated": truncated,
+            "offset": offset,
+            "limit": limit,
+            "results": [dict(rows[resource_id]._mapping) for resource_id in page_ids if resource_id in rows],
+        }
+
+    def _prefix_matches(self, db: Session, query: str, limit: int) -> List[Tuple[int, str]]:
+        lowered = func.lower(CloudResource.name)
+        stmt = select(CloudResource.id, CloudResource.name).where(ACTIVE_RESOURCES)
+        if db.get_bind().dialect.name == "postgresql":
+            # The text_pattern_ops index is sorted by its own operators, so
+            # ordering by them lets it serve the ORDER BY as well.
+            stmt = (stmt.where(lowered.like(f"{_escape_like(query)}%", escape="\\"))
+                    .order_by(text("lower(cloud_resources.name) USING ~<~")))
+        else:
+            # A range on the lower(name) index; LIKE could not use it.
+            stmt = stmt.where(lowered >= query, lowered < query + "\U0010ffff").order_by(lowered)
+        return list(db.execute(stmt.limit(limit)))
+
+    def _substring_matches(self, db: Session, query: str, limit: int,
+                           exclude: Dict[int, str]) -> List[Tuple[int, str]]:
+        if limit <= 0 or len(query) < _MIN_TRIGRAM_QUERY:
+            return []
+        if db.get_bind().dialect.name == "postgresql":
+            lowered = func.lower(CloudResource.name)
+            pattern = _escape_like(query)
+            stmt = (
+                select(CloudResource.id, CloudResource.name)
+                .where(lowered.like(f"%{pattern}%", escape="\\"), ~lowered.like(f"{pattern}%", escape="\\"),
+                       ACTIVE_RESOURCES)
+                .order_by(func.strpos(lowered, query), func.length(CloudResource.name), CloudResource.name)
+                .limit(limit)
+            )
+            return list(db.execute(stmt))
+
+        if not _has_name_table(db):
+            return []
+        rows = db.execute(
+            text(f"SELECT rowid, name FROM {NAME_SEARCH_TABLE} WHERE name MATCH :phrase LIMIT :limit"),
+            {"phrase": '"' + query.replace('"', '""') + '"', "limit": limit + len(exclude)},
+        )
+        return [(resource_id, name) for resource_id, name in rows if resource_id not in exclude][:limit]
+
+    def ensure_index(self, db: Session) -> None:
+        """
+        Fill the SQLite name table for databases created before it existed.
+        """
+        if db.get_bind().dialect.name != "sqlite":
+            return
+        create_name_search_table(db.connection())
+        if not _has_name_table(db):
+            return
+        indexed = db.execute(text(f"SELECT count(*) FROM {NAME_SEARCH_TABLE}")).scalar()
+        if indexed == 0 and db.execute(select(func.count()).select_from(CloudResource)).scalar():
+            db.execute(text(f"INSERT INTO {NAME_SEARCH_TABLE} (rowid, name) SELECT id, name FROM cloud_resources "
+                            f"WHERE lifecycle_state = 'ACTIVE'"))
+        db.commit()
+
+def _sync_name_index(db: Session, resource_ids: Set[int], version: int) -> None:
+    if db.get_bind().dialect.name != "sqlite" or not _has_name_table(db):
+        return
+    remove = text(f"DELETE FROM {NAME_SEARCH_TABLE} WHERE rowid IN :ids").bindparams(
+        bindparam("ids", expanding=True))
+    add = text(f"INSERT INTO {NAME_SEARCH_TABLE} (rowid, name) SELECT id, name FROM cloud_resources "
+               f"WHERE id IN :ids AND lifecycle_state = 'ACTIVE'").bindparams(bindparam("ids", expanding=True))
+    ids = sorted(resource_ids)
+    for start in range(0, len(ids), _CHUNK_SIZE):
+        chunk = ids[start:start + _CHUNK_SIZE]
+        db.execute(remove, {"ids": chunk})
+        db.execute(add, {"ids": chunk})
+
+resource_events.register_handler(_sync_name_index)
@@ -0,0 +1,141 @@
+"""
+Cost allocation by resource tag.
+
+On PostgreSQL tags are a JSONB column with a GIN index: predicates become a
+single ``tags @> '{...}'`` containment lookup and the grouping reads
+``tags ->> key``. Elsewhere the ``resource_tags`` table mirrors every tag,
+maintained by a resource write handler in the same transaction as the write,
+and groupings are served from its ``(key, value, resource_id, monthly_cost)``
+index without touching ``cloud_resources``.
+"""
+
+from typing import Dict, List, Set, Tuple
+from sqlalchemy import delete, func, insert, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, aliased
+from app.models.cloud_resource import CloudResource, ACTIVE_RESOURCES
+from app.models.resource_tag import ResourceTag
+from app.services import resource_events
+
+_CHUNK_SIZE = 500
+
+def parse_tag_filters(filters: List[str]) -> Dict[str, str]:
+    """
+    Turn ``key:value`` strings into a predicate mapping. Raises ValueError for
+    malformed entries or conflicting values for the same key.
+    """
+    predicates = {}
+    for entry in filters:
+        key, sep, value = entry.partition(":")
+        key, value = key.strip(), value.strip()
+        if not sep or not key or not value:
+            raise ValueError(f"Tag filter '{entry}' must look like key:value")
+        if predicates.get(key, value) != value:
+            raise ValueError(f"Conflicting filters for tag '{key}'")
+        predicates[key] = value
+    return predicates
+
+class TagService:
+    """Aggregates resource cost by the value of one tag key."""
+
+    def cost_by_tag(self, db: Session, key: str, filters: Dict[str, str]) -> Dict:
+        """
+        Total monthly cost and resource count per value of ``key`` among the
+        resources matching every ``filters`` tag. Matching resources without
+        ``key`` are reported as untagged.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            groups, untagged = self._group_jsonb(db, key, filters)
+        else:
+            groups, untagged = self._group_tag_table(db, key, filters)
+
+        groups.sort(key=lambda group: (-group["total_cost"], group["value"]))
+        total_cost = sum(group["total_cost"] for group in groups) + untagged["total_cost"]
+        return {
+            "tag": key,
+            "filters": filters,
+            "total_cost": round(total_cost, 2),
+            "resource_count": sum(group["resource_count"] for group in groups) + untagged["resource_count"],
+            "groups": groups,
+            "untagged": untagged,
+        }
+
+    def resource_ids_with_tag(self, db: Session, key: str, value: str) -> List[int]:
+        """Ids of the resources tagged ``key=value``, found through the tag index."""
+        if db.get_bind().dialect.name == "postgresql":
+            stmt = select(CloudResource.id).where(type_coerce(CloudResource.tags, JSONB).contains({key: value}),
+                                                  ACTIVE_RESOURCES)
+        else:
+            stmt = select(ResourceTag.resource_id).where(ResourceTag.key == key, ResourceTag.value == value)
+        return list(db.execute(stmt).scalars())
+
+    def _group_jsonb(self, db: Session, key: str, filters: Dict[str, str]) -> Tuple[List[Dict], Dict]:
+        value = CloudResource.tags[key].as_string()
+        stmt = select(value, func.sum(CloudResource.monthly_cost), func.count()).where(ACTIVE_RESOURCES).group_by(value)
+        if filters:
+            stmt = stmt.where(type_coerce(CloudResource.tags, JSONB).contains(filters))
+        groups = []
+        untagged = _totals(0.0, 0)
+        for tag_value, cost, count in db.execute(stmt):
+            if tag_value is None:
+                untagged = _totals(cost, count)
+            else:
+                groups.append({"value": tag_value, **_totals(cost, count)})
+        return groups, untagged
+
+    def _group_tag_table(self, db: Session, key: str, filters: Dict[str, str]) -> Tuple[List[Dict], Dict]:
+        grouped = aliased(ResourceTag)
+        stmt = (
+            select(grouped.value, func.sum(grouped.monthly_cost), func.count())
+            .where(grouped.key == key)
+            .group_by(grouped.value)
+        )
+        stmt = _restrict(stmt, grouped.resource_id, filters)
+        groups = [{"value": value, **_totals(cost, count)} for value, cost, count in db.execute(stmt)]
+
+        # Cost of every matching resource, tagged with ``key`` or not.
+        if filters:
+            (first_key, first_value), *rest = filters.items()
+            matched = aliased(ResourceTag)
+            total_stmt = (
+                select(func.sum(matched.monthly_cost), func.count())
+                .where(matched.key == first_key, matched.value == first_value)
+            )
+            total_stmt = _restrict(total_stmt, matched.resource_id, dict(rest))
+        else:
+            total_stmt = select(func.sum(CloudResource.monthly_cost), func.count()).where(ACTIVE_RESOURCES)
+        total_cost, total_count = db.execute(total_stmt).one()
+
+        untagged = _totals(max((total_cost or 0.0) - sum(g["total_cost"] for g in groups), 0.0),
+                           total_count - sum(g["resource_count"] for g in groups))
+        return groups, untagged
+
+def _restrict(stmt, resource_id, filters: Dict[str, str]):
+    for key, value in filters.items():
+        stmt = stmt.where(resource_id.in_(
+            select(ResourceTag.resource_id).where(ResourceTag.key == key, ResourceTag.value == value)
+        ))
+    return stmt
+
+def _totals(cost, count) -> Dict:
+    return {"total_cost": round(cost or 0.0, 2), "resource_count": count}
+
+def _sync_resource_tags(db: Session, resource_ids: Set[int], version: int) -> None:
+    if db.get_bind().dialect.name == "postgresql":
+        return
+    ids = sorted(resource_ids)
+    for start in range(0, len(ids), _CHUNK_SIZE):
+        chunk = ids[start:start + _CHUNK_SIZE]
+        db.execute(delete(ResourceTag).where(ResourceTag.resource_id.in_(chunk)))
+        rows = [
+            {"resource_id": resource_id, "key": str(key), "value": str(value), "monthly_cost": cost}
+            for resource_id, tags, cost in db.execute(
+                select(CloudResource.id, CloudResource.tags, CloudResource.monthly_cost)
+                .where(CloudResource.id.in_(chunk), ACTIVE_RESOURCES)
+            )
+            for key, value in (tags or {}).items()
+        ]
+        if rows:
+            db.execute(insert(ResourceTag), rows)
+
+resource_events.register_handler(_sync_resource_tags)
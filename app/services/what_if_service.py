@@ -0,0 +1,138 @@
+from typing import Dict, List, Optional
+import numpy as np
+from app.models.cloud_resource import ResourceType
+from app.services.fleet_columns import FleetColumns, RESOURCE_TYPES, PROVIDERS
+from app.services.optimization_service import OptimizationService
+from app.services.rule_plan import RulePlan, default_thresholds
+
+def _grid(values: Optional[List[float]], default: float) -> np.ndarray:
+    return np.unique(np.asarray(values if values else [default], dtype=np.float64))
+
+def _per_resource(fleet: FleetColumns, plan: RulePlan, field: str) -> np.ndarray:
+    # One value per (type, provider) cell, indexed by each resource's codes.
+    table = np.array([[getattr(plan.thresholds(resource_type, provider), field) for provider in PROVIDERS]
+                      for resource_type in RESOURCE_TYPES], dtype=np.float64)
+    return table[fleet.resource_type, fleet.provider]
+
+def _first_above(axis: np.ndarray, values: np.ndarray, limits: Optional[np.ndarray]) -> np.ndarray:
+    if limits is None:
+        return np.searchsorted(axis, values, side="right")
+    return np.where(values < limits, 0, 1)
+
+class WhatIfService:
+    """
+    Evaluates the optimization rules for a whole grid of thresholds at once.
+
+    Each resource is binned once against the sorted threshold axes; cumulative
+    sums over the binned totals then give the result for every grid point, so
+    the cost is O(n log g + g^2) instead of one full analysis per combination.
+    """
+
+    def __init__(self, optimization_service: OptimizationService = None):
+        self.optimization_service = optimization_service or OptimizationService()
+
+    def simulate(self, fleet: FleetColumns, cpu_thresholds: Optional[List[float]] = None,
+                 memory_thresholds: Optional[List[float]] = None,
+                 storage_thresholds: Optional[List[float]] = None, plan: RulePlan = None) -> Dict:
+        """
+        Return savings and resource-count surfaces for every threshold combination.
+
+        The rules are independent, so the total for grid point (i, j, k) is
+        ``downsize[i][j] + storage_optimization[k] + terminate``. The storage
+        rate and termination thresholds, and any omitted axis, come from each
+        resource's (type, provider) cell of ``plan``; an omitted axis is a
+        single point reported as the settings default.
+        """
+        plan = plan or RulePlan([])
+        defaults = default_thresholds()
+        cpu_axis = _grid(cpu_thresholds, defaults.downsize_cpu)
+        memory_axis = _grid(memory_thresholds, defaults.downsize_memory)
+        storage_axis = _grid(storage_thresholds, defaults.storage_size)
+        cpu_limit = None if cpu_thresholds else _per_resource(fleet, plan, "downsize_cpu")
+        memory_limit = None if memory_thresholds else _per_resource(fleet, plan, "downsize_memory")
+        storage_limit = None if storage_thresholds else _per_resource(fleet, plan, "storage_size")
+
+        downsize_savings, downsize_count = self._downsize_surface(
+            fleet, cpu_axis, memory_axis, cpu_limit, memory_limit)
+        storage_savings, storage_count = self._storage_surface(
+            fleet, storage_axis, storage_limit, _per_resource(fleet, plan, "storage_rate"))
+        terminate_savings, terminate_count = self._terminate_totals(
+            fleet, _per_resource(fleet, plan, "terminate_cpu"), _per_resource(fleet, plan, "terminate_memory"))
+
+        return {
+            "data_version": fleet.version,
+            "resources_evaluated": len(fleet),
+            "total_monthly_cost": round(float(fleet.monthly_cost.sum()), 2),
+            "cpu_thresholds": cpu_axis.tolist(),
+            "memory_thresholds": memory_axis.tolist(),
+            "storage_thresholds": storage_axis.tolist(),
+            "downsize": {
+                "savings": np.round(downsize_savings, 2).tolist(),
+                "resource_count": downsize_count.tolist(),
+            },
+            "storage_optimization": {
+                "savings": np.round(storage_savings, 2).tolist(),
+                "resource_count": storage_count.tolist(),
+            },
+            "terminate": {
+                "savings": round(terminate_savings, 2),
+                "resource_count": terminate_count,
+            },
+        }
+
+    def _downsize_savings(self, fleet: FleetColumns) -> np.ndarray:
+        # Per instance type: fixed savings from the downsizing table, else the default rate.
+        fixed = np.array([
+            self.optimization_service.downsizing_savings.get(name, {}).get("savings", np.nan)
+            for name in fleet.instance_types
+        ], dtype=np.float64)
+        per_resource = fixed[fleet.instance_type] if len(fixed) else np.empty(0)
+        return np.where(np.isnan(per_resource),
+                        fleet.monthly_cost * self.optimization_service.downsizing_default_rate, per_resource)
+
+    def _downsize_surface(self, fleet: FleetColumns, cpu_axis: np.ndarray, memory_axis: np.ndarray,
+                          cpu_limit: Optional[np.ndarray], memory_limit: Optional[np.ndarray]):
+        eligible = (
+            fleet.type_mask(ResourceType.COMPUTE, ResourceType.DATABASE, ResourceType.CACHE)
+            & (fleet.cpu != 0) & (fleet.memory != 0)
+        )
+        savings = self._downsize_savings(fleet)[eligible]
+        # First grid index whose threshold is strictly above the utilization:
+        # the resource qualifies at that index and every larger one. A
+        # single-point axis taken from the plan compares against the
+        # resource's own threshold instead.
+        cpu_bin = _first_above(cpu_axis, fleet.cpu[eligible], None if cpu_limit is None else cpu_limit[eligible])
+        memory_bin = _first_above(memory_axis, fleet.memory[eligible],
+                                  None if memory_limit is None else memory_limit[eligible])
+        inside = (cpu_bin < len(cpu_axis)) & (memory_bin < len(memory_axis))
+        flat = cpu_bin[inside] * len(memory_axis) + memory_bin[inside]
+
+        shape = (len(cpu_axis), len(memory_axis))
+        size = shape[0] * shape[1]
+        savings_grid = np.bincount(flat, weights=savings[inside], minlength=size).reshape(shape)
+        count_grid = np.bincount(flat, minlength=size).reshape(shape)
+        return (
+            savings_grid.cumsum(axis=0).cumsum(axis=1),
+            count_grid.cumsum(axis=0).cumsum(axis=1),
+        )
+
+    def _storage_surface(self, fleet: FleetColumns, storage_axis: np.ndarray,
+                         storage_limit: Optional[np.ndarray], rate: np.ndarray):
+        eligible = fleet.type_mask(ResourceType.STORAGE) & (fleet.storage != 0)
+        savings = fleet.monthly_cost[eligible] * rate[eligible]
+        # Number of thresholds strictly below the usage: the resource qualifies
+        # for grid indices 0 .. bin - 1.
+        if storage_limit is None:
+            storage_bin = np.searchsorted(storage_axis, fleet.storage[eligible], side="left")
+        else:
+            storage_bin = (fleet.storage[eligible] > storage_limit[eligible]).astype(np.int64)
+        size = len(storage_axis) + 1
+        savings_hist = np.bincount(storage_bin, weights=savings, minlength=size)
+        count_hist = np.bincount(storage_bin, minlength=size)
+        return savings_hist[::-1].cumsum()[::-1][1:], count_hist[::-1].cumsum()[::-1][1:]
+
+    def _terminate_totals(self, fleet: FleetColumns, cpu_limit: np.ndarray, memory_limit: np.ndarray):
+        # The termination thresholds are not simulated, so this is a constant term.
+        eligible = (fleet.cpu != 0) & (fleet.cpu < cpu_limit) & (fleet.memory != 0) & (fleet.memory < memory_limit)
+        savings = fleet.monthly_cost[eligible] * self.optimization_service.termination_savings_rate
+        return float(savings.sum()), int(eligible.sum())
@@ -0,0 +1,263 @@
+"""
+Lightweight in-process tracing.
+
+Spans cover requests, route handlers, session setup, service methods and
+every SQL statement. A trace is started only by a root span (one per
+request) and kept with probability ``TRACE_SAMPLE_RATE``; everything inside
+an unsampled request costs one context variable lookup per span.
+
+Finished spans are appended to a size-rotated JSON-lines file, one span per
+line, using OpenTelemetry's span field names (``traceId``, ``spanId``,
+``parentSpanId``, ``startTimeUnixNano``, ``attributes`` as key/value pairs,
+...) so the file can be replayed into any OTLP tool. ``trace_report.py``
+summarizes it without a collector.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Optional
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Span kinds and status codes as numbered in the OTLP protocol.
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_MAX_STATEMENT_LENGTH = 500
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int, attributes: Dict):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = STATUS_OK
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": self.status},
+            "resource": {"service.name": settings.APP_NAME, "process.pid": os.getpid()},
+        }
+
+# Marks the context of a request that was not sampled.
+_UNSAMPLED = object()
+_current: ContextVar = ContextVar("current_span", default=None)
+_exporter: Optional[logging.Logger] = None
+_exporter_lock = threading.Lock()
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _get_exporter() -> logging.Logger:
+    """
+    The span logger, given its file handler by whichever thread exports the
+    first span. The lock keeps two threads from each adding a handler, which
+    would write every span twice.
+    """
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            directory = os.path.dirname(settings.TRACE_FILE)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = RotatingFileHandler(settings.TRACE_FILE, maxBytes=settings.TRACE_MAX_MB * 1024 * 1024,
+                                          backupCount=settings.TRACE_BACKUPS)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            exporter = logging.getLogger("app.tracing.export")
+            exporter.propagate = False
+            exporter.setLevel(logging.INFO)
+            exporter.addHandler(handler)
+            _exporter = exporter
+        return _exporter
+
+def _export(span: Span) -> None:
+    exporter = _exporter or _get_exporter()
+    exporter.info(json.dumps(span.to_dict(), separators=(",", ":")))
+
+def start_span(name: str, kind: int = KIND_INTERNAL, root: bool = False, **attributes) -> Optional[Span]:
+    """
+    Start a span under the current one without making it current. Returns
+    None when not tracing. Only ``root`` spans may start a new trace.
+    """
+    parent = _current.get()
+    if parent is _UNSAMPLED:
+        return None
+    if parent is None:
+        if not root:
+            return None
+        return Span(name, os.urandom(16).hex(), None, kind, attributes)
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+def end_span(span: Optional[Span], error: Optional[BaseException] = None) -> None:
+    if span is None:
+        return
+    span.end_ns = time.time_ns()
+    if error is not None:
+        span.status = STATUS_ERROR
+        span.attributes["exception.type"] = type(error).__name__
+    try:
+        _export(span)
+    except Exception as e:
+        logger.warning(f"Could not export span {span.name}: {e}")
+
+@contextmanager
+def span(name: str, kind: int = KIND_INTERNAL, root: bool = False, **attributes):
+    """
+    Trace the enclosed block as ``name``. A ``root`` span starts a trace,
+    subject to sampling; other spans are recorded only inside a sampled trace.
+    Yields the span, or None when not tracing.
+    """
+    if root and _current.get() is None and random.random() >= settings.TRACE_SAMPLE_RATE:
+        token = _current.set(_UNSAMPLED)
+        try:
+            yield None
+        finally:
+            _current.reset(token)
+        return
+
+    current = start_span(name, kind, root, **attributes)
+    if current is None:
+        yield None
+        return
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        _current.reset(token)
+        end_span(current, e)
+        raise
+    _current.reset(token)
+    end_span(current)
+
+def traced(name: Optional[str] = None):
+    """
+    Decorator tracing every call of a function or coroutine function,
+    named after its qualified name unless ``name`` is given.
+    """
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            async_wrapper.__traced__ = True
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        wrapper.__traced__ = True
+        return wrapper
+    return decorate
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the root span of every HTTP request, named after
+    the matched route template once routing has happened.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with span(f"{scope['method']} {scope['path']}", KIND_SERVER, root=True,
+                  **{"http.method": scope["method"], "http.target": scope["path"]}) as request_span:
+            if request_span is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    request_span.set("http.status_code", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
+            route = scope.get("route")
+            if route is not None:
+                request_span.name = f"{scope['method']} {route.path}"
+                request_span.set("http.route", route.path)
+
+class TracedRoute(APIRoute):
+    """
+    Route class tracing the endpoint function itself. Time spent in the
+    request span outside its handler and session spans is dependency setup,
+    response validation and serialization.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        # include_router() builds each route again from the wrapped endpoint.
+        if not getattr(endpoint, "__traced__", False):
+            endpoint = traced(f"handler {endpoint.__name__}")(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_sql_span(conn, cursor, statement, parameters, context, executemany):
+    sql_span = start_span("sql", KIND_CLIENT, **{
+        "db.system": conn.dialect.name,
+        "db.statement": statement[:_MAX_STATEMENT_LENGTH],
+    })
+    if sql_span is not None and context is not None:
+        context._trace_span = sql_span
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_sql_span(conn, cursor, statement, parameters, context, executemany):
+    sql_span = getattr(context, "_trace_span", None)
+    if sql_span is not None:
+        context._trace_span = None
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            sql_span.set("db.rowcount", cursor.rowcount)
+        end_span(sql_span)
+
+@event.listens_for(Engine, "handle_error")
+def _fail_sql_span(exception_context):
+    context = exception_context.execution_context
+    sql_span = getattr(context, "_trace_span", None)
+    if sql_span is not None:
+        context._trace_span = None
+        end_span(sql_span, exception_context.original_exception)
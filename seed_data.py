@@ -6,6 +6,7 @@ This script creates the exact resources specified in the requirements.
 from sqlalchemy.orm import Session
 from app.database import SessionLocal, engine
 from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider, Base
+import app.services  # registers handlers that maintain derived tables on commit
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -35,6 +36,7 @@ def create_sample_data():
                 instance_type="t3.xlarge",
                 cpu_utilization=15.0,
                 memory_utilization=25.0,
+                tags={"team": "web", "environment": "production"},
                 monthly_cost=150.0
             ),
             CloudResource(
@@ -44,6 +46,7 @@ def create_sample_data():
                 instance_type="m5.large",
                 cpu_utilization=12.0,
                 memory_utilization=30.0,
+                tags={"team": "platform", "environment": "production"},
                 monthly_cost=90.0
             ),
             CloudResource(
@@ -53,6 +56,7 @@ def create_sample_data():
                 instance_type="Standard_D2s_v3",
                 cpu_utilization=8.0,
                 memory_utilization=20.0,
+                tags={"team": "data", "environment": "staging"},
                 monthly_cost=70.0
             )
         ]
@@ -66,6 +70,7 @@ def create_sample_data():
                 instance_type="m5.xlarge",
                 cpu_utilization=75.0,
                 memory_utilization=85.0,
+                tags={"team": "platform", "environment": "production"},
                 monthly_cost=180.0
             ),
             CloudResource(
@@ -75,6 +80,7 @@ def create_sample_data():
                 instance_type="n1-standard-2",
                 cpu_utilization=65.0,
                 memory_utilization=70.0,
+                tags={"team": "web", "environment": "production"},
                 monthly_cost=50.0
             )
         ]
@@ -89,6 +95,7 @@ def create_sample_data():
                 instance_type="EBS gp3",
                 size="1000GB",
                 storage_usage=1000.0,
+                tags={"team": "platform", "environment": "production"},
                 monthly_cost=100.0
             ),
             CloudResource(
@@ -98,6 +105,7 @@ def create_sample_data():
                 instance_type="EBS gp3",
                 size="500GB",
                 storage_usage=500.0,
+                tags={"team": "data", "environment": "production"},
                 monthly_cost=75.0
             ),
             # Well-utilized storage
@@ -108,6 +116,7 @@ def create_sample_data():
                 instance_type="EBS gp3",
                 size="200GB",
                 storage_usage=200.0,
+                tags={"team": "platform", "environment": "production"},
                 monthly_cost=25.0
             )
         ]
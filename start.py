@@ -4,6 +4,7 @@ Startup script for the Cloud Infrastructure Optimization API.
 This script handles database setup, seeding, and server startup.
 """
 
+import argparse
 import os
 import sys
 import subprocess
@@ -22,8 +23,10 @@ def check_dependencies():
     try:
         import fastapi
         import sqlalchemy
-        import psycopg2
         import uvicorn
+        from app.config import settings
+        if settings.DATABASE_URL.startswith("postgresql"):
+            import psycopg2
         logger.info("✓ All dependencies are installed")
         return True
     except ImportError as e:
@@ -53,20 +56,27 @@ def setup_database():
         logger.error(f"✗ Database setup failed: {e}")
         return False
 
-def start_server():
+def start_server(workers: int = 1):
     """Start the FastAPI server."""
     try:
         logger.info("Starting the API server...")
         logger.info("Server will be available at: http://localhost:8000")
         logger.info("API documentation at: http://localhost:8000/docs")
         
-        # Start uvicorn server
+        # Start uvicorn server; auto-reload only works with a single process
         import uvicorn
+        from app.services.result_cache import get_result_cache
+        # Results cached by an earlier run may describe another database state.
+        # Clear them once here, before the workers start filling the cache.
+        get_result_cache().clear()
+        if workers > 1:
+            logger.info(f"Running {workers} worker processes sharing one result cache")
         uvicorn.run(
             "app.main:app",
             host="0.0.0.0",
             port=8000,
-            reload=True,
+            reload=workers == 1,
+            workers=workers,
             log_level="info"
         )
     except Exception as e:
@@ -75,6 +85,12 @@ def start_server():
 
 def main():
     """Main startup function."""
+    from app.config import settings
+    parser = argparse.ArgumentParser(description="Set up the database and start the API server.")
+    parser.add_argument("--workers", type=int, default=settings.API_WORKERS,
+                        help="Worker processes (production mode, no auto-reload when above 1)")
+    args = parser.parse_args()
+
     logger.info("🚀 Starting Cloud Infrastructure Optimization API...")
     
     # Check dependencies
@@ -89,7 +105,7 @@ def main():
     
     # Start server
     logger.info("🎉 Setup complete! Starting the API server...")
-    start_server()
+    start_server(max(args.workers, 1))
 
 if __name__ == "__main__":
     main()
@@ -2,6 +2,7 @@
 """
 Full-stack startup script for Cloud Infrastructure Optimization System.
 Starts both the FastAPI backend and React frontend.
+Arguments are passed on to start.py, e.g. --workers 4.
 """
 
 import os
@@ -26,7 +27,7 @@ def run_backend():
         
         # Start the backend
         process = subprocess.run([
-            sys.executable, "start.py"
+            sys.executable, "start.py", *sys.argv[1:]
         ], check=True)
         
     except subprocess.CalledProcessError as e:
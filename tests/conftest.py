@@ -0,0 +1,17 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, create_database_engine
+import app.models  # noqa: F401 - registers every table on Base.metadata
+import app.services  # noqa: F401 - registers resource write handlers
+
+@pytest.fixture
+def db_session():
+    """In-memory SQLite session with the full schema created."""
+    engine = create_database_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
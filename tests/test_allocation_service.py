@@ -0,0 +1,133 @@
+import pytest
+from app.models.allocation import AllocationNode, ResourceAllocation
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.models.recommendation import Recommendation, RecommendationStatus
+from app.schemas import OptimizationRecommendation
+from app.services.allocation_service import AllocationService
+from app.services.recommendation_store import RecommendationStore, RESOURCE_RULE_TYPES
+
+def _resource(name, cost, tags, cpu=60.0, memory=70.0):
+    return CloudResource(name=name, resource_type=ResourceType.COMPUTE, provider=CloudProvider.AWS,
+                         instance_type="m5.large", cpu_utilization=cpu, memory_utilization=memory,
+                         monthly_cost=cost, tags=tags)
+
+def _totals(db, node_id):
+    node = AllocationService().get_node(db, node_id)
+    return node["total_cost"], node["potential_savings"], node["resource_count"]
+
+@pytest.fixture
+def hierarchy(db_session):
+    service = AllocationService()
+    org = service.create_node(db_session, "Acme")
+    eng = service.create_node(db_session, "Engineering", org.id, "department", "eng")
+    web = service.create_node(db_session, "Web", eng.id, "team", "web")
+    data = service.create_node(db_session, "Data", eng.id, "team", "data")
+    db_session.commit()
+    return org.id, eng.id, web.id, data.id
+
+def test_resources_roll_up_to_every_ancestor(db_session, hierarchy):
+    """Test that a resource counts towards its deepest matching node and all its ancestors."""
+    org, eng, web, data = hierarchy
+    db_session.add_all([
+        _resource("web-1", 100.0, {"team": "web", "department": "eng"}),
+        # Over-provisioned: downsizing an m5.large saves a flat $45.
+        _resource("etl-1", 80.0, {"team": "data"}, cpu=10.0, memory=20.0),
+        _resource("tools-1", 20.0, {"department": "eng"}),
+        _resource("misc-1", 5.0, {}),
+    ])
+    db_session.commit()
+
+    assert _totals(db_session, web) == (100.0, 0.0, 1)
+    assert _totals(db_session, data) == (80.0, 45.0, 1)
+    assert _totals(db_session, eng) == (200.0, 45.0, 3)
+    assert _totals(db_session, org) == (200.0, 45.0, 3)
+
+    tree = AllocationService().get_tree(db_session)
+    assert [child["name"] for child in tree["nodes"][0]["children"][0]["children"]] == ["Web", "Data"]
+    assert tree["unallocated"] == {"total_cost": 5.0, "potential_savings": 0.0, "resource_count": 1}
+
+def test_changes_are_applied_incrementally(db_session, hierarchy):
+    """Test that cost changes, retagging and deletes move only the difference."""
+    org, eng, web, data = hierarchy
+    db_session.add_all([_resource("web-1", 100.0, {"team": "web"}), _resource("web-2", 30.0, {"team": "web"})])
+    db_session.commit()
+
+    resource = db_session.query(CloudResource).filter_by(name="web-1").one()
+    resource.monthly_cost = 120.0
+    resource.tags["team"] = "data"
+    db_session.delete(db_session.query(CloudResource).filter_by(name="web-2").one())
+    db_session.commit()
+
+    assert _totals(db_session, web) == (0.0, 0.0, 0)
+    assert _totals(db_session, data) == (120.0, 0.0, 1)
+    assert _totals(db_session, org) == (120.0, 0.0, 1)
+    assert db_session.query(ResourceAllocation).count() == 1
+
+def test_new_tag_rule_and_explicit_assignment(db_session, hierarchy):
+    """Test that a new rule pulls in tagged resources and pins override rules."""
+    org, eng, web, data = hierarchy
+    db_session.add(_resource("api-1", 50.0, {"team": "web", "service": "api"}))
+    db_session.commit()
+    resource_id = db_session.query(CloudResource.id).scalar()
+
+    service = AllocationService()
+    api = service.create_node(db_session, "API", web, "service", "api")
+    db_session.commit()
+    assert _totals(db_session, api.id) == (50.0, 0.0, 1)
+    assert _totals(db_session, web) == (50.0, 0.0, 1)
+
+    service.assign_resource(db_session, resource_id, data)
+    db_session.commit()
+    assert _totals(db_session, web)[2] == 0 and _totals(db_session, data)[2] == 1
+
+    service.assign_resource(db_session, resource_id, None)
+    db_session.commit()
+    assert _totals(db_session, api.id)[2] == 1 and _totals(db_session, data)[2] == 0
+
+def test_totals_match_a_full_recount(db_session, hierarchy):
+    """Test that incrementally maintained totals equal a recount from scratch."""
+    org, eng, web, data = hierarchy
+    for i in range(40):
+        db_session.add(_resource(f"r-{i}", 10.0 + i, {"team": ("web", "data", "ops")[i % 3]},
+                                 cpu=float(5 + i * 2), memory=float(10 + i)))
+    db_session.commit()
+    for resource in db_session.query(CloudResource).filter(CloudResource.id % 4 == 0):
+        resource.monthly_cost += 7.0
+        resource.cpu_utilization = 90.0
+    db_session.commit()
+    RecommendationStore().rebuild(db_session)
+    # Fleet-level passes add alternatives to the per-resource rules, which
+    # must not change the savings totals.
+    RecommendationStore().sync_type(db_session, "commitment", [OptimizationRecommendation(
+        resource_id=2, resource_name="r-1", current_cost=11.0, recommendation_type="commitment",
+        description="steady", recommended_action="commit", estimated_savings=3.0, confidence_level="high")])
+    db_session.commit()
+
+    for allocation in db_session.query(ResourceAllocation):
+        active = db_session.query(Recommendation).filter(
+            Recommendation.resource_id == allocation.resource_id, Recommendation.status == RecommendationStatus.ACTIVE,
+            Recommendation.recommendation_type.in_(RESOURCE_RULE_TYPES)).all()
+        assert allocation.potential_savings == pytest.approx(sum(r.estimated_savings for r in active))
+
+    for node in db_session.query(AllocationNode):
+        db_session.refresh(node)
+        allocations = db_session.query(ResourceAllocation).join(
+            AllocationNode, AllocationNode.id == ResourceAllocation.node_id
+        ).filter(AllocationNode.path.startswith(node.path)).all()
+        assert node.subtree_resources == len(allocations)
+        assert node.subtree_cost == pytest.approx(sum(a.monthly_cost for a in allocations))
+        assert node.subtree_savings == pytest.approx(sum(a.potential_savings for a in allocations))
+
+def test_create_node_validation(db_session, hierarchy):
+    """Test that invalid nodes are rejected."""
+    org, eng, web, data = hierarchy
+    service = AllocationService()
+    with pytest.raises(ValueError):
+        service.create_node(db_session, "Dup", eng, "team", "web")
+    with pytest.raises(ValueError):
+        service.create_node(db_session, "Orphan", 999)
+    with pytest.raises(ValueError):
+        service.create_node(db_session, "Half", eng, "team", None)
+    api = service.create_node(db_session, "API", web)
+    with pytest.raises(ValueError):
+        service.create_node(db_session, "Too deep", api.id)
@@ -0,0 +1,92 @@
+import numpy as np
+from sqlalchemy import insert, select
+from app.models.anomaly import ResourceMetricState
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.services import resource_events
+from app.services.anomaly_detector import AnomalyDetector
+
+def _samples(cost, cpu=np.nan, memory=np.nan):
+    return np.array([[cost, cpu, memory]], dtype=np.float64)
+
+def _resource(name="web", cost=100.0):
+    return CloudResource(name=name, resource_type=ResourceType.COMPUTE, provider=CloudProvider.AWS,
+                         instance_type="m5.large", cpu_utilization=50.0, monthly_cost=cost)
+
+def test_flags_spike_after_warmup(db_session):
+    """Test that a jump far outside the EWMA band is reported as a spike."""
+    detector = AnomalyDetector()
+    for cost in (100, 102, 98, 101, 99):
+        assert detector.ingest(db_session, [1], _samples(cost, cpu=40)) == []
+    detected = detector.ingest(db_session, [1], _samples(400, cpu=41))
+    assert [(a["metric"], a["direction"]) for a in detected] == [("monthly_cost", "spike")]
+    assert 98 < detected[0]["expected"] < 102
+
+def test_no_anomalies_during_warmup_or_for_missing_metrics(db_session):
+    """Test that new resources and unreported metrics are never flagged."""
+    detector = AnomalyDetector()
+    assert detector.ingest(db_session, [1], _samples(100)) == []
+    assert detector.ingest(db_session, [1], _samples(1000)) == []
+    counts = db_session.execute(select(ResourceMetricState.metric, ResourceMetricState.sample_count)).all()
+    assert counts == [("monthly_cost", 2)]
+
+def test_score_is_vectorized_over_resources():
+    """Test that each row is scored against its own state."""
+    detector = AnomalyDetector()
+    values = np.array([[100.0, np.nan, np.nan], [500.0, np.nan, np.nan]])
+    mean = np.array([[100.0, 0, 0], [100.0, 0, 0]])
+    variance = np.array([[4.0, 0, 0], [4.0, 0, 0]])
+    count = np.array([[5, 0, 0], [5, 0, 0]])
+    new_mean, _, new_count, _, flagged = detector.score(values, mean, variance, count)
+    assert flagged[:, 0].tolist() == [False, True]
+    assert new_mean[1, 0] == 180.0
+    assert new_count.tolist() == [[6, 0, 0], [6, 0, 0]]
+
+def test_committed_writes_feed_detector(db_session):
+    """Test that resource writes are scored in their transaction and rollbacks are not."""
+    resource = _resource()
+    db_session.add(resource)
+    db_session.commit()
+    for cost in (101.0, 99.0, 100.0):
+        resource.monthly_cost = cost
+        db_session.commit()
+
+    resource.monthly_cost = 900.0
+    db_session.flush()
+    db_session.rollback()
+    detector = AnomalyDetector()
+    assert detector.get_anomalies(db_session)["anomalies"] == []
+
+    resource.monthly_cost = 900.0
+    db_session.commit()
+    result = detector.get_anomalies(db_session, metric="monthly_cost")
+    assert result["tracked_resources"] == 1
+    assert [(a["resource_id"], a["value"]) for a in result["anomalies"]] == [(resource.id, 900.0)]
+
+def test_writes_outside_the_orm_are_scored(db_session):
+    """Test that bulk writes from another process, such as the billing import, are scored."""
+    resource_ids = []
+    for cost in (100.0, 101.0, 99.0, 100.0, 800.0):
+        if not resource_ids:
+            result = db_session.execute(insert(CloudResource).values(
+                name="vol", resource_type=ResourceType.STORAGE, provider=CloudProvider.AWS,
+                instance_type="gp3", monthly_cost=cost))
+            resource_ids = [result.inserted_primary_key[0]]
+        else:
+            db_session.execute(CloudResource.__table__.update().values(monthly_cost=cost))
+        resource_events.mark_touched(db_session, resource_ids)
+        db_session.commit()
+
+    anomalies = AnomalyDetector().get_anomalies(db_session)["anomalies"]
+    assert [(a["resource_id"], a["metric"], a["value"]) for a in anomalies] == [(resource_ids[0], "monthly_cost", 800.0)]
+
+def test_unchanged_metrics_are_not_sampled_again(db_session):
+    """Test that writes leaving a metric unchanged do not fold in another identical sample."""
+    resource = _resource()
+    db_session.add(resource)
+    db_session.commit()
+    resource.tags = {"team": "web"}
+    db_session.commit()
+    resource.monthly_cost = 120.0
+    db_session.commit()
+    counts = dict(db_session.execute(select(ResourceMetricState.metric, ResourceMetricState.sample_count)).all())
+    assert counts == {"monthly_cost": 2, "cpu_utilization": 1}
@@ -0,0 +1,108 @@
+import csv
+import gzip
+import io
+import pytest
+from app.models.billing_import import BillingStagedTotal, ImportCheckpoint
+from app.models.cloud_resource import CloudResource, ResourceType
+from app.models.cost_history import CostHistory
+from app.services.billing_importer import BillingImporter, parse_chunk, read_chunks, resolve_columns
+
+HEADER = ["identity/LineItemId", "lineItem/UsageStartDate", "lineItem/ProductCode", "lineItem/ResourceId",
+          "lineItem/UnblendedCost", "lineItem/LineItemDescription", "product/instanceType",
+          "product/productFamily", "product/region"]
+
+def _write_export(path, hours=48, compress=True):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    line = 0
+    for hour in range(hours):
+        usage = f"2026-09-{1 + hour // 24:02d}T{hour % 24:02d}:00:00Z"
+        for resource, product, instance, family, cost in (
+            ("i-web", "AmazonEC2", "m5.large", "Compute Instance", "0.096"),
+            ("vol-data", "AmazonEC2", "", "Storage", "0.01"),
+            ("db-main", "AmazonRDS", "db.r5.large", "Database Instance", "0.25"),
+            ("", "AWSSupport", "", "", "1.0"),
+        ):
+            line += 1
+            writer.writerow([line, usage, product, resource, cost, "usage,\nwith a quoted newline",
+                             instance, family, "us-east-1"])
+    data = buffer.getvalue().encode()
+    if compress:
+        path.write_bytes(gzip.compress(data))
+    else:
+        path.write_bytes(data)
+    return path
+
+def test_read_chunks_never_splits_quoted_records():
+    """Test that chunk boundaries fall only between whole records."""
+    data = b'a,"x\ny"\nb,"z"\nc,"1\n2\n3"\n'
+    chunks = list(read_chunks(io.BytesIO(data), 0, chunk_bytes=3))
+    assert b"".join(chunk for chunk, _ in chunks) == data
+    assert [list(csv.reader(io.StringIO(chunk.decode()))) for chunk, _ in chunks][0][0] == ["a", "x\ny"]
+    assert chunks[-1][1] == len(data)
+
+def test_malformed_rows_are_skipped():
+    """Test that short rows and bad dates or costs are counted as skipped, not fatal."""
+    columns = resolve_columns(",".join(HEADER).encode())
+    good = "1,2026-09-01T00:00:00Z,AmazonEC2,i-web,0.096,usage,m5.large,Compute Instance,us-east-1\n"
+    data = (good + "2,garbage,AmazonEC2,i-web,0.096,usage,m5.large,Compute Instance,us-east-1\n"
+            + "3,2026-09-01T01:00:00Z,AmazonEC2,i-web,abc,usage,m5.large,Compute Instance,us-east-1\n"
+            + "4,2026-09-01T02:00:00Z,AmazonEC2,i-web,0.096\n" + good).encode()
+    totals, rows, skipped = parse_chunk(columns, data)
+    assert (rows, skipped) == (5, 3)
+    assert totals[("i-web", "2026-09")][3] == pytest.approx(0.192)
+
+def test_import_creates_resources_and_history(db_session, tmp_path):
+    """Test mapping line items to resources, monthly totals and cost history."""
+    export = _write_export(tmp_path / "cur.csv.gz")
+    report = BillingImporter(workers=1, chunk_bytes=4096, batch_rows=50).run(db_session, str(export))
+
+    assert (report["status"], report["rows_processed"], report["rows_skipped"]) == ("completed", 192, 48)
+    assert report["resources_imported"] == 3 and report["rows_per_second"] > 0
+    resources = {r.name: r for r in db_session.query(CloudResource).all()}
+    assert resources["i-web"].resource_type == ResourceType.COMPUTE
+    assert resources["i-web"].instance_type == "m5.large" and resources["i-web"].region == "us-east-1"
+    assert resources["i-web"].monthly_cost == pytest.approx(48 * 0.096, abs=0.01)
+    assert resources["vol-data"].resource_type == ResourceType.STORAGE
+    assert resources["db-main"].resource_type == ResourceType.DATABASE
+    assert db_session.query(CostHistory).filter(CostHistory.resource_id == resources["db-main"].id).count() >= 1
+    assert db_session.query(BillingStagedTotal).count() == 0
+
+    # A completed file is not imported twice.
+    again = BillingImporter(workers=1).run(db_session, str(export))
+    assert again["rows_processed"] == 192
+    assert db_session.get(CloudResource, resources["i-web"].id).monthly_cost == pytest.approx(4.61, abs=0.01)
+
+def test_interrupted_import_resumes_without_double_counting(db_session, tmp_path, monkeypatch):
+    """Test that a failed run resumes from its checkpoint with exact totals."""
+    export = _write_export(tmp_path / "cur.csv", compress=False)
+    importer = BillingImporter(workers=1, chunk_bytes=2048, batch_rows=40)
+    original = BillingImporter._stage_totals
+    calls = []
+
+    def failing_stage(self, db, source, batch):
+        calls.append(source)
+        if len(calls) == 3:
+            raise RuntimeError("connection lost")
+        return original(self, db, source, batch)
+
+    monkeypatch.setattr(BillingImporter, "_stage_totals", failing_stage)
+    with pytest.raises(RuntimeError):
+        importer.run(db_session, str(export))
+    checkpoint = db_session.get(ImportCheckpoint, str(export))
+    assert checkpoint.status == "staging" and 0 < checkpoint.rows_processed < 192
+    assert checkpoint.error == "connection lost"
+
+    report = importer.run(db_session, str(export))
+    assert (report["status"], report["rows_processed"], report["error"]) == ("completed", 192, None)
+    web = db_session.query(CloudResource).filter(CloudResource.name == "i-web").one()
+    assert web.monthly_cost == pytest.approx(48 * 0.096, abs=0.01)
+
+def test_parallel_parsing_matches_inline(db_session, tmp_path):
+    """Test that the process pool produces the same totals as inline parsing."""
+    export = _write_export(tmp_path / "cur.csv.gz", hours=24 * 5)
+    report = BillingImporter(workers=2, chunk_bytes=8192, batch_rows=100).run(db_session, str(export))
+    assert report["rows_processed"] == 24 * 5 * 4
+    web = db_session.query(CloudResource).filter(CloudResource.name == "i-web").one()
+    assert web.monthly_cost == pytest.approx(24 * 5 * 0.096, abs=0.01)
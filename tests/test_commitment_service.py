@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.services.commitment_service import CommitmentService, coverage_curve
+from app.services.cost_history_service import CostHistoryService, Observation
+
+NOW = datetime(2026, 6, 30, tzinfo=timezone.utc)
+
+def _brute_force_savings(usage, level, rate, discount):
+    on_demand = np.maximum(usage - level, 0).sum() * rate
+    return usage.sum() * rate - (level * len(usage) * rate * (1 - discount) + on_demand)
+
+def test_coverage_curve_matches_brute_force():
+    """Test that the cumulative-sum curve prices every level like a direct sum."""
+    usage = np.random.default_rng(5).integers(0, 40, 500).astype(np.float64)
+    curve = coverage_curve(usage, 0.05, 0.37)
+    scale = 730 / len(usage)
+    for level, savings in zip(curve["levels"], curve["monthly_savings"]):
+        assert np.isclose(savings, _brute_force_savings(usage, level, 0.05, 0.37) * scale)
+    best = curve["levels"][np.argmax(curve["monthly_savings"])]
+    # Worth committing only to levels used in more than (1 - discount) of hours.
+    assert (usage >= best).mean() >= 0.63 and (usage > best).mean() < 0.63
+
+def _resource(db_session, name, instance_type="m5.xlarge"):
+    resource = CloudResource(name=name, resource_type=ResourceType.COMPUTE, provider=CloudProvider.AWS,
+                             instance_type=instance_type, monthly_cost=140.16)
+    db_session.add(resource)
+    db_session.flush()
+    return resource
+
+def test_plan_commits_to_steady_baseline(db_session):
+    """Test that always-on resources are covered and part-time ones are not."""
+    steady = [_resource(db_session, f"steady-{index}") for index in range(3)]
+    part_time = _resource(db_session, "batch")
+    observations = []
+    for day in range(30):
+        recorded_at = NOW - timedelta(days=30 - day)
+        for resource in steady + ([part_time] if day >= 15 else []):
+            observations.append(Observation(resource.id, recorded_at, resource.resource_type,
+                                            resource.provider, resource.monthly_cost))
+    CostHistoryService().record(db_session, observations)
+
+    plan, recommendations = CommitmentService().plan(db_session, lookback_days=30, now=NOW - timedelta(hours=1))
+    family = plan["families"][0]
+    assert (family["family"], family["peak_vcpus"], family["recommended_vcpus"]) == ("m5", 16.0, 12.0)
+    assert family["utilization"] == 1.0
+    assert sorted(rec.resource_name for rec in recommendations) == ["steady-0", "steady-1", "steady-2"]
+    assert np.isclose(sum(rec.estimated_savings for rec in recommendations), family["estimated_savings"], atol=0.02)
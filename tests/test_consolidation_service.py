@@ -0,0 +1,138 @@
+import random
+import pytest
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.models.fleet_aggregate import FleetAggregate
+from app.models.recommendation import Recommendation, RecommendationStatus
+from app.services.consolidation_service import (
+    ConsolidationService, Workload, CONSOLIDATE_TYPE, pack_first_fit_decreasing
+)
+from app.services.recommendation_store import RecommendationStore, FLEET_KEY
+from app.services.rule_plan import THRESHOLD_FIELDS, RulePlan
+
+def _naive_first_fit_decreasing(workloads, cpu_capacity, memory_capacity):
+    order = sorted(range(len(workloads)), key=lambda i: (
+        -max(workloads[i].cpu / cpu_capacity, workloads[i].memory / memory_capacity), workloads[i].resource_id))
+    hosts, assignment = [], [-1] * len(workloads)
+    for i in order:
+        for slot, (cpu, memory) in enumerate(hosts):
+            if cpu + 1e-9 >= workloads[i].cpu and memory + 1e-9 >= workloads[i].memory:
+                hosts[slot] = (cpu - workloads[i].cpu, memory - workloads[i].memory)
+                assignment[i] = slot
+                break
+        else:
+            if workloads[i].cpu <= cpu_capacity and workloads[i].memory <= memory_capacity:
+                hosts.append((cpu_capacity - workloads[i].cpu, memory_capacity - workloads[i].memory))
+                assignment[i] = len(hosts) - 1
+    return assignment, len(hosts)
+
+def test_grid_packing_is_valid_and_close_to_exact_first_fit():
+    """Test that no host is overfilled and the grid costs at most a few hosts."""
+    rng = random.Random(3)
+    workloads = [
+        Workload(i, f"vm-{i}", "m5.large", 0, 0, 10.0, rng.uniform(0.05, 6), rng.uniform(0.1, 30))
+        for i in range(400)
+    ]
+    workloads.append(Workload(400, "huge", "m5.large", 0, 0, 10.0, 20.0, 1.0))
+    assignment, hosts = pack_first_fit_decreasing(workloads, 12.8, 51.2)
+    assert assignment[-1] == -1
+
+    used_cpu, used_memory = [0.0] * hosts, [0.0] * hosts
+    for workload, host in zip(workloads, assignment):
+        if host >= 0:
+            used_cpu[host] += workload.cpu
+            used_memory[host] += workload.memory
+    assert max(used_cpu) <= 12.8 + 1e-6 and max(used_memory) <= 51.2 + 1e-6
+    _, exact_hosts = _naive_first_fit_decreasing(workloads, 12.8, 51.2)
+    assert exact_hosts <= hosts <= exact_hosts * 1.05
+
+def _rule_savings(db):
+    return sum(row.estimated_savings for row in db.query(Recommendation).filter(
+        Recommendation.status == RecommendationStatus.ACTIVE, Recommendation.recommendation_type != CONSOLIDATE_TYPE))
+
+def _add(db_session, name, instance_type, region, cpu=10.0, memory=20.0, cost=140.16,
+         provider=CloudProvider.AWS):
+    resource = CloudResource(name=name, resource_type=ResourceType.COMPUTE, provider=provider,
+                             instance_type=instance_type, region=region, cpu_utilization=cpu,
+                             memory_utilization=memory, monthly_cost=cost)
+    db_session.add(resource)
+    return resource
+
+def test_plan_packs_per_region_and_splits_savings(db_session):
+    """Test grouping by provider and region and the per-resource savings split."""
+    for index in range(6):
+        _add(db_session, f"east-{index}", "m5.xlarge", "us-east-1", memory=10.0)
+    _add(db_session, "west-0", "m5.xlarge", "us-west-2")
+    _add(db_session, "busy", "m5.xlarge", "us-east-1", cpu=90.0)
+    db_session.commit()
+
+    plan, recommendations = ConsolidationService().plan(db_session)
+    east = next(group for group in plan["groups"] if group["region"] == "us-east-1")
+    # 6 x (0.4 vCPU, 1.6 GB) fits on one m5.xlarge at 80% target utilization.
+    assert (east["candidates"], east["host_type"], east["hosts_needed"]) == (6, "m5.xlarge", 1)
+    assert east["estimated_savings"] == round(6 * 140.16 - 140.16, 2)
+    assert {rec.resource_name for rec in recommendations} == {f"east-{index}" for index in range(6)}
+    assert plan["estimated_savings"] == east["estimated_savings"]
+
+def test_sync_type_is_idempotent_and_resolves_stale_rows(db_session):
+    """Test that re-syncing an unchanged plan is a no-op and dropped rows resolve."""
+    resources = [_add(db_session, f"vm-{index}", "m5.xlarge", "eu-west-1") for index in range(4)]
+    db_session.commit()
+    store, service = RecommendationStore(), ConsolidationService()
+
+    _, recommendations = service.plan(db_session)
+    assert store.sync_type(db_session, CONSOLIDATE_TYPE, recommendations) == 4
+    db_session.commit()
+    savings = db_session.get(FleetAggregate, FLEET_KEY).potential_savings
+    assert store.sync_type(db_session, CONSOLIDATE_TYPE, recommendations) == 0
+
+    resources[0].cpu_utilization = 95.0
+    db_session.commit()
+    _, recommendations = service.plan(db_session)
+    # The write already resolved the busy resource's row; the others are re-split.
+    assert store.sync_type(db_session, CONSOLIDATE_TYPE, recommendations) == 3
+    db_session.commit()
+    rows = db_session.query(Recommendation).filter(Recommendation.recommendation_type == CONSOLIDATE_TYPE).all()
+    assert {row.resource_id for row in rows if row.status == RecommendationStatus.RESOLVED} == {resources[0].id}
+
+    store.rebuild_aggregates(db_session)
+    rebuilt = db_session.get(FleetAggregate, FLEET_KEY).potential_savings
+    assert rebuilt < savings
+    db_session.rollback()
+
+def test_write_resolves_consolidation_once_resource_no_longer_qualifies(db_session):
+    """Test that a resource pushed above the thresholds loses its consolidate row on write."""
+    resources = [_add(db_session, f"vm-{index}", "m5.xlarge", "eu-west-1") for index in range(3)]
+    db_session.commit()
+    store = RecommendationStore()
+    _, recommendations = ConsolidationService().plan(db_session)
+    store.sync_type(db_session, CONSOLIDATE_TYPE, recommendations)
+    db_session.commit()
+    # Consolidating is an alternative to downsizing the same instances, so
+    # only the per-resource rules count toward the fleet savings.
+    assert db_session.get(FleetAggregate, FLEET_KEY).potential_savings == pytest.approx(
+        _rule_savings(db_session))
+
+    resources[1].memory_utilization = 25.0
+    resources[0].cpu_utilization = 95.0
+    db_session.commit()
+    rows = {
+        row.resource_id: row.status
+        for row in db_session.query(Recommendation).filter(Recommendation.recommendation_type == CONSOLIDATE_TYPE)
+    }
+    assert rows == {resources[0].id: RecommendationStatus.RESOLVED, resources[1].id: RecommendationStatus.ACTIVE,
+                    resources[2].id: RecommendationStatus.ACTIVE}
+    assert db_session.get(FleetAggregate, FLEET_KEY).potential_savings == pytest.approx(
+        _rule_savings(db_session))
+
+def test_candidates_follow_rule_thresholds(db_session):
+    """Test that the candidate filter uses the downsize thresholds of each resource's cell."""
+    _add(db_session, "aws", "m5.xlarge", "us-east-1", cpu=40.0)
+    _add(db_session, "gcp", "n1-standard-4", "us-east1", cpu=40.0, cost=140.0, provider=CloudProvider.GCP)
+    db_session.commit()
+    service = ConsolidationService()
+    assert service.load_workloads(db_session) == {}
+
+    rules = RulePlan([{**dict.fromkeys(THRESHOLD_FIELDS), "resource_type": ResourceType.COMPUTE,
+                       "provider": CloudProvider.AWS, "downsize_cpu": 50.0}])
+    groups = service.load_workloads(db_session, rules)
+    assert [workload.name for workloads in groups.values() for workload in workloads] == ["aws"]
@@ -0,0 +1,51 @@
+from datetime import date, datetime, timezone
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.models.cost_history import CostHistory
+from app.services.cost_history_service import CostHistoryService, Observation
+
+def _at(year, month, day, hour=0):
+    return datetime(year, month, day, hour, tzinfo=timezone.utc)
+
+def test_resource_writes_append_history(db_session):
+    """Test that inserts and cost changes append observations."""
+    resource = CloudResource(name="web-server-1", resource_type=ResourceType.COMPUTE,
+                             provider=CloudProvider.AWS, instance_type="t3.xlarge", monthly_cost=150.0)
+    db_session.add(resource)
+    db_session.commit()
+
+    resource.cpu_utilization = 40.0
+    db_session.commit()
+    assert db_session.query(CostHistory).count() == 1
+
+    resource.monthly_cost = 175.0
+    db_session.commit()
+    assert db_session.query(CostHistory).count() == 2
+
+    today = datetime.now(timezone.utc).date()
+    trend = CostHistoryService().get_trend(db_session, "day", 1, "provider", end=today)
+    assert trend["buckets"][0]["total_cost"] == 175.0
+    assert trend["buckets"][0]["groups"] == {"aws": {"cost": 175.0, "count": 1}}
+
+def test_rollups_keep_latest_observation_per_bucket(db_session):
+    """Test monthly rollups with type changes and out-of-order observations."""
+    service = CostHistoryService()
+    service.record(db_session, [
+        Observation(1, _at(2026, 1, 5), ResourceType.COMPUTE, CloudProvider.AWS, 100.0),
+        Observation(2, _at(2026, 1, 6), ResourceType.STORAGE, CloudProvider.GCP, 40.0),
+        Observation(1, _at(2026, 1, 20), ResourceType.DATABASE, CloudProvider.AWS, 120.0),
+        Observation(1, _at(2026, 2, 3), ResourceType.DATABASE, CloudProvider.AWS, 130.0),
+    ])
+    # Older than the January 20th observation: stored, but not the bucket's latest.
+    service.record(db_session, [Observation(1, _at(2026, 1, 10), ResourceType.COMPUTE, CloudProvider.AWS, 999.0)])
+    # Re-recording an existing observation is a no-op.
+    assert service.record(db_session, [Observation(2, _at(2026, 1, 6), ResourceType.STORAGE, CloudProvider.GCP, 40.0)]) == 0
+    db_session.commit()
+
+    trend = service.get_trend(db_session, "month", 3, "resource_type", end=date(2026, 2, 14))
+    assert [bucket["bucket"] for bucket in trend["buckets"]] == ["2025-12-01", "2026-01-01", "2026-02-01"]
+    december, january, february = trend["buckets"]
+    assert december["total_cost"] == 0.0 and december["groups"] == {}
+    assert january["total_cost"] == 160.0
+    assert january["groups"] == {"database": {"cost": 120.0, "count": 1}, "storage": {"cost": 40.0, "count": 1}}
+    assert february["groups"] == {"database": {"cost": 130.0, "count": 1}}
+    assert db_session.query(CostHistory).count() == 5
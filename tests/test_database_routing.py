@@ -0,0 +1,54 @@
+from sqlalchemy import create_engine, text
+from starlette.requests import Request
+from app.database import ReplicaRouter, open_read_session
+
+def _request(headers=None):
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw_headers})
+
+def _replica(path, version):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE data_version (id INTEGER PRIMARY KEY, version INTEGER)"))
+        connection.execute(text("INSERT INTO data_version VALUES (1, :v)"), {"v": version})
+    engine.dispose()
+    return f"sqlite:///{path}"
+
+def test_replicas_are_used_round_robin(tmp_path):
+    """Test that reads rotate across healthy replicas."""
+    router = ReplicaRouter([_replica(tmp_path / "a.db", 5), _replica(tmp_path / "b.db", 5)])
+    sources = []
+    for _ in range(4):
+        db, source = open_read_session(_request(), router)
+        db.close()
+        sources.append(source)
+    assert sources == ["replica-0", "replica-1", "replica-0", "replica-1"]
+
+def test_unhealthy_replica_is_skipped(tmp_path):
+    """Test that a replica marked unhealthy is skipped until rechecked."""
+    router = ReplicaRouter([_replica(tmp_path / "a.db", 5), _replica(tmp_path / "b.db", 5)])
+    router.mark_unhealthy(0)
+    for _ in range(3):
+        db, source = open_read_session(_request(), router)
+        db.close()
+        assert source == "replica-1"
+
+def test_read_your_writes_falls_back_to_primary(tmp_path):
+    """Test that a stale replica is bypassed when the client requires a newer version."""
+    router = ReplicaRouter([_replica(tmp_path / "a.db", 5)])
+
+    db, source = open_read_session(_request({"X-Min-Data-Version": "5"}), router)
+    db.close()
+    assert source == "replica-0"
+
+    db, source = open_read_session(_request({"X-Min-Data-Version": "6"}), router)
+    db.close()
+    assert source == "primary"
+
+def test_replica_engines_get_sqlite_setup(tmp_path):
+    """Test that replica engines are configured like the primary, plus pre-ping."""
+    router = ReplicaRouter([_replica(tmp_path / "a.db", 5)])
+    replica = router.engines[0]
+    assert replica.pool._pre_ping
+    with replica.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
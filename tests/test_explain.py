@@ -0,0 +1,50 @@
+from sqlalchemy import select
+from app import explain
+from app.config import settings
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.models.recommendation import Recommendation, RecommendationStatus
+
+def _resource(name):
+    return CloudResource(name=name, resource_type=ResourceType.COMPUTE, provider=CloudProvider.AWS,
+                         instance_type="m5.large", cpu_utilization=10.0, memory_utilization=20.0,
+                         monthly_cost=100.0)
+
+def test_captures_query_plans_inside_the_context_only(db_session):
+    """Test that statements are explained while capturing and not otherwise."""
+    db_session.add(_resource("web-1"))
+    db_session.commit()
+
+    with explain.capturing() as statements:
+        db_session.execute(select(CloudResource)).all()
+        db_session.execute(select(Recommendation).where(Recommendation.status == RecommendationStatus.ACTIVE)).all()
+    db_session.execute(select(CloudResource)).all()
+
+    assert len(statements) == 2
+    scan, search = statements
+    assert scan["plan"] == ["SCAN cloud_resources"]
+    assert search["plan"][0].startswith("SEARCH recommendations USING INDEX")
+    assert all(statement["duration_ms"] >= 0 for statement in statements)
+
+def test_writes_are_explained_once_and_applied_once(db_session):
+    """Test that explaining a write records its plan and row count without repeating it."""
+    db_session.add(_resource("web-1"))
+    db_session.commit()
+
+    with explain.capturing() as statements:
+        db_session.query(CloudResource).update({CloudResource.monthly_cost: CloudResource.monthly_cost + 1})
+    db_session.commit()
+
+    [update] = [statement for statement in statements if statement["statement"].startswith("UPDATE")]
+    assert update["rowcount"] == 1 and update["plan"]
+    assert db_session.query(CloudResource).one().monthly_cost == 101.0
+
+def test_save_and_load_capture(tmp_path, monkeypatch):
+    """Test that captures round-trip through EXPLAIN_DIR and only valid ids are read."""
+    monkeypatch.setattr(settings, "EXPLAIN_DIR", str(tmp_path))
+    capture_id = explain.new_capture_id()
+    explain.save_capture(capture_id, "GET", "/api/v1/resources", [{"statement": "SELECT 1", "plan": []}])
+
+    capture = explain.load_capture(capture_id)
+    assert capture["request"] == "GET /api/v1/resources" and capture["statement_count"] == 1
+    assert explain.load_capture("0" * 16) is None
+    assert explain.load_capture("../" + capture_id) is None
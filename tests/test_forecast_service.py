@@ -0,0 +1,63 @@
+from datetime import date, datetime, timezone
+import numpy as np
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.services.cost_history_service import CostHistoryService, Observation
+from app.services.forecast_service import ForecastService, HistoryMatrix, load_history_matrix
+from app.services.resource_lifecycle import ResourceLifecycleService
+
+def _matrix(rows):
+    values = np.array(rows, dtype=np.float64)
+    return HistoryMatrix(np.arange(len(rows)), np.zeros(len(rows), dtype=np.int8),
+                         [date(2026, m, 1) for m in range(1, values.shape[1] + 1)], values)
+
+def _resource(db_session, name, resource_type=ResourceType.COMPUTE, provider=CloudProvider.AWS):
+    resource = CloudResource(name=name, resource_type=resource_type, provider=provider,
+                             instance_type="m5.large", monthly_cost=100.0)
+    db_session.add(resource)
+    return resource
+
+def test_linear_forecast_extends_trend():
+    """Test that the batched least-squares fit follows each row's trend."""
+    service = ForecastService()
+    fitted = service.fit(_matrix([[10, 20, 30, 40], [50, 50, 50, 50], [np.nan, np.nan, 5, 7]]), "linear")
+    projected = service.project(fitted, 2)
+    assert np.allclose(projected, [[50, 60], [50, 50], [9, 11]])
+
+def test_seasonal_naive_repeats_last_year():
+    """Test that seasonal naive uses the value from twelve months earlier."""
+    service = ForecastService()
+    history = _matrix([list(range(1, 13))])
+    projected = service.project(service.fit(history, "seasonal_naive"), 3)
+    assert projected.tolist() == [[1, 2, 3]]
+
+def test_exponential_forecast_is_flat_for_constant_cost():
+    """Test that Holt smoothing on a constant series projects the constant."""
+    service = ForecastService()
+    projected = service.project(service.fit(_matrix([[80, 80, 80, 80, 80]]), "exponential"), 4)
+    assert np.allclose(projected, 80)
+
+def test_history_matrix_uses_latest_observation_per_month(db_session):
+    """Test pivoting history into a carried-forward monthly matrix."""
+    _resource(db_session, "web-1")
+    _resource(db_session, "data-1", ResourceType.STORAGE, CloudProvider.GCP)
+    db_session.commit()
+    CostHistoryService().record(db_session, [
+        Observation(1, datetime(2026, 1, 3, tzinfo=timezone.utc), ResourceType.COMPUTE, CloudProvider.AWS, 100.0),
+        Observation(1, datetime(2026, 1, 20, tzinfo=timezone.utc), ResourceType.COMPUTE, CloudProvider.AWS, 110.0),
+        Observation(2, datetime(2026, 2, 9, tzinfo=timezone.utc), ResourceType.STORAGE, CloudProvider.GCP, 30.0),
+    ])
+    history = load_history_matrix(db_session, 3, end=date(2026, 3, 15))
+    assert history.resource_ids.tolist() == [1, 2]
+    assert np.array_equal(history.values, [[110, 110, 110], [np.nan, 30, 30]], equal_nan=True)
+
+def test_decommissioned_resources_are_not_forecast(db_session):
+    """Test that decommissioning a resource removes its cost from the forecast."""
+    resources = [_resource(db_session, f"web-{index}") for index in range(2)]
+    db_session.commit()
+    service = ForecastService()
+    before = service.get_forecast(db_session, horizon=2, history_months=4)
+    assert before["resources_forecast"] == 2 and before["total"] == [200.0, 200.0]
+
+    ResourceLifecycleService().decommission(db_session, resources[0].id)
+    after = service.get_forecast(db_session, horizon=2, history_months=4)
+    assert after["resources_forecast"] == 1 and after["total"] == [100.0, 100.0]
@@ -0,0 +1,19 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import sessionmaker
+from app.services.job_schedule import claim_job
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+def test_each_round_is_claimed_by_one_worker(db_session):
+    """Test that of several workers whose timers fire together only one runs the job."""
+    other = sessionmaker(bind=db_session.get_bind())()
+    try:
+        assert claim_job(db_session, "snapshot", 24, now=NOW)
+        assert not claim_job(other, "snapshot", 24, now=NOW + timedelta(minutes=5))
+        assert claim_job(other, "archive", 24, now=NOW)
+
+        next_round = NOW + timedelta(hours=24, seconds=1)
+        assert claim_job(other, "snapshot", 24, now=next_round)
+        assert not claim_job(db_session, "snapshot", 24, now=next_round)
+    finally:
+        other.close()
@@ -0,0 +1,214 @@
+"""
+Performance budgets for the API routes.
+
+Each read route runs in-process against the same seeded fleet of FLEET_SIZE
+resources, and each write against a freshly seeded one, and must stay within a budget of SQL statements, peak memory
+allocated while serving it (tracemalloc), and wall time. Wall time is
+expressed in calibration units, the time this machine takes for a fixed
+pure-Python loop, so the budgets hold on faster and slower machines alike.
+
+Statement budgets are tight: an N+1 query pattern blows through them at this
+fleet size. Memory and time budgets leave a few times headroom over the
+measured values, enough for noise but not for an accidental O(n^2) loop.
+Cached results are bypassed so the work behind each route is measured.
+"""
+
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from app.api import routes
+from app.database import Base, create_database_engine, get_db, get_read_db
+from app.main import app
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.services.allocation_service import AllocationService
+from app.services.cost_history_service import CostHistoryService
+from app.services.result_cache import LocalResultCache
+
+FLEET_SIZE = 1000
+RUNS = 5
+
+INSTANCE_TYPES = {
+    CloudProvider.AWS: ["t3.large", "t3.xlarge", "m5.large", "m5.xlarge", "c5.large"],
+    CloudProvider.AZURE: ["Standard_D2s_v3", "Standard_D4s_v3"],
+    CloudProvider.GCP: ["n1-standard-2", "n1-standard-4"],
+}
+
+# (method, path, body, max statements, max peak KiB, max calibration units)
+BUDGETS = [
+    ("GET", "/api/v1/resources", None, 2, 15000, 20),
+    ("GET", "/api/v1/resources?fields=id,name,monthly_cost", None, 2, 2000, 4),
+    ("GET", "/api/v1/resources?status=over-provisioned&sort=-health", None, 2, 5000, 10),
+    ("GET", "/api/v1/resources/search?q=web-1", None, 5, 300, 3),
+    ("GET", "/api/v1/resources/17", None, 2, 200, 2),
+    ("GET", "/api/v1/resources/17/health", None, 3, 200, 2),
+    ("GET", "/api/v1/recommendations", None, 4, 2000, 5),
+    ("GET", "/api/v1/recommendations/top?k=20", None, 2, 300, 2),
+    ("GET", "/api/v1/analytics/cost-summary", None, 3, 200, 2),
+    ("GET", "/api/v1/analytics/cost-by-tag?group_by=team", None, 3, 250, 2),
+    ("GET", "/api/v1/analytics/cost-trend?granularity=month&periods=12", None, 2, 300, 2),
+    ("GET", "/api/v1/analytics/forecast?horizon=3", None, 2, 300, 2),
+    ("GET", "/api/v1/analytics/anomalies", None, 4, 150, 2),
+    ("POST", "/api/v1/analytics/what-if",
+     {"cpu_thresholds": [10, 20, 30, 40], "memory_thresholds": [30, 50, 70], "storage_thresholds": [250, 500]},
+     2, 200, 2),
+    ("GET", "/api/v1/hierarchy", None, 3, 200, 2),
+    ("GET", "/api/v1/rules/thresholds", None, 2, 200, 2),
+]
+
+def _seed(session) -> None:
+    rng = random.Random(42)
+    types = list(ResourceType)
+    providers = list(CloudProvider)
+    teams = ["web", "data", "platform", "ml", "payments"]
+    resources = []
+    for i in range(FLEET_SIZE):
+        resource_type = types[i % len(types)]
+        provider = providers[i % len(providers)]
+        resources.append(CloudResource(
+            name=f"{['web', 'api', 'db', 'cache'][i % 4]}-{i}",
+            resource_type=resource_type,
+            provider=provider,
+            instance_type=rng.choice(INSTANCE_TYPES[provider]),
+            region=rng.choice(["us-east-1", "eu-west-1"]),
+            cpu_utilization=round(rng.uniform(1, 95), 1),
+            memory_utilization=round(rng.uniform(5, 95), 1),
+            storage_usage=round(rng.uniform(50, 2000), 1) if resource_type == ResourceType.STORAGE else None,
+            monthly_cost=round(rng.uniform(20, 800), 2),
+            tags={"team": teams[i % len(teams)], "environment": rng.choice(["prod", "staging"])},
+        ))
+    session.add_all(resources)
+    session.commit()
+
+    # A year of monthly observations for the trend and forecast routes.
+    now = datetime.now(timezone.utc)
+    for months_ago in range(12, 0, -1):
+        CostHistoryService().observe(session, resources, now=now - timedelta(days=30 * months_ago))
+    session.commit()
+
+    allocation = AllocationService()
+    org = allocation.create_node(session, "company")
+    for team in teams:
+        allocation.create_node(session, team, parent_id=org.id, tag_key="team", tag_value=team)
+    session.commit()
+
+@contextmanager
+def _seeded_client(monkeypatch):
+    engine = create_database_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed_session = Session()
+    _seed(seed_session)
+    seed_session.close()
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    statements = []
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_db)
+    monkeypatch.setitem(app.dependency_overrides, get_read_db, override_db)
+    # A cache with no slots computes every result, so the measured work is real.
+    no_cache = LocalResultCache(0)
+    monkeypatch.setattr(routes, "get_result_cache", lambda: no_cache)
+    try:
+        # Not entered as a context manager, so the app's own startup (and its database) is skipped.
+        test_client = TestClient(app)
+        test_client.statements = statements
+        yield test_client
+    finally:
+        engine.dispose()
+
+@pytest.fixture(scope="module")
+def client():
+    """Client for the read-only routes, sharing one seeded fleet."""
+    with pytest.MonkeyPatch.context() as monkeypatch, _seeded_client(monkeypatch) as test_client:
+        yield test_client
+
+@pytest.fixture
+def write_client(monkeypatch):
+    """Client with a seeded fleet of its own, for tests that change the fleet."""
+    with _seeded_client(monkeypatch) as test_client:
+        yield test_client
+
+def _calibration_loop() -> int:
+    total = 0
+    for i in range(100_000):
+        total += i * i % 7
+    return total
+
+@pytest.fixture(scope="module")
+def calibration_unit() -> float:
+    """Seconds this machine takes for the calibration loop, best of several runs."""
+    return min(_timed(_calibration_loop) for _ in range(RUNS))
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def measure(client, requests):
+    """
+    Serve the first request to warm per-process caches, then return the
+    statement count of the second, the peak KiB allocated by the third and
+    the best wall time of the rest. ``requests`` yields callables.
+    """
+    requests = iter(requests)
+    next(requests)()
+    del client.statements[:]
+    next(requests)()
+    statement_count = len(client.statements)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        next(requests)()
+        peak_kib = (tracemalloc.get_traced_memory()[1] - baseline) / 1024
+    finally:
+        tracemalloc.stop()
+
+    best = min(_timed(request) for request in requests)
+    return statement_count, peak_kib, best
+
+def _check(client, calibration_unit, measured, max_statements, max_kib, max_units):
+    statements, peak_kib, seconds = measured
+    units = seconds / calibration_unit
+    assert statements <= max_statements, f"{statements} SQL statements:\n" + "\n".join(client.statements)
+    assert peak_kib <= max_kib, f"{peak_kib:.0f} KiB allocated at peak"
+    assert units <= max_units, f"{units:.1f} calibration units ({seconds * 1000:.1f} ms)"
+
+@pytest.mark.parametrize("method,path,body,max_statements,max_kib,max_units", BUDGETS,
+                         ids=[f"{method} {path}" for method, path, *_ in BUDGETS])
+def test_route_budget(client, calibration_unit, method, path, body, max_statements, max_kib, max_units):
+    """Test that a route stays within its statement, memory and latency budgets."""
+    def request():
+        response = client.request(method, path, json=body)
+        assert response.status_code == 200, response.text
+
+    measured = measure(client, [request] * (3 + RUNS))
+    _check(client, calibration_unit, measured, max_statements, max_kib, max_units)
+
+def test_decommission_budget(write_client, calibration_unit):
+    """Test that a write, with every resource write handler, stays within budget."""
+    # Each request decommissions another resource.
+    def request_for(resource_id):
+        def request():
+            response = write_client.delete(f"/api/v1/resources/{resource_id}")
+            assert response.status_code == 200, response.text
+        return request
+
+    measured = measure(write_client, [request_for(resource_id) for resource_id in range(900, 903 + RUNS)])
+    _check(write_client, calibration_unit, measured, 40, 500, 4)
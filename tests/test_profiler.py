@@ -0,0 +1,77 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.main import app
+from app.profiler import ProfilerBusy, profiling, to_collapsed, to_speedscope
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+def idle_wait(stop):
+    stop.wait()
+
+def run_threads(interval=0.002, include_idle=False, seconds=0.2):
+    stop = threading.Event()
+    threads = [threading.Thread(target=busy_loop, args=(stop,), name="busy"),
+               threading.Thread(target=idle_wait, args=(stop,), name="idle")]
+    for thread in threads:
+        thread.start()
+    try:
+        with profiling(interval, include_idle) as profiler:
+            time.sleep(seconds)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return profiler
+
+def test_samples_busy_threads_and_skips_idle_ones():
+    """Test that running code is sampled and threads waiting for work are not."""
+    profiler = run_threads()
+    threads = {thread for thread, _ in profiler.stacks}
+    assert "busy" in threads and "idle" not in threads
+    assert profiler.samples > 10
+
+    lines = to_collapsed(profiler).splitlines()
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy and all("busy_loop (tests/test_profiler.py:" in line for line in busy)
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+
+def test_idle_threads_included_on_request():
+    """Test that idle stacks are kept when asked for."""
+    profiler = run_threads(include_idle=True)
+    assert "idle" in {thread for thread, _ in profiler.stacks}
+
+def test_speedscope_document_references_shared_frames():
+    """Test the speedscope rendering: one sampled profile per thread over shared frames."""
+    profiler = run_threads()
+    document = to_speedscope(profiler, "test")
+    frames = document["shared"]["frames"]
+    [busy] = [profile for profile in document["profiles"] if profile["name"] == "busy"]
+    assert busy["type"] == "sampled" and len(busy["samples"]) == len(busy["weights"])
+    assert busy["endValue"] == pytest.approx(sum(busy["weights"]))
+    assert all(0 <= index < len(frames) for sample in busy["samples"] for index in sample)
+    assert all(any(frames[index]["name"] == "busy_loop" for index in sample) for sample in busy["samples"])
+
+def test_only_one_profile_at_a_time():
+    """Test that a second concurrent profile is refused."""
+    with profiling(0.01):
+        with pytest.raises(ProfilerBusy):
+            with profiling(0.01):
+                pass
+    with profiling(0.01):
+        pass
+
+def test_debug_endpoints_require_admin_token(monkeypatch):
+    """Test that the profile endpoint is hidden without a token and checks it otherwise."""
+    client = TestClient(app)
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "")
+    assert client.get("/debug/profile?seconds=0.01").status_code == 404
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/debug/profile?seconds=0.01", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    response = client.get("/debug/profile?seconds=0.05", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
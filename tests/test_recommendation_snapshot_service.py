@@ -0,0 +1,78 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.config import settings
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.models.recommendation_snapshot import RecommendationSnapshot
+from app.schemas import OptimizationRecommendation
+from app.services.recommendation_snapshot_service import (
+    RecommendationSnapshotService, decode_recommendations, diff_columns, encode_recommendations
+)
+
+def _recommendation(resource_id, recommendation_type="downsize", savings=45.0, action="Downsize to m5.medium"):
+    return OptimizationRecommendation(
+        resource_id=resource_id, resource_name=f"res-{resource_id}", current_cost=100.0,
+        recommendation_type=recommendation_type, description="Over-provisioned", recommended_action=action,
+        estimated_savings=savings, confidence_level="high",
+    )
+
+def _resource(name, cpu):
+    return CloudResource(name=name, resource_type=ResourceType.COMPUTE, provider=CloudProvider.AWS,
+                         instance_type="m5.large", cpu_utilization=cpu, memory_utilization=20.0,
+                         monthly_cost=100.0)
+
+def test_columns_round_trip_sorted_by_key():
+    """Test that encoded snapshots decode to the same rows, sorted by (resource_id, type)."""
+    rows = [_recommendation(3), _recommendation(1, "terminate"), _recommendation(1, "downsize")]
+    columns = decode_recommendations(encode_recommendations(rows))
+
+    assert list(zip(columns.resource_id, columns.strings["recommendation_type"])) == [
+        (1, "downsize"), (1, "terminate"), (3, "downsize")]
+    assert columns.row(2) == rows[0]
+
+def test_diff_merges_added_removed_and_changed():
+    """Test the merge: keys on one side only are added or removed, differing rows are changed."""
+    before = decode_recommendations(encode_recommendations([
+        _recommendation(1), _recommendation(2), _recommendation(4, "terminate", savings=80.0),
+    ]))
+    after = decode_recommendations(encode_recommendations([
+        _recommendation(2), _recommendation(3), _recommendation(4, "terminate", savings=90.0),
+    ]))
+    result = diff_columns(before, after)
+
+    assert [row.resource_id for row in result["added"]] == [3]
+    assert [row.resource_id for row in result["removed"]] == [1]
+    [changed] = result["changed"]
+    assert (changed["resource_id"], changed["recommendation_type"]) == (4, "terminate")
+    assert changed["before"].estimated_savings == 80.0 and changed["savings_change"] == 10.0
+
+def test_snapshots_diff_between_runs(db_session):
+    """Test that snapshots of the live summary diff to the recommendations that changed in between."""
+    db_session.add_all([_resource("idle-1", 10.0), _resource("busy-1", 80.0)])
+    db_session.commit()
+    service = RecommendationSnapshotService()
+    first = service.take_snapshot(db_session)
+
+    busy = db_session.query(CloudResource).filter_by(name="busy-1").one()
+    busy.cpu_utilization = 10.0
+    db_session.commit()
+    second = service.take_snapshot(db_session)
+
+    result = service.diff(db_session, first.id)
+    assert result["to_snapshot"].id == second.id
+    assert [(row.resource_name, row.recommendation_type) for row in result["added"]] == [("busy-1", "downsize")]
+    assert result["removed"] == [] and result["changed"] == []
+    assert result["savings_change"] == 45.0
+    with pytest.raises(LookupError):
+        service.diff(db_session, first.id, 999)
+
+def test_prune_keeps_recent_snapshots_and_the_newest(db_session, monkeypatch):
+    """Test that snapshots past the retention period are deleted, except the newest one."""
+    monkeypatch.setattr(settings, "RECOMMENDATION_SNAPSHOT_RETENTION_DAYS", 30)
+    service = RecommendationSnapshotService()
+    now = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    for days_ago in (100, 60, 10):
+        service.take_snapshot(db_session, now=now - timedelta(days=days_ago))
+    assert db_session.query(RecommendationSnapshot).count() == 1
+
+    service.take_snapshot(db_session, now=now)
+    assert db_session.query(RecommendationSnapshot).count() == 2
@@ -0,0 +1,121 @@
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.models.recommendation import Recommendation, RecommendationStatus
+from app.services.optimization_service import OptimizationService
+from app.services.recommendation_store import RecommendationStore
+from app.services.resource_events import get_data_version
+
+def _resource(name, **overrides):
+    values = dict(
+        name=name,
+        resource_type=ResourceType.COMPUTE,
+        provider=CloudProvider.AWS,
+        instance_type="t3.xlarge",
+        cpu_utilization=15.0,
+        memory_utilization=25.0,
+        monthly_cost=150.0,
+    )
+    values.update(overrides)
+    return CloudResource(**values)
+
+def test_recommendations_persisted_on_insert(db_session):
+    """Test that inserting a resource materializes its recommendations."""
+    db_session.add(_resource("web-server-1"))
+    db_session.commit()
+
+    rows = db_session.query(Recommendation).all()
+    assert [row.recommendation_type for row in rows] == ["downsize"]
+    assert rows[0].status == RecommendationStatus.ACTIVE
+    assert rows[0].version == get_data_version(db_session) == 1
+
+def test_only_touched_resources_change_version(db_session):
+    """Test that an update re-stamps only the recommendations that changed."""
+    first = _resource("web-server-1")
+    second = _resource("web-server-2")
+    db_session.add_all([first, second])
+    db_session.commit()
+
+    first.monthly_cost = 300.0
+    db_session.commit()
+
+    delta = RecommendationStore().get_changes_since(db_session, 1)
+    assert delta.current_version == 2
+    assert [(c.resource_name, c.change_type) for c in delta.changes] == [("web-server-1", "changed")]
+
+def test_resolved_and_created_changes(db_session):
+    """Test that resolved recommendations are reported as tombstones."""
+    idle = _resource("idle-server", cpu_utilization=5.0, memory_utilization=10.0)
+    db_session.add(idle)
+    db_session.commit()
+
+    idle.cpu_utilization = 75.0
+    idle.memory_utilization = 80.0
+    db_session.add(_resource("new-server"))
+    db_session.commit()
+
+    changes = {(c.resource_name, c.recommendation_type): c.change_type
+               for c in RecommendationStore().get_changes_since(db_session, 1).changes}
+    assert changes == {
+        ("idle-server", "downsize"): "resolved",
+        ("idle-server", "terminate"): "resolved",
+        ("new-server", "downsize"): "created",
+    }
+
+def test_deleted_resource_resolves_recommendations(db_session):
+    """Test that deleting a resource resolves its recommendations."""
+    resource = _resource("web-server-1")
+    db_session.add(resource)
+    db_session.commit()
+
+    db_session.delete(resource)
+    db_session.commit()
+
+    row = db_session.query(Recommendation).one()
+    assert row.status == RecommendationStatus.RESOLVED
+    assert row.version == 2
+
+def test_fleet_aggregates_track_writes(db_session):
+    """Test that running aggregates match a full re-analysis after writes."""
+    first = _resource("web-server-1")
+    storage = _resource("log-storage", resource_type=ResourceType.STORAGE, provider=CloudProvider.GCP,
+                        instance_type="standard", cpu_utilization=None, memory_utilization=None,
+                        storage_usage=800.0, monthly_cost=100.0)
+    db_session.add_all([first, storage, _resource("web-server-2", monthly_cost=80.0)])
+    db_session.commit()
+
+    first.provider = CloudProvider.AZURE
+    first.monthly_cost = 200.0
+    db_session.delete(storage)
+    db_session.commit()
+
+    store = RecommendationStore()
+    summary = store.get_summary(db_session)
+    expected = OptimizationService().analyze_resources(db_session)
+    assert summary.total_resources == expected.total_resources == 2
+    assert summary.total_monthly_cost == expected.total_monthly_cost == 280.0
+    assert summary.total_potential_savings == round(expected.total_potential_savings, 2)
+    assert len(summary.recommendations) == len(expected.recommendations)
+
+    cost_summary = store.get_cost_summary(db_session)
+    assert cost_summary["cost_by_provider"] == {
+        "aws": {"count": 1, "cost": 80.0},
+        "azure": {"count": 1, "cost": 200.0},
+    }
+    assert cost_summary["cost_by_type"] == {"compute": {"count": 2, "cost": 280.0}}
+
+def test_top_recommendations(db_session):
+    """Test top-K ranking with provider and type filters."""
+    db_session.add_all([
+        _resource("small", instance_type="c5.large", monthly_cost=100.0),
+        _resource("large", instance_type="c5.large", monthly_cost=400.0),
+        _resource("idle", provider=CloudProvider.GCP, instance_type="n1-standard-2",
+                  cpu_utilization=5.0, memory_utilization=10.0, monthly_cost=200.0),
+    ])
+    db_session.commit()
+
+    store = RecommendationStore()
+    top = store.get_top(db_session, 2)
+    assert [(r.resource_name, r.recommendation_type) for r in top] == [
+        ("idle", "terminate"), ("large", "downsize")
+    ]
+    assert [r.resource_name for r in store.get_top(db_session, 5, provider=CloudProvider.AWS)] == ["large", "small"]
+    assert [r.resource_name for r in store.get_top(db_session, 5, recommendation_type="terminate")] == ["idle"]
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import select
+from app import explain
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.services.optimization_service import OptimizationService
+from app.services.resource_filters import resource_clauses
+
+UTILIZATIONS = [None, 0.0, 10.0, 19.9, 20.0, 29.9, 30.0, 50.0, 80.0, 80.1, 85.0, 85.1, 99.0]
+
+def _resource(name, cpu, memory, cost=100.0):
+    return CloudResource(name=name, resource_type=ResourceType.COMPUTE, provider=CloudProvider.AWS,
+                         instance_type="m5.large", cpu_utilization=cpu, memory_utilization=memory,
+                         monthly_cost=cost)
+
+def _names(db, **filters):
+    where, order_by = resource_clauses(**filters)
+    return [resource.name for resource in db.query(CloudResource).filter(*where).order_by(*order_by)]
+
+@pytest.fixture
+def fleet(db_session):
+    db_session.add_all([
+        _resource("idle", 5.0, 10.0, cost=300.0),       # 45, over-provisioned
+        _resource("low-cpu", 10.0, 50.0, cost=50.0),    # 70, over-provisioned
+        _resource("balanced", 50.0, 50.0, cost=200.0),  # 100, optimal
+        _resource("hot", 90.0, 90.0, cost=100.0),       # 65, under-provisioned
+    ])
+    db_session.commit()
+    return db_session
+
+def test_stored_health_matches_the_health_rules(db_session):
+    """Test that the generated columns agree with get_resource_health_score for every threshold edge."""
+    resources = [_resource(f"r-{i}-{j}", cpu, memory)
+                 for i, cpu in enumerate(UTILIZATIONS) for j, memory in enumerate(UTILIZATIONS)]
+    db_session.add_all(resources)
+    db_session.commit()
+
+    service = OptimizationService()
+    for resource in resources:
+        health = service.get_resource_health_score(resource)
+        assert (resource.health_score, resource.health_status) == (health["score"], health["status"]), resource.name
+
+def test_health_follows_updates(fleet):
+    """Test that the stored score is recomputed when utilization is written."""
+    resource = fleet.query(CloudResource).filter_by(name="hot").one()
+    resource.cpu_utilization = 50.0
+    resource.memory_utilization = 50.0
+    fleet.commit()
+    fleet.refresh(resource)
+    assert (resource.health_score, resource.health_status) == (100, "optimal")
+
+def test_filters_and_sorts(fleet):
+    """Test health range and status filters and the sort options."""
+    assert _names(fleet, max_health=70, sort="-monthly_cost") == ["idle", "hot", "low-cpu"]
+    assert _names(fleet, min_health=65, max_health=70, sort="health") == ["hot", "low-cpu"]
+    assert _names(fleet, health_status="over-provisioned", sort="-health") == ["low-cpu", "idle"]
+    for bad in ({"min_health": 80, "max_health": 20}, {"health_status": "broken"}, {"sort": "name"}):
+        with pytest.raises(ValueError):
+            resource_clauses(**bad)
+
+def test_health_queries_use_the_indexes(fleet):
+    """Test that health filters and ordering are served by an index rather than a scan and sort."""
+    for filters in ({"max_health": 50, "sort": "health"}, {"health_status": "optimal", "sort": "health"}):
+        where, order_by = resource_clauses(**filters)
+        with explain.capturing() as statements:
+            fleet.execute(select(CloudResource.id).where(*where).order_by(*order_by)).all()
+        plan = " ".join(statements[0]["plan"])
+        assert "INDEX ix_cloud_resources_health" in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.models.archived_resource import ArchivedResource
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider, ResourceLifecycleState
+from app.models.recommendation import Recommendation, RecommendationStatus
+from app.services.recommendation_store import RecommendationStore
+from app.services.resource_filters import resource_clauses
+from app.services.resource_lifecycle import ResourceLifecycleService
+from app.services.search_service import SearchService
+from app.services.tag_service import TagService
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+def _resource(name, cost=150.0):
+    return CloudResource(name=name, resource_type=ResourceType.COMPUTE, provider=CloudProvider.AWS,
+                         instance_type="t3.xlarge", cpu_utilization=15.0, memory_utilization=25.0,
+                         monthly_cost=cost, tags={"team": "web"})
+
+@pytest.fixture
+def fleet(db_session):
+    db_session.add_all([_resource("web-1"), _resource("web-2", cost=50.0)])
+    db_session.commit()
+    return db_session
+
+def _id(db, name):
+    return db.query(CloudResource.id).filter_by(name=name).scalar()
+
+def test_decommission_removes_resource_from_derived_data(fleet):
+    """Test that a decommissioned resource leaves totals, recommendations, tags and search."""
+    resource = ResourceLifecycleService().decommission(fleet, _id(fleet, "web-1"), now=NOW)
+    assert resource.lifecycle_state == ResourceLifecycleState.DECOMMISSIONED
+
+    summary = RecommendationStore().get_cost_summary(fleet)
+    assert (summary["total_resources"], summary["total_monthly_cost"]) == (1, 50.0)
+    statuses = {row.resource_id: row.status for row in fleet.query(Recommendation)}
+    assert statuses[resource.id] == RecommendationStatus.RESOLVED
+    assert TagService().cost_by_tag(fleet, "team", {})["groups"] == [
+        {"value": "web", "total_cost": 50.0, "resource_count": 1}]
+    assert [row["name"] for row in SearchService().search(fleet, "web")["results"]] == ["web-2"]
+
+    where, _ = resource_clauses()
+    assert [r.name for r in fleet.query(CloudResource).filter(*where)] == ["web-2"]
+    where, _ = resource_clauses(lifecycle_state="decommissioned")
+    assert [r.name for r in fleet.query(CloudResource).filter(*where)] == ["web-1"]
+    with pytest.raises(ValueError):
+        resource_clauses(lifecycle_state="deleted")
+
+def test_decommission_is_idempotent(fleet):
+    """Test that decommissioning twice keeps the first timestamp and the totals."""
+    service = ResourceLifecycleService()
+    service.decommission(fleet, _id(fleet, "web-1"), now=NOW)
+    resource = service.decommission(fleet, _id(fleet, "web-1"), now=NOW + timedelta(days=3))
+    assert resource.decommissioned_at.replace(tzinfo=timezone.utc) == NOW
+    assert RecommendationStore().get_cost_summary(fleet)["total_resources"] == 1
+    with pytest.raises(LookupError):
+        service.decommission(fleet, 999)
+
+def test_archive_moves_only_expired_resources(fleet, monkeypatch):
+    """Test that the archival job moves rows decommissioned past the cutoff."""
+    monkeypatch.setattr("app.services.resource_lifecycle.settings.RESOURCE_ARCHIVE_AFTER_DAYS", 30)
+    service = ResourceLifecycleService()
+    old_id = _id(fleet, "web-1")
+    service.decommission(fleet, old_id, now=NOW - timedelta(days=31))
+    service.decommission(fleet, _id(fleet, "web-2"), now=NOW - timedelta(days=5))
+
+    assert service.archive(fleet, now=NOW) == 1
+    assert service.archive(fleet, now=NOW) == 0
+    assert fleet.get(CloudResource, old_id) is None
+    archived = fleet.get(ArchivedResource, old_id)
+    assert (archived.name, archived.monthly_cost, archived.tags) == ("web-1", 150.0, {"team": "web"})
+    assert [r.name for r in fleet.query(CloudResource)] == ["web-2"]
+    assert RecommendationStore().get_cost_summary(fleet)["total_resources"] == 0
@@ -0,0 +1,47 @@
+import json
+import pytest
+from sqlalchemy import event
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.services.resource_projection import parse_fields, projection_model, load_projected_resources
+
+def _add_resources(db):
+    db.add_all([
+        CloudResource(name="web-1", resource_type=ResourceType.COMPUTE, provider=CloudProvider.AWS,
+                      instance_type="m5.large", cpu_utilization=20.0, memory_utilization=30.0, monthly_cost=70.0),
+        CloudResource(name="data-1", resource_type=ResourceType.STORAGE, provider=CloudProvider.GCP,
+                      instance_type="pd-standard", size="1TB", storage_usage=900.0, monthly_cost=40.0),
+    ])
+    db.commit()
+
+def test_parse_fields_keeps_order_and_rejects_unknown():
+    """Test that fields are deduplicated in order and unknown names are rejected."""
+    assert parse_fields(None) is None
+    assert parse_fields("name, id,name") == ("name", "id")
+    with pytest.raises(ValueError):
+        parse_fields("name,password")
+    with pytest.raises(ValueError):
+        parse_fields(" , ")
+
+def test_projection_model_is_cached_per_field_set():
+    """Test that each field set builds its response model once."""
+    model = projection_model(("id", "monthly_cost"))
+    assert model is projection_model(("id", "monthly_cost"))
+    assert list(model.model_fields) == ["id", "monthly_cost"]
+
+def test_projected_payload_selects_only_requested_columns(db_session):
+    """Test that only the requested columns are queried and returned."""
+    _add_resources(db_session)
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        payload = json.loads(load_projected_resources(db_session, ("id", "provider", "monthly_cost")))
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+
+    assert sorted(payload, key=lambda row: row["id"]) == [
+        {"id": 1, "provider": "aws", "monthly_cost": 70.0},
+        {"id": 2, "provider": "gcp", "monthly_cost": 40.0},
+    ]
+    select_list = statements[-1].split("FROM")[0]
+    assert "provider" in select_list and "instance_type" not in select_list
@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+import threading
+import pytest
+from app.services import result_cache
+from app.services.result_cache import SharedResultCache, LocalResultCache, _digest
+
+pytestmark = pytest.mark.skipif(result_cache.fcntl is None, reason="shared cache needs fcntl")
+
+def _compute_in_child(path, queue):
+    cache = SharedResultCache(path, 1, 8)
+    queue.put(cache.get_or_compute("summary", 3, lambda: b"from child"))
+
+def test_results_are_shared_between_processes(tmp_path):
+    """Test that a result computed by one process is served to another."""
+    path = str(tmp_path / "cache")
+    cache = SharedResultCache(path, 1, 8)
+    assert cache.get_or_compute("summary", 3, lambda: b'{"total": 1}') == b'{"total": 1}'
+
+    queue = multiprocessing.get_context("spawn").Queue()
+    child = multiprocessing.get_context("spawn").Process(target=_compute_in_child, args=(path, queue))
+    child.start()
+    child.join(timeout=60)
+    assert queue.get(timeout=5) == b'{"total": 1}'
+
+def test_new_data_version_recomputes(tmp_path):
+    """Test that entries from an older data version are not served."""
+    cache = SharedResultCache(str(tmp_path / "cache"), 1, 8)
+    calls = []
+    compute = lambda: calls.append(1) or f"v{len(calls)}".encode()
+    assert cache.get_or_compute("cost-summary", 1, compute) == b"v1"
+    assert cache.get_or_compute("cost-summary", 1, compute) == b"v1"
+    assert cache.get_or_compute("cost-summary", 2, compute) == b"v2"
+    cache.clear()
+    assert cache.get_or_compute("cost-summary", 2, compute) == b"v3"
+
+def test_slow_computation_does_not_block_other_slots(tmp_path):
+    """Test that a miss being computed in one thread does not hold up other keys."""
+    cache = SharedResultCache(str(tmp_path / "cache"), 1, 8)
+    slot = lambda key: int.from_bytes(_digest(key)[:8], "little") % cache.slots
+    other = next(f"health:{index}" for index in range(100) if slot(f"health:{index}") != slot("cost-summary"))
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(timeout=10)
+        return b"summary"
+
+    worker = threading.Thread(target=cache.get_or_compute, args=("cost-summary", 1, slow))
+    worker.start()
+    try:
+        assert started.wait(timeout=10)
+        results = []
+        lookup = threading.Thread(target=lambda: results.append(cache.get_or_compute(other, 1, lambda: b"health")))
+        lookup.start()
+        lookup.join(timeout=5)
+        assert results == [b"health"]
+    finally:
+        release.set()
+        worker.join(timeout=10)
+    assert cache.get_or_compute("cost-summary", 1, lambda: b"recomputed") == b"summary"
+
+def test_oversized_results_are_returned_but_not_cached(tmp_path):
+    """Test that a result larger than a slot is still returned."""
+    cache = SharedResultCache(str(tmp_path / "cache"), 1, 64)
+    payload = os.urandom(64 * 1024)  # Incompressible, larger than a 16 KB slot
+    calls = []
+    compute = lambda: calls.append(1) or payload
+    assert cache.get_or_compute("big", 1, compute) == payload
+    assert cache.get_or_compute("big", 1, compute) == payload
+    assert len(calls) == 2
+
+def test_local_cache_is_bounded():
+    """Test that the per-process fallback evicts the least recently used entry."""
+    cache = LocalResultCache(2)
+    for key in ("a", "b", "c"):
+        cache.get_or_compute(key, 1, lambda: key.encode())
+    assert cache.get_or_compute("a", 1, lambda: b"recomputed") == b"recomputed"
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.models.recommendation import Recommendation, RecommendationStatus
+from app.models.rule_threshold import RuleThreshold
+from app.services.resource_events import get_data_version
+from app.services.rule_plan import THRESHOLD_FIELDS, RulePlan, default_thresholds
+from app.services.rule_threshold_service import RuleThresholdService
+
+def _override(resource_type=None, provider=None, **thresholds):
+    return {"resource_type": resource_type, "provider": provider, **dict.fromkeys(THRESHOLD_FIELDS), **thresholds}
+
+def _resource(name, resource_type=ResourceType.COMPUTE, provider=CloudProvider.AWS, cpu=35.0, memory=45.0):
+    return CloudResource(name=name, resource_type=resource_type, provider=provider, instance_type="m5.large",
+                         cpu_utilization=cpu, memory_utilization=memory, storage_usage=100.0, monthly_cost=100.0)
+
+def _active(db):
+    return sorted((row.resource_name, row.recommendation_type)
+                  for row in db.query(Recommendation).filter(Recommendation.status == RecommendationStatus.ACTIVE))
+
+@pytest.fixture
+def fleet(db_session):
+    db_session.add_all([
+        _resource("aws-compute"),
+        _resource("gcp-compute", provider=CloudProvider.GCP),
+        _resource("aws-database", resource_type=ResourceType.DATABASE),
+    ])
+    db_session.commit()
+    return db_session
+
+def test_most_specific_override_wins():
+    """Test that overrides apply fleet-wide, then by provider, type and pair."""
+    plan = RulePlan([
+        _override(ResourceType.COMPUTE, CloudProvider.AWS, downsize_cpu=40.0),
+        _override(ResourceType.COMPUTE, downsize_cpu=35.0, downsize_memory=60.0),
+        _override(provider=CloudProvider.AWS, downsize_cpu=20.0, storage_size=100.0),
+        _override(storage_rate=0.5),
+    ])
+    defaults = default_thresholds()
+
+    aws_compute = plan.thresholds(ResourceType.COMPUTE, CloudProvider.AWS)
+    assert (aws_compute.downsize_cpu, aws_compute.downsize_memory, aws_compute.storage_size) == (40.0, 60.0, 100.0)
+    assert plan.thresholds(ResourceType.COMPUTE, CloudProvider.GCP).downsize_cpu == 35.0
+    assert plan.thresholds(ResourceType.DATABASE, CloudProvider.AWS).downsize_cpu == 20.0
+    azure_cache = plan.thresholds(ResourceType.CACHE, CloudProvider.AZURE)
+    assert azure_cache == defaults._replace(storage_rate=0.5)
+    assert set(plan.changed_cells(RulePlan([]))) == set(plan.cells)
+
+def test_replace_reevaluates_only_changed_cells(fleet):
+    """Test that a change re-evaluates only the resources whose thresholds moved."""
+    assert _active(fleet) == []
+    version = get_data_version(fleet)
+
+    result = RuleThresholdService().replace(fleet, [
+        _override(ResourceType.COMPUTE, CloudProvider.AWS, downsize_cpu=40.0, downsize_memory=50.0),
+    ])
+    assert result["changed_cells"] == [{"resource_type": ResourceType.COMPUTE, "provider": CloudProvider.AWS}]
+    assert (result["resources_reevaluated"], result["recommendations_changed"]) == (1, 1)
+    assert _active(fleet) == [("aws-compute", "downsize")]
+    assert get_data_version(fleet) == version + 1
+
+    # Writes are evaluated against the new thresholds too.
+    fleet.add(_resource("aws-compute-2"))
+    fleet.commit()
+    assert _active(fleet) == [("aws-compute", "downsize"), ("aws-compute-2", "downsize")]
+
+def test_change_without_new_results_keeps_the_version(fleet):
+    """Test that cached results stay valid when no recommendation changes."""
+    version = get_data_version(fleet)
+    result = RuleThresholdService().replace(fleet, [_override(provider=CloudProvider.GCP, storage_size=50.0)])
+    assert (result["resources_reevaluated"], result["recommendations_changed"]) == (1, 0)
+    assert get_data_version(fleet) == version
+    with pytest.raises(ValueError):
+        RuleThresholdService().replace(fleet, [_override(provider=CloudProvider.GCP), _override(provider=CloudProvider.GCP)])
+
+def test_overrides_written_elsewhere_are_picked_up(fleet):
+    """Test that a plan compiled earlier is replaced once the table changes."""
+    RuleThresholdService().describe(fleet)
+    other = sessionmaker(bind=fleet.get_bind())()
+    other.add(RuleThreshold(revision="elsewhere", resource_type=ResourceType.DATABASE, downsize_cpu=40.0))
+    other.commit()
+    other.close()
+
+    database = fleet.query(CloudResource).filter_by(name="aws-database").one()
+    database.monthly_cost = 120.0
+    fleet.commit()
+    assert _active(fleet) == [("aws-database", "downsize")]
@@ -0,0 +1,66 @@
+import pytest
+from app.config import settings
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.services.search_service import SearchService
+
+def _resource(name):
+    return CloudResource(name=name, resource_type=ResourceType.COMPUTE, provider=CloudProvider.AWS,
+                         instance_type="m5.large", monthly_cost=100.0)
+
+def _names(db, query, **kwargs):
+    return [row["name"] for row in SearchService().search(db, query, **kwargs)["results"]]
+
+@pytest.fixture
+def fleet(db_session):
+    db_session.add_all(_resource(name) for name in [
+        "web-server-1", "Web", "web-api", "api-web-gateway", "cache-server", "legacy_web%1", "legacyXweb1",
+    ])
+    db_session.commit()
+    return db_session
+
+def test_ranks_exact_then_prefix_then_substring(fleet):
+    """Test that matches are case-insensitive and ranked exact, prefix, then substring."""
+    assert _names(fleet, "WEB") == ["Web", "web-api", "web-server-1", "api-web-gateway",
+                                    "legacyXweb1", "legacy_web%1"]
+
+def test_short_queries_match_prefixes_only(fleet):
+    """Test that queries below trigram length use the prefix index alone on SQLite."""
+    assert _names(fleet, "ca") == ["cache-server"]
+    assert _names(fleet, "er") == []
+
+def test_wildcards_are_literal(fleet):
+    """Test that LIKE and FTS syntax in the query is matched literally."""
+    assert _names(fleet, "legacy_") == ["legacy_web%1"]
+    assert _names(fleet, "web%1") == ["legacy_web%1"]
+    assert _names(fleet, 'web"') == []
+    with pytest.raises(ValueError):
+        SearchService().search(fleet, "  ")
+
+def test_index_follows_renames_and_deletes(fleet):
+    """Test that the name index is updated with the resource table."""
+    resource = fleet.query(CloudResource).filter_by(name="cache-server").one()
+    resource.name = "redis-primary"
+    fleet.delete(fleet.query(CloudResource).filter_by(name="api-web-gateway").one())
+    fleet.commit()
+
+    assert _names(fleet, "cache") == []
+    assert _names(fleet, "primary") == ["redis-primary"]
+    assert "api-web-gateway" not in _names(fleet, "web")
+
+def test_pagination_and_cap(fleet, monkeypatch):
+    """Test that pages slice the ranked matches and the cap is reported."""
+    assert _names(fleet, "web", limit=2, offset=1) == ["web-api", "web-server-1"]
+
+    monkeypatch.setattr(settings, "SEARCH_MAX_MATCHES", 3)
+    page = SearchService().search(fleet, "web")
+    assert (page["total"], page["truncated"]) == (3, True)
+    assert [row["name"] for row in page["results"]] == ["Web", "web-api", "web-server-1"]
+
+def test_capped_matches_are_the_first_by_name(db_session, monkeypatch):
+    """Test that a query over the cap keeps the same, first-ranked candidates."""
+    db_session.add_all(_resource(f"web-{suffix}") for suffix in "edcba")
+    db_session.commit()
+    monkeypatch.setattr(settings, "SEARCH_MAX_MATCHES", 2)
+    page = SearchService().search(db_session, "web")
+    assert (page["total"], page["truncated"]) == (2, True)
+    assert [row["name"] for row in page["results"]] == ["web-a", "web-b"]
@@ -0,0 +1,70 @@
+import threading
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+from app.database import create_database_engine
+
+def test_file_database_uses_wal_and_tuned_pragmas(tmp_path):
+    """Test that file databases are opened in WAL mode with the configured pragmas."""
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'embedded.db'}")
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA cache_size")).scalar() < 0
+    engine.dispose()
+
+def test_memory_database_shares_one_connection():
+    """Test that an in-memory database keeps its tables across sessions."""
+    engine = create_database_engine("sqlite://")
+    assert isinstance(engine.pool, StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE t (x INTEGER)"))
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM t")).scalar() == 0
+
+def test_concurrent_writers_are_serialized(tmp_path):
+    """Test that writers in many threads take turns instead of hitting 'database is locked'."""
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'embedded.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE events (id INTEGER PRIMARY KEY, worker INTEGER)"))
+    errors = []
+
+    def write(worker):
+        try:
+            for _ in range(25):
+                with engine.begin() as connection:
+                    connection.execute(text("INSERT INTO events (worker) VALUES (:w)"), {"w": worker})
+                    connection.execute(text("SELECT count(*) FROM events")).scalar()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM events")).scalar() == 200
+    engine.dispose()
+
+def test_writer_lock_is_released_on_rollback(tmp_path):
+    """Test that a rolled back write does not block the next writer."""
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'embedded.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE t (x INTEGER)"))
+    connection = engine.connect()
+    connection.execute(text("INSERT INTO t VALUES (1)"))
+    connection.rollback()
+    connection.close()
+
+    done = threading.Event()
+    def write():
+        with engine.begin() as other:
+            other.execute(text("INSERT INTO t VALUES (2)"))
+        done.set()
+    thread = threading.Thread(target=write)
+    thread.start()
+    thread.join(timeout=5)
+    assert done.is_set()
+    engine.dispose()
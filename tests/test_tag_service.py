@@ -0,0 +1,61 @@
+import pytest
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.models.resource_tag import ResourceTag
+from app.services.tag_service import TagService, parse_tag_filters
+
+def _resource(name, cost, tags):
+    return CloudResource(name=name, resource_type=ResourceType.COMPUTE, provider=CloudProvider.AWS,
+                         instance_type="m5.large", monthly_cost=cost, tags=tags)
+
+def _fleet(db):
+    db.add_all([
+        _resource("web-1", 100.0, {"team": "web", "env": "prod"}),
+        _resource("web-2", 50.0, {"team": "web", "env": "dev"}),
+        _resource("etl-1", 80.0, {"team": "data", "env": "prod"}),
+        _resource("misc-1", 20.0, {"env": "prod"}),
+        _resource("misc-2", 5.0, {}),
+    ])
+    db.commit()
+
+def test_parse_tag_filters():
+    """Test that key:value filters are parsed and malformed ones rejected."""
+    assert parse_tag_filters(["env:prod", " team : web "]) == {"env": "prod", "team": "web"}
+    for bad in (["env"], ["env:"], [":prod"], ["env:prod", "env:dev"]):
+        with pytest.raises(ValueError):
+            parse_tag_filters(bad)
+
+def test_cost_by_tag_groups_and_reports_untagged(db_session):
+    """Test that cost is grouped by tag value with untagged resources kept apart."""
+    _fleet(db_session)
+    result = TagService().cost_by_tag(db_session, "team", {})
+
+    assert result["groups"] == [
+        {"value": "web", "total_cost": 150.0, "resource_count": 2},
+        {"value": "data", "total_cost": 80.0, "resource_count": 1},
+    ]
+    assert result["untagged"] == {"total_cost": 25.0, "resource_count": 2}
+    assert result["total_cost"] == 255.0 and result["resource_count"] == 5
+
+def test_cost_by_tag_applies_filters(db_session):
+    """Test that only resources matching every tag filter are aggregated."""
+    _fleet(db_session)
+    result = TagService().cost_by_tag(db_session, "team", {"env": "prod"})
+
+    assert [(g["value"], g["total_cost"]) for g in result["groups"]] == [("web", 100.0), ("data", 80.0)]
+    assert result["untagged"] == {"total_cost": 20.0, "resource_count": 1}
+    assert TagService().cost_by_tag(db_session, "team", {"env": "prod", "team": "data"})["total_cost"] == 80.0
+
+def test_tag_table_follows_resource_writes(db_session):
+    """Test that tag rows track retagging, cost changes and deletes."""
+    _fleet(db_session)
+    web = db_session.query(CloudResource).filter_by(name="web-1").one()
+    web.tags["team"] = "platform"
+    web.monthly_cost = 120.0
+    db_session.delete(db_session.query(CloudResource).filter_by(name="etl-1").one())
+    db_session.commit()
+
+    rows = db_session.query(ResourceTag).filter_by(resource_id=web.id).all()
+    assert {(row.key, row.value, row.monthly_cost) for row in rows} == {("team", "platform", 120.0),
+                                                                         ("env", "prod", 120.0)}
+    groups = TagService().cost_by_tag(db_session, "team", {})["groups"]
+    assert [(g["value"], g["total_cost"]) for g in groups] == [("platform", 120.0), ("web", 50.0)]
@@ -0,0 +1,78 @@
+import json
+import threading
+import pytest
+from sqlalchemy import text
+from app import tracing
+from app.config import settings
+
+@pytest.fixture
+def span_file(tmp_path, monkeypatch):
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(settings, "TRACE_FILE", str(path))
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(tracing, "_exporter", None)
+    yield path
+    for handler in list(tracing.logging.getLogger("app.tracing.export").handlers):
+        handler.close()
+        tracing.logging.getLogger("app.tracing.export").removeHandler(handler)
+
+def _spans(path):
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_sampled_trace_links_spans_and_sql(span_file, db_session):
+    """Test that spans nest under the root and SQL statements become client spans."""
+    @tracing.traced()
+    def load():
+        return db_session.execute(text("SELECT 1")).scalar()
+
+    with tracing.span("GET /things", tracing.KIND_SERVER, root=True):
+        load()
+
+    spans = {span["name"]: span for span in _spans(span_file)}
+    root, handler, sql = spans["GET /things"], spans[load.__qualname__], spans["sql"]
+    assert root["parentSpanId"] == ""
+    assert handler["parentSpanId"] == root["spanId"] and sql["parentSpanId"] == handler["spanId"]
+    assert len({root["traceId"], handler["traceId"], sql["traceId"]}) == 1
+    assert sql["kind"] == tracing.KIND_CLIENT
+    assert {"key": "db.statement", "value": {"stringValue": "SELECT 1"}} in sql["attributes"]
+    assert root["endTimeUnixNano"] >= handler["endTimeUnixNano"] >= sql["endTimeUnixNano"]
+
+def test_unsampled_and_orphan_spans_are_not_recorded(span_file, monkeypatch, db_session):
+    """Test that nothing is written outside a sampled root span."""
+    db_session.execute(text("SELECT 1"))
+    with tracing.span("orphan"):
+        pass
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATE", 0.0)
+    with tracing.span("GET /things", root=True):
+        with tracing.span("inner"):
+            db_session.execute(text("SELECT 1"))
+    assert _spans(span_file) == []
+
+def test_failed_span_records_error(span_file):
+    """Test that an exception marks the span as failed and propagates."""
+    with pytest.raises(ValueError):
+        with tracing.span("job", root=True):
+            raise ValueError("boom")
+    [span] = _spans(span_file)
+    assert span["status"]["code"] == tracing.STATUS_ERROR
+    assert {"key": "exception.type", "value": {"stringValue": "ValueError"}} in span["attributes"]
+
+def test_concurrent_first_exports_add_one_handler(span_file):
+    """Test that threads exporting their first spans at once share one file handler."""
+    barrier = threading.Barrier(8)
+
+    def export():
+        barrier.wait()
+        with tracing.span("GET /things", tracing.KIND_SERVER, root=True):
+            pass
+
+    threads = [threading.Thread(target=export) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(tracing.logging.getLogger("app.tracing.export").handlers) == 1
+    assert len(_spans(span_file)) == 8
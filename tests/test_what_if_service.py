@@ -0,0 +1,98 @@
+import random
+from collections import defaultdict
+from app.models.cloud_resource import CloudResource, ResourceType, CloudProvider
+from app.services.fleet_columns import load_fleet_columns
+from app.services.optimization_service import OptimizationService
+from app.services.rule_plan import THRESHOLD_FIELDS, RulePlan
+from app.services.what_if_service import WhatIfService
+
+def _seed(db_session, count=200):
+    rng = random.Random(7)
+    instance_types = ["t3.xlarge", "m5.large", "c5.large", "Standard_D2s_v3"]
+    for index in range(count):
+        resource_type = rng.choice(list(ResourceType))
+        db_session.add(CloudResource(
+            name=f"resource-{index}",
+            resource_type=resource_type,
+            provider=rng.choice(list(CloudProvider)),
+            instance_type=rng.choice(instance_types),
+            cpu_utilization=rng.choice([None, 0.0, rng.uniform(0, 100)]),
+            memory_utilization=rng.choice([None, rng.uniform(0, 100)]),
+            storage_usage=rng.uniform(0, 1500) if resource_type == ResourceType.STORAGE else None,
+            monthly_cost=rng.uniform(10, 500),
+        ))
+    db_session.commit()
+
+def test_what_if_matches_rule_evaluation(db_session):
+    """Test that every grid point matches a brute-force evaluation of the rules."""
+    _seed(db_session)
+    fleet = load_fleet_columns(db_session)
+    service = WhatIfService()
+    cpu_axis, memory_axis, storage_axis = [10, 30, 55.5], [20, 50, 90], [100, 500, 1200]
+    result = service.simulate(fleet, cpu_axis, memory_axis, storage_axis)
+
+    resources = db_session.query(CloudResource).all()
+    optimizer = service.optimization_service
+    for i, cpu_limit in enumerate(cpu_axis):
+        for j, memory_limit in enumerate(memory_axis):
+            matched = [
+                r for r in resources
+                if r.resource_type in (ResourceType.COMPUTE, ResourceType.DATABASE, ResourceType.CACHE)
+                and r.cpu_utilization and r.memory_utilization
+                and r.cpu_utilization < cpu_limit and r.memory_utilization < memory_limit
+            ]
+            expected = sum(optimizer._calculate_downsizing_savings(r) for r in matched)
+            assert result["downsize"]["resource_count"][i][j] == len(matched)
+            assert abs(result["downsize"]["savings"][i][j] - round(expected, 2)) < 0.02
+
+    for k, storage_limit in enumerate(storage_axis):
+        matched = [r for r in resources
+                   if r.resource_type == ResourceType.STORAGE and r.storage_usage and r.storage_usage > storage_limit]
+        assert result["storage_optimization"]["resource_count"][k] == len(matched)
+
+def test_what_if_defaults_to_current_settings(db_session):
+    """Test that omitted axes fall back to the configured thresholds."""
+    _seed(db_session, count=20)
+    result = WhatIfService().simulate(load_fleet_columns(db_session))
+    assert result["cpu_thresholds"] == [30.0]
+    assert result["memory_thresholds"] == [50.0]
+    assert result["storage_thresholds"] == [500.0]
+    assert result["resources_evaluated"] == 20
+
+def test_what_if_follows_rule_overrides_per_cell(db_session):
+    """Test that omitted axes, storage rates and termination use each resource's rule thresholds."""
+    _seed(db_session)
+    plan = RulePlan([
+        {**dict.fromkeys(THRESHOLD_FIELDS), "resource_type": ResourceType.COMPUTE, "provider": CloudProvider.AWS,
+         "downsize_cpu": 60.0, "terminate_cpu": 25.0},
+        {**dict.fromkeys(THRESHOLD_FIELDS), "resource_type": None, "provider": CloudProvider.GCP,
+         "downsize_memory": 80.0, "storage_size": 200.0, "storage_rate": 0.6, "terminate_memory": 40.0},
+    ])
+    service = WhatIfService()
+    result = service.simulate(load_fleet_columns(db_session), plan=plan)
+
+    savings, counts = defaultdict(float), defaultdict(int)
+    for resource in db_session.query(CloudResource):
+        thresholds = plan.thresholds(resource.resource_type, resource.provider)
+        for rec in service.optimization_service._analyze_single_resource(resource, thresholds):
+            savings[rec.recommendation_type] += rec.estimated_savings
+            counts[rec.recommendation_type] += 1
+    assert result["downsize"]["resource_count"] == [[counts["downsize"]]]
+    assert abs(result["downsize"]["savings"][0][0] - savings["downsize"]) < 0.02
+    assert result["storage_optimization"]["resource_count"] == [counts["storage_optimization"]]
+    assert abs(result["storage_optimization"]["savings"][0] - savings["storage_optimization"]) < 0.02
+    assert result["terminate"]["resource_count"] == counts["terminate"]
+    assert abs(result["terminate"]["savings"] - savings["terminate"]) < 0.02
+
+def test_what_if_uses_the_optimizer_savings_rates(db_session):
+    """Test that the default downsizing and termination rates come from the optimization service."""
+    db_session.add(CloudResource(name="idle", resource_type=ResourceType.COMPUTE, provider=CloudProvider.AWS,
+                                 instance_type="c5.large", cpu_utilization=5.0, memory_utilization=10.0,
+                                 monthly_cost=200.0))
+    db_session.commit()
+    optimizer = OptimizationService()
+    optimizer.downsizing_default_rate = 0.2
+    optimizer.termination_savings_rate = 0.5
+    result = WhatIfService(optimizer).simulate(load_fleet_columns(db_session))
+    assert result["downsize"]["savings"] == [[40.0]]
+    assert result["terminate"]["savings"] == 100.0
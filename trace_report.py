@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Summarize the spans written by the API's tracer (see TRACE_SAMPLE_RATE).
+
+For every route: request count and latency percentiles, where the time went
+(self time per span name: SQL, handler, service methods, and the request's
+own time for dependency setup and serialization), and the critical path of
+its slowest request.
+
+Usage:
+    python trace_report.py                      # traces/spans.jsonl and its rotated files
+    python trace_report.py spans.jsonl --route "GET /api/v1/recommendations"
+"""
+
+import argparse
+import glob
+import json
+import statistics
+from collections import defaultdict
+from app.config import settings
+
+def load_spans(paths):
+    spans = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    spans.append(json.loads(line))
+    return spans
+
+def build_traces(spans):
+    """Group spans by trace and link children; returns the root span of each complete trace."""
+    by_trace = defaultdict(dict)
+    for span in spans:
+        span["children"] = []
+        span["duration_ms"] = (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e6
+        by_trace[span["traceId"]][span["spanId"]] = span
+    roots = []
+    for members in by_trace.values():
+        root = None
+        for span in members.values():
+            parent = members.get(span["parentSpanId"])
+            if parent is not None:
+                parent["children"].append(span)
+            elif not span["parentSpanId"]:
+                root = span
+        if root is not None:
+            roots.append(root)
+    for root in roots:
+        _set_self_time(root)
+    return roots
+
+def _set_self_time(span):
+    span["children"].sort(key=lambda child: child["startTimeUnixNano"])
+    children_ms = sum(child["duration_ms"] for child in span["children"])
+    span["self_ms"] = max(span["duration_ms"] - children_ms, 0.0)
+    for child in span["children"]:
+        _set_self_time(child)
+
+def _walk(span):
+    yield span
+    for child in span["children"]:
+        yield from _walk(child)
+
+def critical_path(root):
+    """Follow, from the root, the child that finished last at every level."""
+    path = [root]
+    while path[-1]["children"]:
+        path.append(max(path[-1]["children"], key=lambda child: child["endTimeUnixNano"]))
+    return path
+
+def _label(span, root):
+    return "(request: setup and serialization)" if span is root else span["name"]
+
+def report(roots, route=None, limit=20):
+    by_route = defaultdict(list)
+    for root in roots:
+        if route is None or root["name"] == route:
+            by_route[root["name"]].append(root)
+
+    ranked = sorted(by_route.items(), key=lambda item: -sum(r["duration_ms"] for r in item[1]))
+    for name, requests in ranked[:limit]:
+        durations = sorted(r["duration_ms"] for r in requests)
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        print(f"\n{name}: {len(requests)} traced, p50 {statistics.median(durations):.1f} ms, "
+              f"p95 {p95:.1f} ms, max {durations[-1]:.1f} ms")
+
+        self_time = defaultdict(float)
+        calls = defaultdict(int)
+        for root in requests:
+            for span in _walk(root):
+                label = _label(span, root)
+                self_time[label] += span["self_ms"]
+                calls[label] += 1
+        total = sum(self_time.values()) or 1.0
+        print(f"  {'self time by span':<48}{'ms/request':>12}{'calls/request':>15}{'share':>8}")
+        for label, ms in sorted(self_time.items(), key=lambda item: -item[1]):
+            print(f"  {label[:48]:<48}{ms / len(requests):>12.2f}{calls[label] / len(requests):>15.1f}"
+                  f"{ms / total:>8.0%}")
+
+        slowest = max(requests, key=lambda r: r["duration_ms"])
+        print(f"  critical path of slowest request ({slowest['duration_ms']:.1f} ms):")
+        for depth, span in enumerate(critical_path(slowest)):
+            print(f"    {'  ' * depth}{span['name'][:70]}  {span['duration_ms']:.1f} ms "
+                  f"(self {span['self_ms']:.1f} ms)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize traced requests and their critical paths.")
+    parser.add_argument("paths", nargs="*", help="Span files (default: TRACE_FILE and its rotated backups)")
+    parser.add_argument("--route", help="Only this route, e.g. 'GET /api/v1/recommendations'")
+    parser.add_argument("--limit", type=int, default=20, help="Number of routes to show, slowest in total first")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(f"{settings.TRACE_FILE}*"))
+    if not paths:
+        parser.error(f"No span files found at {settings.TRACE_FILE}")
+    roots = build_traces(load_spans(paths))
+    if not roots:
+        print("No complete traces found.")
+        return
+    report(roots, args.route, args.limit)
+
+if __name__ == "__main__":
+    main()